@@ -0,0 +1,68 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+from fastapi import HTTPException, Request, status
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.hateoas import render_links
+
+BULK_CHUNK_SIZE = 500
+
+
+def chunked(values: Sequence, size: int = BULK_CHUNK_SIZE) -> Iterable[Sequence]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def check_batch_size(items: Sequence):
+    if not items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Bulk request must contain at least one item"
+        )
+    if len(items) > settings.bulk_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Bulk request exceeds the limit of {settings.bulk_max_items} items"
+        )
+
+
+def existing_values(db: Session, column, values: Iterable) -> Set:
+    found = set()
+    for chunk in chunked(list(set(values))):
+        found.update(db.scalars(select(column).where(column.in_(chunk))))
+    return found
+
+
+def validation_errors(exc: ValidationError) -> List[Dict[str, Any]]:
+    return [
+        {
+            "field": " -> ".join(str(x) for x in error["loc"]),
+            "message": error["msg"],
+            "type": error["type"]
+        }
+        for error in exc.errors()
+    ]
+
+
+def item_error(index: int, field: str, message: str, error_type: str, item_id: Optional[int] = None) -> Dict[str, Any]:
+    return {
+        "index": index,
+        "id": item_id,
+        "status": "error",
+        "errors": [{"field": field, "message": message, "type": error_type}]
+    }
+
+
+def item_success(index: int, item_id: int, outcome: str) -> Dict[str, Any]:
+    return {"index": index, "id": item_id, "status": outcome, "errors": []}
+
+
+def bulk_response(request: Request, link_kind: str, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    failed = sum(1 for result in results if result["status"] == "error")
+    return {
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "items": results,
+        "links": render_links(request, link_kind)
+    }
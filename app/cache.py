@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable, Optional
+from prometheus_client import Counter, Gauge
+from app.config import settings
+
+CACHE_HITS = Counter(
+    'cache_hits_total',
+    'Resource cache lookups served from memory',
+    ['cache', 'instance']
+)
+
+CACHE_MISSES = Counter(
+    'cache_misses_total',
+    'Resource cache lookups that had to query the database',
+    ['cache', 'instance']
+)
+
+CACHE_EVICTIONS = Counter(
+    'cache_evictions_total',
+    'Resource cache entries removed before being served again',
+    ['cache', 'reason', 'instance']
+)
+
+CACHE_ENTRIES = Gauge(
+    'cache_entries',
+    'Entries currently held in a resource cache',
+    ['cache', 'instance']
+)
+
+
+class ResourceCache:
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float, enabled: bool = True):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.epoch = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    CACHE_HITS.labels(cache=self.name, instance=settings.instance_name).inc()
+                    return value
+                del self._entries[key]
+                self._evicted("expired")
+            CACHE_MISSES.labels(cache=self.name, instance=settings.instance_name).inc()
+            return None
+
+    def put(self, key: Hashable, value: Any, epoch: int):
+        if not self.enabled:
+            return
+        with self._lock:
+            # an invalidation landed while the value was being loaded, so it may already be stale
+            if epoch != self.epoch:
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evicted("size")
+            self._track_size()
+
+    def invalidate(self, keys: Iterable[Hashable]):
+        with self._lock:
+            self.epoch += 1
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self._evicted("invalidated")
+            self._track_size()
+
+    def clear(self):
+        with self._lock:
+            self.epoch += 1
+            self._entries.clear()
+            self._track_size()
+
+    def _evicted(self, reason: str):
+        CACHE_EVICTIONS.labels(cache=self.name, reason=reason, instance=settings.instance_name).inc()
+        self._track_size()
+
+    def _track_size(self):
+        CACHE_ENTRIES.labels(cache=self.name, instance=settings.instance_name).set(len(self._entries))
+
+
+game_cache = ResourceCache("games", settings.cache_max_entries, settings.cache_ttl_seconds, settings.cache_enabled)
+user_cache = ResourceCache("users", settings.cache_max_entries, settings.cache_ttl_seconds, settings.cache_enabled)
+trade_offer_cache = ResourceCache("trade_offers", settings.cache_max_entries, settings.cache_ttl_seconds, settings.cache_enabled)
+
+CACHES = {cache.name: cache for cache in (game_cache, user_cache, trade_offer_cache)}
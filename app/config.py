@@ -1,3 +1,4 @@
+from typing import List
 from pydantic_settings import BaseSettings
 
 
@@ -8,10 +9,64 @@ class Settings(BaseSettings):
     access_token_expire_minutes: int = 30
     kafka_bootstrap_servers: str = "kafka:9092"
     kafka_topic_notifications: str = "email-notifications"
+    kafka_topic_cache_invalidations: str = "cache-invalidations"
+    kafka_linger_ms: int = 20
+    kafka_batch_size: int = 16384
+    kafka_compression_type: str = "gzip"
+    kafka_flush_timeout_seconds: float = 10.0
+    kafka_reconnect_backoff_seconds: float = 0.5
+    kafka_reconnect_backoff_max_seconds: float = 30.0
+    kafka_event_encoding: str = "binary"
+
+    outbox_relay_enabled: bool = True
+    outbox_batch_size: int = 100
+    outbox_poll_interval_ms: int = 500
+    outbox_claim_seconds: int = 30
+    outbox_retry_base_seconds: float = 1.0
+    outbox_retry_max_seconds: float = 300.0
+    outbox_max_attempts: int = 10
+    outbox_retention_hours: float = 24.0
+    outbox_cleanup_interval_seconds: float = 300.0
+    instance_name: str = "UNKNOWN"
+
+    db_pool_size: int = 10
+    db_max_overflow: int = 30
+    db_pool_timeout: int = 30
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kib: int = 65536
+    sqlite_mmap_size_bytes: int = 268435456
+    migration_lock_timeout_seconds: float = 600.0
+
+    bulk_max_items: int = 100000
+
+    cache_enabled: bool = True
+    cache_max_entries: int = 10000
+    cache_ttl_seconds: float = 30.0
+
+    trade_cycle_max_length: int = 4
+    trade_cycle_sync_overlap_seconds: int = 5
+
+    async_db: bool = False
+    async_database_url: str = ""
+
+    metrics_request_buckets: List[float] = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+    metrics_component_buckets: List[float] = [
+        0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0
+    ]
+    slow_query_ms: float = 100.0
+    query_repeat_threshold: int = 5
+    server_timing_enabled: bool = True
+
+    log_level: str = "INFO"
+    log_format: str = "json"
+    log_queue_size: int = 10000
+    log_sample_rate: float = 1.0
+    log_slow_request_ms: float = 1000.0
 
     class Config:
         env_file = ".env"
 
 
 settings = Settings()
-
@@ -1,13 +1,209 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+import time
+from prometheus_client import Counter, Gauge, Histogram
 from app.config import settings
+from app.query_stats import record_query
 
-engine = create_engine(
-    settings.database_url, connect_args={"check_same_thread": False}
+DB_POOL_CHECKED_OUT = Gauge(
+    'db_pool_checked_out_connections',
+    'Number of database connections currently checked out of the pool',
+    ['instance']
 )
+
+DB_LOCK_WAITS = Gauge(
+    'db_lock_waits_active',
+    'Number of write statements currently holding or waiting for the SQLite write lock',
+    ['instance']
+)
+
+DB_LOCK_TIMEOUTS = Counter(
+    'db_lock_timeouts_total',
+    'Statements that failed because the SQLite database stayed locked past busy_timeout',
+    ['instance']
+)
+
+DB_QUERY_DURATION = Histogram(
+    'db_query_duration_seconds',
+    'Time spent executing SQL statements on the database driver',
+    ['operation', 'instance'],
+    buckets=settings.metrics_component_buckets
+)
+
+WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+QUERY_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH"}
+
+
+def is_sqlite(database_url: str) -> bool:
+    return make_url(database_url).get_backend_name() == "sqlite"
+
+
+def is_sqlite_memory(database_url: str) -> bool:
+    database = make_url(database_url).database
+    return not database or database == ":memory:"
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout_ms)}")
+    cursor.execute(f"PRAGMA journal_mode = {settings.sqlite_journal_mode}")
+    cursor.execute(f"PRAGMA synchronous = {settings.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA cache_size = -{int(settings.sqlite_cache_size_kib)}")
+    cursor.execute(f"PRAGMA mmap_size = {int(settings.sqlite_mmap_size_bytes)}")
+    cursor.close()
+
+
+def _track_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_CHECKED_OUT.labels(instance=settings.instance_name).inc()
+
+
+def _track_checkin(dbapi_connection, connection_record):
+    DB_POOL_CHECKED_OUT.labels(instance=settings.instance_name).dec()
+
+
+def _before_write(conn, cursor, statement, parameters, context, executemany):
+    if statement.lstrip().upper().startswith(WRITE_PREFIXES):
+        conn.info["lock_wait"] = True
+        DB_LOCK_WAITS.labels(instance=settings.instance_name).inc()
+
+
+def _after_write(conn, cursor, statement, parameters, context, executemany):
+    if conn.info.pop("lock_wait", False):
+        DB_LOCK_WAITS.labels(instance=settings.instance_name).dec()
+
+
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _finish_query(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start"].pop()
+    operation = (statement.split(None, 1) or [""])[0].upper()
+    DB_QUERY_DURATION.labels(
+        operation=operation if operation in QUERY_OPERATIONS else "OTHER",
+        instance=settings.instance_name
+    ).observe(duration)
+    record_query(statement, parameters, duration, executemany)
+
+
+def _instrument_queries(sync_engine):
+    event.listen(sync_engine, "before_cursor_execute", _start_query)
+    event.listen(sync_engine, "after_cursor_execute", _finish_query)
+
+
+def _handle_error(context):
+    if context.connection is not None and context.connection.info.get("query_start"):
+        context.connection.info["query_start"].pop()
+    if context.connection is not None and context.connection.info.pop("lock_wait", False):
+        DB_LOCK_WAITS.labels(instance=settings.instance_name).dec()
+    if "database is locked" in str(context.original_exception):
+        DB_LOCK_TIMEOUTS.labels(instance=settings.instance_name).inc()
+
+
+def create_db_engine(database_url: str):
+    if not is_sqlite(database_url):
+        server_engine = create_engine(
+            database_url,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_pre_ping=True
+        )
+        _instrument_queries(server_engine)
+        event.listen(server_engine, "handle_error", _handle_error)
+        return server_engine
+
+    engine_args = {
+        "connect_args": {
+            "check_same_thread": False,
+            "timeout": settings.sqlite_busy_timeout_ms / 1000
+        }
+    }
+    if not is_sqlite_memory(database_url):
+        engine_args.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout
+        )
+
+    sqlite_engine = create_engine(database_url, **engine_args)
+    event.listen(sqlite_engine, "connect", _apply_sqlite_pragmas)
+    _instrument_queries(sqlite_engine)
+    event.listen(sqlite_engine, "checkout", _track_checkout)
+    event.listen(sqlite_engine, "checkin", _track_checkin)
+    event.listen(sqlite_engine, "before_cursor_execute", _before_write)
+    event.listen(sqlite_engine, "after_cursor_execute", _after_write)
+    event.listen(sqlite_engine, "handle_error", _handle_error)
+    return sqlite_engine
+
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def to_async_url(database_url: str) -> str:
+    url = make_url(database_url)
+    if url.get_dialect().is_async:
+        return database_url
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver known for database URL: {database_url}")
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def create_async_db_engine(database_url: str):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    if not is_sqlite(database_url):
+        server_engine = create_async_engine(
+            database_url,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_pre_ping=True
+        )
+        _instrument_queries(server_engine.sync_engine)
+        event.listen(server_engine.sync_engine, "handle_error", _handle_error)
+        return server_engine
+
+    engine_args = {"connect_args": {"timeout": settings.sqlite_busy_timeout_ms / 1000}}
+    if not is_sqlite_memory(database_url):
+        engine_args.update(
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout
+        )
+
+    sqlite_engine = create_async_engine(database_url, **engine_args)
+    sync_engine = sqlite_engine.sync_engine
+    event.listen(sync_engine, "connect", _apply_sqlite_pragmas)
+    _instrument_queries(sync_engine)
+    event.listen(sync_engine, "checkout", _track_checkout)
+    event.listen(sync_engine, "checkin", _track_checkin)
+    event.listen(sync_engine, "before_cursor_execute", _before_write)
+    event.listen(sync_engine, "after_cursor_execute", _after_write)
+    event.listen(sync_engine, "handle_error", _handle_error)
+    return sqlite_engine
+
+
+engine = create_db_engine(settings.database_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = None
+AsyncSessionLocal = None
+if settings.async_db:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    async_engine = create_async_db_engine(settings.async_database_url or to_async_url(settings.database_url))
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
@@ -18,3 +214,7 @@ def get_db():
     finally:
         db.close()
 
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,72 @@
+import hashlib
+from datetime import datetime
+from typing import Any, Iterable, Optional, Tuple
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+
+def _digest(value: str, size: int) -> str:
+    return hashlib.blake2b(value.encode("utf-8"), digest_size=size).hexdigest()
+
+
+def resource_version(kind: str, resource_id: int, updated_at: datetime) -> str:
+    return _digest(f"{kind}:{resource_id}:{updated_at.isoformat()}", 8)
+
+
+def collection_version(items: Iterable[Tuple[int, datetime]], *extra: Any) -> str:
+    hasher = hashlib.blake2b(digest_size=8)
+    for item_id, updated_at in items:
+        hasher.update(f"{item_id}:{updated_at.isoformat()};".encode("utf-8"))
+    if extra:
+        hasher.update(repr(extra).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def make_etag(request: Request, version: str) -> str:
+    # links embed the base URL and the query string picks the representation, so both are part of the tag
+    variant = _digest(f"{request.base_url}{request.url.path}?{request.url.query}", 4)
+    return f'"{version}.{variant}"'
+
+
+def _tags(header: str):
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    tags = {tag[2:] if tag.startswith("W/") else tag for tag in _tags(header)}
+    if "*" in tags or etag in tags:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return None
+
+
+def check_if_match(request: Request, db: Session, model, row):
+    header = request.headers.get("if-match")
+    if header is None:
+        return
+
+    if header.strip() != "*":
+        version = resource_version(model.__tablename__, row.id, row.updated_at)
+        versions = {tag.strip('"').split(".")[0] for tag in _tags(header) if not tag.startswith("W/")}
+        if version not in versions:
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Resource has been modified"
+            )
+
+    # claim the version inside this transaction so a concurrent write between the check and the commit is caught
+    claimed = db.execute(
+        update(model)
+        .where(model.id == row.id, model.updated_at == row.updated_at)
+        .values(updated_at=datetime.utcnow()),
+        execution_options={"synchronize_session": False}
+    )
+    if claimed.rowcount != 1:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Resource has been modified"
+        )
@@ -0,0 +1,73 @@
+import csv
+import enum
+import io
+import json
+from datetime import datetime
+from typing import Any, Iterator, List
+from fastapi.responses import StreamingResponse
+from app.database import SessionLocal
+
+EXPORT_BATCH_SIZE = 1000
+
+
+class ExportFormat(str, enum.Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+EXPORT_RESPONSES = {
+    200: {
+        "description": "Rows streamed as NDJSON or CSV",
+        "content": {media_type: {} for media_type in MEDIA_TYPES.values()},
+    }
+}
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _stream(statement, columns: List[str], export_format: ExportFormat) -> Iterator[bytes]:
+    db = SessionLocal()
+    try:
+        result = db.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        if export_format == ExportFormat.CSV:
+            writer.writerow(columns)
+
+        for partition in result.partitions():
+            if export_format == ExportFormat.CSV:
+                writer.writerows([_plain(value) for value in row] for row in partition)
+            else:
+                for row in partition:
+                    buffer.write(json.dumps(dict(zip(columns, map(_plain, row))), separators=(",", ":")))
+                    buffer.write("\n")
+
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+    finally:
+        db.close()
+
+
+def export_response(statement, export_format: ExportFormat, filename: str) -> StreamingResponse:
+    columns = [column.key for column in statement.selected_columns]
+    return StreamingResponse(
+        _stream(statement, columns, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format.value}"'}
+    )
@@ -0,0 +1,136 @@
+import importlib
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import bindparam, delete, select
+from sqlalchemy.orm import Session
+from app.bulk import chunked
+from app.models import GameCondition, GameFacetCount, VideoGame
+
+FACET_COLUMNS = ("gaming_system", "condition", "publisher", "year_published")
+
+UPSERT_DIALECTS = ("sqlite", "postgresql")
+
+facet_counts_table = GameFacetCount.__table__
+
+
+class GameFilters:
+    def __init__(
+        self,
+        gaming_system: Optional[str] = None,
+        condition: Optional[GameCondition] = None,
+        publisher: Optional[str] = None,
+        year_min: Optional[int] = None,
+        year_max: Optional[int] = None
+    ):
+        self.gaming_system = gaming_system
+        self.condition = condition
+        self.publisher = publisher
+        self.year_min = year_min
+        self.year_max = year_max
+
+    def clauses(self, source) -> List:
+        clauses = []
+        if self.gaming_system:
+            clauses.append(source.gaming_system == self.gaming_system)
+        if self.condition:
+            clauses.append(source.condition == self.condition)
+        if self.publisher:
+            clauses.append(source.publisher == self.publisher)
+        if self.year_min is not None:
+            clauses.append(source.year_published >= self.year_min)
+        if self.year_max is not None:
+            clauses.append(source.year_published <= self.year_max)
+        return clauses
+
+    def order_columns(self) -> Tuple:
+        if self.year_min is not None or self.year_max is not None:
+            return (VideoGame.year_published, VideoGame.id)
+        return (VideoGame.id,)
+
+    def query_params(self) -> Dict[str, Any]:
+        return {
+            "gaming_system": self.gaming_system,
+            "condition": self.condition,
+            "publisher": self.publisher,
+            "year_min": self.year_min,
+            "year_max": self.year_max,
+        }
+
+
+def facet_key(game) -> Tuple:
+    if isinstance(game, dict):
+        return tuple(game[column] for column in FACET_COLUMNS)
+    return tuple(getattr(game, column) for column in FACET_COLUMNS)
+
+
+def facet_statement(filters: GameFilters):
+    return select(
+        GameFacetCount.gaming_system,
+        GameFacetCount.condition,
+        GameFacetCount.publisher,
+        GameFacetCount.year_published,
+        GameFacetCount.game_count
+    ).where(*filters.clauses(GameFacetCount))
+
+
+def facet_counts(rows: Iterable) -> Dict[str, Dict[str, int]]:
+    totals = {column: Counter() for column in FACET_COLUMNS}
+    for *key, game_count in rows:
+        for column, value in zip(FACET_COLUMNS, key):
+            totals[column][value.value if isinstance(value, GameCondition) else str(value)] += game_count
+
+    return {
+        column: dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+        for column, counts in totals.items()
+    }
+
+
+def current_facet_keys(db: Session, game_ids: Iterable[int]) -> Dict[int, Tuple]:
+    keys = {}
+    for chunk in chunked(list(set(game_ids))):
+        for game_id, *key in db.execute(
+            select(VideoGame.id, *(getattr(VideoGame, column) for column in FACET_COLUMNS)).where(VideoGame.id.in_(chunk))
+        ):
+            keys[game_id] = tuple(key)
+    return keys
+
+
+def _upsert(dialect: str):
+    # imported on first write: the postgresql dialect alone adds ~50ms to every cold start
+    if dialect not in UPSERT_DIALECTS:
+        raise KeyError(dialect)
+    return importlib.import_module(f"sqlalchemy.dialects.{dialect}").insert
+
+
+def update_facet_counts(db: Session, added: Iterable[Tuple] = (), removed: Iterable[Tuple] = ()):
+    deltas = Counter(added)
+    deltas.subtract(Counter(removed))
+    rows = [
+        {**dict(zip(FACET_COLUMNS, key)), "game_count": delta}
+        for key, delta in deltas.items()
+        if delta
+    ]
+    if not rows:
+        return
+
+    statement = _upsert(db.get_bind().dialect.name)(facet_counts_table)
+    statement = statement.on_conflict_do_update(
+        index_elements=list(FACET_COLUMNS),
+        set_={"game_count": facet_counts_table.c.game_count + statement.excluded.game_count}
+    )
+    for chunk in chunked(rows):
+        db.execute(statement, chunk)
+
+    emptied = [
+        {f"key_{column}": value for column, value in zip(FACET_COLUMNS, key)}
+        for key, delta in deltas.items()
+        if delta < 0
+    ]
+    if emptied:
+        db.execute(
+            delete(facet_counts_table).where(
+                *(facet_counts_table.c[column] == bindparam(f"key_{column}") for column in FACET_COLUMNS),
+                facet_counts_table.c.game_count <= 0
+            ),
+            emptied
+        )
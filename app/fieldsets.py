@@ -0,0 +1,169 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type
+from fastapi import HTTPException, Query, Request, status
+from fastapi.responses import Response
+from pydantic import BaseModel
+from sqlalchemy.orm import load_only, selectinload
+from app.hateoas import add_game_links, add_user_links
+from app.models import TradeOffer, User, VideoGame
+from app.responses import TimedORJSONResponse, model_response, validate_list
+from app.schemas import TradeOfferResponse, UserResponse, VideoGameResponse
+
+
+class Expansion:
+    def __init__(self, relationship, foreign_key, schema: Type[BaseModel], links: Callable[[Request, Any], Dict[str, Any]]):
+        self.relationship = relationship
+        self.foreign_key = foreign_key
+        self.schema = schema
+        self.links = links
+
+    def render(self, request: Request, related) -> Optional[Dict[str, Any]]:
+        if related is None:
+            return None
+        item = self.schema.model_validate(related).model_dump()
+        item["links"] = self.links(request, related)
+        return item
+
+
+TRADE_OFFER_EXPANSIONS = {
+    "offered_game": Expansion(
+        TradeOffer.offered_game, TradeOffer.offered_game_id, VideoGameResponse,
+        lambda request, game: add_game_links(request, game.id, game.owner_id, is_owner=True)
+    ),
+    "requested_game": Expansion(
+        TradeOffer.requested_game, TradeOffer.requested_game_id, VideoGameResponse,
+        lambda request, game: add_game_links(request, game.id, game.owner_id, is_owner=True)
+    ),
+    "offerer": Expansion(
+        TradeOffer.offerer, TradeOffer.offerer_id, UserResponse,
+        lambda request, user: add_user_links(request, user.id, is_owner=True)
+    ),
+    "receiver": Expansion(
+        TradeOffer.receiver, TradeOffer.receiver_id, UserResponse,
+        lambda request, user: add_user_links(request, user.id, is_owner=True)
+    ),
+}
+
+
+def _names(value: Optional[str]) -> Tuple[str, ...]:
+    if not value:
+        return ()
+    return tuple(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+
+
+def _check(kind: str, names: Tuple[str, ...], allowed: Iterable[str]):
+    allowed = tuple(allowed)
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown {kind}: {', '.join(unknown)}. Available: {', '.join(allowed)}"
+        )
+
+
+class Representation:
+    def __init__(self, model, schema: Type[BaseModel], required: Tuple, fields: Tuple[str, ...], expand: Tuple[str, ...]):
+        self.model = model
+        self.schema = schema
+        self.required = required
+        self.fields = fields
+        self.expand = expand
+
+    @property
+    def shaped(self) -> bool:
+        return bool(self.fields or self.expand)
+
+    def options(self, *required) -> List:
+        # columns the handler needs for links, cursors, ETags and expansions are loaded even when not returned
+        options = []
+        if self.fields:
+            columns = [
+                *self.required, *required,
+                *(TRADE_OFFER_EXPANSIONS[name].foreign_key for name in self.expand),
+                *(getattr(self.model, name) for name in self.fields)
+            ]
+            options.append(load_only(*dict.fromkeys(columns)))
+        options.extend(self.expansions())
+        return options
+
+    def expansions(self) -> List:
+        return [selectinload(TRADE_OFFER_EXPANSIONS[name].relationship) for name in self.expand]
+
+    def versions(self, rows: Iterable) -> Tuple:
+        return tuple(
+            (name, related.id, related.updated_at)
+            for row in rows
+            for name in self.expand
+            for related in (getattr(row, name),)
+            if related is not None
+        )
+
+    def render(self, request: Request, row, links: Dict[str, Any]) -> Dict[str, Any]:
+        names = self.fields or tuple(name for name in self.schema.model_fields if name != "links")
+        item = {name: getattr(row, name) for name in names}
+        item["links"] = links
+        for name in self.expand:
+            item[name] = TRADE_OFFER_EXPANSIONS[name].render(request, getattr(row, name))
+        return item
+
+    def items(self, request: Request, rows: List, links: Callable[[Any], Dict[str, Any]]) -> List:
+        if not self.shaped:
+            items = validate_list(self.schema, rows)
+            for item in items:
+                item.links = links(item)
+            return items
+        return [self.render(request, row, links(row)) for row in rows]
+
+    def resource_response(self, request: Request, resource: BaseModel, links: Dict[str, Any], headers: Dict[str, str]) -> Response:
+        if not self.shaped:
+            return model_response(resource.model_copy(update={"links": links}), headers=headers)
+        return TimedORJSONResponse(self.render(request, resource, links), headers=headers)
+
+    def response(
+        self, collection: Type[BaseModel], items: List, headers: Optional[Dict[str, str]] = None, **extra: Any
+    ) -> Response:
+        if not self.shaped:
+            return model_response(collection(items=items, **extra), headers=headers)
+        return TimedORJSONResponse({"items": items, **extra}, headers=headers)
+
+    def query_params(self) -> Dict[str, Any]:
+        return {
+            "fields": ",".join(self.fields) or None,
+            "expand": ",".join(self.expand) or None,
+        }
+
+
+class SparseFields:
+    def __init__(self, model, schema: Type[BaseModel], *required):
+        self.model = model
+        self.schema = schema
+        self.required = (model.id, *required)
+        self.available = tuple(name for name in schema.model_fields if name != "links")
+
+    def __call__(
+        self,
+        fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name")
+    ) -> Representation:
+        names = _names(fields)
+        _check("fields", names, self.available)
+        return Representation(self.model, self.schema, self.required, names, ())
+
+
+class ExpandableFields(SparseFields):
+    def __call__(
+        self,
+        fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,status"),
+        expand: Optional[str] = Query(None, description=f"Related resources to embed: {','.join(TRADE_OFFER_EXPANSIONS)}")
+    ) -> Representation:
+        names = _names(fields)
+        _check("fields", names, self.available)
+        expansions = _names(expand)
+        _check("expansions", expansions, TRADE_OFFER_EXPANSIONS)
+        return Representation(self.model, self.schema, self.required, names, expansions)
+
+
+game_representation = SparseFields(VideoGame, VideoGameResponse, VideoGame.owner_id, VideoGame.updated_at)
+user_representation = SparseFields(User, UserResponse, User.updated_at)
+trade_offer_representation = ExpandableFields(
+    TradeOffer, TradeOfferResponse,
+    TradeOffer.offerer_id, TradeOffer.receiver_id, TradeOffer.created_at, TradeOffer.updated_at
+)
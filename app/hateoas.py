@@ -1,78 +1,193 @@
-from typing import Dict, Any
-from fastapi import Request
+import re
+from enum import Enum
+from functools import lru_cache
+from typing import Callable, Dict, Any, List, Optional
+from urllib.parse import urlencode
+from fastapi import Query, Request
+
+
+class LinkMode(str, Enum):
+    NONE = "none"
+    COMPACT = "compact"
+    FULL = "full"
+
+
+# (name, rel, path template, method) per resource; a path holds at most one {field}
+LINK_TEMPLATES = {
+    "user": (
+        ("self", "self", "/users/{id}", "GET"),
+        ("all_users", "collection", "/users", "GET"),
+    ),
+    "user_owner": (
+        ("self", "self", "/users/{id}", "GET"),
+        ("all_users", "collection", "/users", "GET"),
+        ("update", "update", "/users/{id}", "PUT"),
+        ("games", "games", "/users/{id}/games", "GET"),
+        ("create_game", "create_game", "/games", "POST"),
+    ),
+    "game": (
+        ("self", "self", "/games/{id}", "GET"),
+        ("all_games", "collection", "/games", "GET"),
+        ("owner", "owner", "/users/{owner_id}", "GET"),
+    ),
+    "game_owner": (
+        ("self", "self", "/games/{id}", "GET"),
+        ("all_games", "collection", "/games", "GET"),
+        ("owner", "owner", "/users/{owner_id}", "GET"),
+        ("update", "update", "/games/{id}", "PUT"),
+        ("delete", "delete", "/games/{id}", "DELETE"),
+    ),
+    "trade_offer": (
+        ("self", "self", "/trade-offers/{id}", "GET"),
+        ("all_trade_offers", "collection", "/trade-offers", "GET"),
+        ("offerer", "offerer", "/users/{offerer_id}", "GET"),
+        ("receiver", "receiver", "/users/{receiver_id}", "GET"),
+        ("accept", "accept", "/trade-offers/{id}/accept", "PUT"),
+        ("reject", "reject", "/trade-offers/{id}/reject", "PUT"),
+        ("cancel", "cancel", "/trade-offers/{id}/cancel", "PUT"),
+    ),
+    "trade_cycle": (
+        ("self", "self", "/trade-cycles/{id}", "GET"),
+        ("all_trade_cycles", "collection", "/trade-cycles", "GET"),
+        ("accept", "accept", "/trade-cycles/{id}/accept", "PUT"),
+    ),
+    "trade_cycle_offer": (
+        ("offer", "trade_offer", "/trade-offers/{id}", "GET"),
+    ),
+    "users_bulk": (
+        ("collection", "collection", "/users", "GET"),
+    ),
+    "games_bulk": (
+        ("collection", "collection", "/games", "GET"),
+    ),
+    "auth": (
+        ("self", "self", "/auth/login", "POST"),
+        ("register", "register", "/users", "POST"),
+        ("me", "me", "/users/me", "GET"),
+    ),
+}
+
+
+def link_mode(
+    request: Request,
+    links: LinkMode = Query(LinkMode.FULL, description="Hypermedia links to render: none, compact (name to href) or full")
+) -> LinkMode:
+    request.state.link_mode = links
+    request.state.link_base_url = str(request.base_url).rstrip('/')
+    return links
 
 
-def create_link(request: Request, rel: str, href: str, method: str = "GET") -> Dict[str, Any]:
-    base_url = str(request.base_url).rstrip('/')
-    return {
-        "rel": rel,
-        "href": f"{base_url}{href}",
-        "method": method
-    }
+def _mode(request: Request) -> LinkMode:
+    # request.state is a view over scope["state"]; reading the dict skips State.__getattr__ on every item
+    return request.scope.get("state", {}).get("link_mode", LinkMode.FULL)
 
 
-def add_user_links(request: Request, user_id: int, is_owner: bool = False) -> Dict[str, Any]:
-    links = {
-        "self": create_link(request, "self", f"/users/{user_id}", "GET"),
-        "all_users": create_link(request, "collection", "/users", "GET"),
-    }
+def _base_url(request: Request) -> str:
+    # built once per request by link_mode; routes without that dependency build and keep it on first use
+    state = request.scope.setdefault("state", {})
+    base_url = state.get("link_base_url")
+    if base_url is None:
+        base_url = state["link_base_url"] = str(request.base_url).rstrip('/')
+    return base_url
 
-    if is_owner:
-        links["update"] = create_link(request, "update", f"/users/{user_id}", "PUT")
-        links["games"] = create_link(request, "games", f"/users/{user_id}/games", "GET")
-        links["create_game"] = create_link(request, "create_game", "/games", "POST")
 
-    return links
+TEMPLATE_FIELD = re.compile(r"([^{]*)(?:\{(\w+)\}(.*))?")
 
 
-def add_game_links(request: Request, game_id: int, owner_id: int, is_owner: bool = False) -> Dict[str, Any]:
-    links = {
-        "self": create_link(request, "self", f"/games/{game_id}", "GET"),
-        "all_games": create_link(request, "collection", "/games", "GET"),
-        "owner": create_link(request, "owner", f"/users/{owner_id}", "GET"),
-    }
+@lru_cache(maxsize=None)
+def _renderer(kind: str, mode: LinkMode) -> Callable[[str, Dict[str, Any]], Dict[str, Any]]:
+    # keyed on the link set and mode only, so the cache stays bounded whatever Host clients send;
+    # each path is split once into the text around its field, leaving one f-string per link
+    paths = [
+        (name, rel, method, *TEMPLATE_FIELD.fullmatch(path).groups())
+        for name, rel, path, method in LINK_TEMPLATES[kind]
+    ]
 
-    if is_owner:
-        links["update"] = create_link(request, "update", f"/games/{game_id}", "PUT")
-        links["delete"] = create_link(request, "delete", f"/games/{game_id}", "DELETE")
+    if mode is LinkMode.COMPACT:
+        def render(base_url: str, values: Dict[str, Any]) -> Dict[str, Any]:
+            return {
+                name: f"{base_url}{head}{values[field]}{tail}" if field else f"{base_url}{head}"
+                for name, rel, method, head, field, tail in paths
+            }
+    else:
+        def render(base_url: str, values: Dict[str, Any]) -> Dict[str, Any]:
+            return {
+                name: {
+                    "rel": rel,
+                    "href": f"{base_url}{head}{values[field]}{tail}" if field else f"{base_url}{head}",
+                    "method": method
+                }
+                for name, rel, method, head, field, tail in paths
+            }
+    return render
+
+
+def render_links(request: Request, kind: str, **values: Any) -> Dict[str, Any]:
+    mode = _mode(request)
+    if mode is LinkMode.NONE:
+        return {}
+    return _renderer(kind, mode)(_base_url(request), values)
 
-    return links
 
+def add_user_links(request: Request, user_id: int, is_owner: bool = False) -> Dict[str, Any]:
+    return render_links(request, "user_owner" if is_owner else "user", id=user_id)
 
-def add_collection_links(request: Request, resource_path: str, skip: int = 0, limit: int = 100, count: int = 0) -> Dict[str, Any]:
-    links = {
-        "self": create_link(request, "self", resource_path, "GET"),
-    }
 
+def add_game_links(request: Request, game_id: int, owner_id: int, is_owner: bool = False) -> Dict[str, Any]:
+    return render_links(request, "game_owner" if is_owner else "game", id=game_id, owner_id=owner_id)
+
+
+def add_collection_links(
+    request: Request,
+    resource_path: str,
+    skip: int = 0,
+    limit: int = 100,
+    count: int = 0,
+    next_cursor: Optional[str] = None,
+    query_params: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    mode = _mode(request)
+    extra = urlencode({
+        key: value.value if isinstance(value, Enum) else value
+        for key, value in (query_params or {}).items()
+        if value is not None
+    })
+    extra = f"&{extra}" if extra else ""
+    if mode is not LinkMode.FULL:
+        extra = f"{extra}&links={mode.value}"
+
+    # paging links survive links=none since the cursor is only handed out through them
+    hrefs = {} if mode is LinkMode.NONE else {"self": resource_path}
     if skip > 0:
         prev_skip = max(0, skip - limit)
-        links["prev"] = create_link(request, "prev", f"{resource_path}?skip={prev_skip}&limit={limit}", "GET")
+        hrefs["prev"] = f"{resource_path}?skip={prev_skip}&limit={limit}{extra}"
 
-    if count == limit:
+    if next_cursor:
+        hrefs["next"] = f"{resource_path}?cursor={next_cursor}&limit={limit}{extra}"
+    elif count == limit:
         next_skip = skip + limit
-        links["next"] = create_link(request, "next", f"{resource_path}?skip={next_skip}&limit={limit}", "GET")
+        hrefs["next"] = f"{resource_path}?skip={next_skip}&limit={limit}{extra}"
 
-    return links
+    base_url = _base_url(request)
+    if mode is not LinkMode.FULL:
+        return {rel: f"{base_url}{href}" for rel, href in hrefs.items()}
+    return {rel: {"rel": rel, "href": f"{base_url}{href}", "method": "GET"} for rel, href in hrefs.items()}
 
 
 def add_auth_links(request: Request) -> Dict[str, Any]:
-    return {
-        "self": create_link(request, "self", "/auth/login", "POST"),
-        "register": create_link(request, "register", "/users", "POST"),
-        "me": create_link(request, "me", "/users/me", "GET"),
-    }
+    return render_links(request, "auth")
 
 
 def add_trade_offer_links(request: Request, trade_offer_id: int, offerer_id: int, receiver_id: int) -> Dict[str, Any]:
-    links = {
-        "self": create_link(request, "self", f"/trade-offers/{trade_offer_id}", "GET"),
-        "all_trade_offers": create_link(request, "collection", "/trade-offers", "GET"),
-        "offerer": create_link(request, "offerer", f"/users/{offerer_id}", "GET"),
-        "receiver": create_link(request, "receiver", f"/users/{receiver_id}", "GET"),
-        "accept": create_link(request, "accept", f"/trade-offers/{trade_offer_id}/accept", "PUT"),
-        "reject": create_link(request, "reject", f"/trade-offers/{trade_offer_id}/reject", "PUT"),
-        "cancel": create_link(request, "cancel", f"/trade-offers/{trade_offer_id}/cancel", "PUT"),
-    }
+    return render_links(request, "trade_offer", id=trade_offer_id, offerer_id=offerer_id, receiver_id=receiver_id)
 
-    return links
 
+def add_trade_cycle_links(request: Request, cycle_id: str, offer_ids: List[int]) -> Dict[str, Any]:
+    links = render_links(request, "trade_cycle", id=cycle_id)
+    if _mode(request) is LinkMode.NONE:
+        return links
+
+    for position, offer_id in enumerate(offer_ids, start=1):
+        links[f"offer_{position}"] = render_links(request, "trade_cycle_offer", id=offer_id)["offer"]
+
+    return links
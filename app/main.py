@@ -1,26 +1,31 @@
-from fastapi import FastAPI, Request, status
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, FastAPI, Request, status
 from fastapi.responses import JSONResponse, Response
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.routing import Match
 from sqlalchemy.exc import SQLAlchemyError
-from app.routers import users, games, trade_offers
-from app.database import engine, Base
+from app.routers import users, games, trade_offers, trade_cycles
+from app.database import engine, async_engine
+from app.migrations import run_migrations
+from app.config import settings
+from app.services.cache_invalidation import cache_invalidation_bus
+from app.services.kafka_producer import notification_producer
+from app.services.outbox_relay import outbox_relay
+from app.services.trade_matching import trade_matcher
 from app.schemas import ErrorResponse
+from app.responses import TimedORJSONResponse
+from app import query_stats
+from app.logging_config import access_logger, setup_logging, should_log_request
 from prometheus_client import Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
 import os
 import logging
 import time
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 INSTANCE_NAME = os.getenv("INSTANCE_NAME", "UNKNOWN")
 
-Base.metadata.create_all(bind=engine)
-
 REQUEST_COUNT = Counter(
     'http_requests_total',
     'Total HTTP requests',
@@ -30,7 +35,8 @@ REQUEST_COUNT = Counter(
 REQUEST_DURATION = Histogram(
     'http_request_duration_seconds',
     'HTTP request duration in seconds',
-    ['method', 'endpoint', 'instance']
+    ['method', 'endpoint', 'instance'],
+    buckets=settings.metrics_request_buckets
 )
 
 ACTIVE_REQUESTS = Gauge(
@@ -39,65 +45,89 @@ ACTIVE_REQUESTS = Gauge(
     ['instance']
 )
 
-app = FastAPI(
-    title="Video Game Trading API",
-    description="A RESTful API for trading video games with HATEOAS support (REST Level 3)",
-    version="1.0.0",
-    docs_url="/docs",
-    redoc_url="/redoc",
-    openapi_url="/openapi.json"
-)
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+def route_template(request: Request) -> str:
+    # label by the matched route ("/games/{game_id}") so each id does not become its own series
+    route = request.scope.get("route")
+    if route is not None:
+        return route.path
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match != Match.NONE:
+            return route.path
+    return "unmatched"
 
 
-@app.middleware("http")
 async def log_requests(request: Request, call_next):
     ACTIVE_REQUESTS.labels(instance=INSTANCE_NAME).inc()
-    start_time = time.time()
+    start_time = time.perf_counter()
+    stats = query_stats.begin()
 
-    logger.info(f"[{INSTANCE_NAME}] {request.method} {request.url.path}")
     response = await call_next(request)
 
-    duration = time.time() - start_time
+    duration = time.perf_counter() - start_time
+    endpoint = route_template(request)
+    query_stats.finish(stats, request.method, endpoint)
+    if settings.server_timing_enabled:
+        response.headers["Server-Timing"] = stats.server_timing(duration)
 
     REQUEST_COUNT.labels(
         method=request.method,
-        endpoint=request.url.path,
+        endpoint=endpoint,
         status=response.status_code,
         instance=INSTANCE_NAME
     ).inc()
 
     REQUEST_DURATION.labels(
         method=request.method,
-        endpoint=request.url.path,
+        endpoint=endpoint,
         instance=INSTANCE_NAME
     ).observe(duration)
 
     ACTIVE_REQUESTS.labels(instance=INSTANCE_NAME).dec()
 
-    logger.info(f"[{INSTANCE_NAME}] {request.method} {request.url.path} - Status: {response.status_code}")
+    if should_log_request(response.status_code, duration):
+        access_logger.info("request", extra={"fields": {
+            "instance": INSTANCE_NAME,
+            "method": request.method,
+            "path": request.url.path,
+            "endpoint": endpoint,
+            "status": response.status_code,
+            "duration_ms": round(duration * 1e3, 2),
+            "db_queries": stats.count,
+            "db_ms": round(stats.duration * 1e3, 2),
+        }})
     response.headers["X-Instance-Name"] = INSTANCE_NAME
     return response
 
 
-app.include_router(users.router)
-app.include_router(games.router)
-app.include_router(trade_offers.router)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # nothing slow or fallible runs at import; Kafka connects in the background with backoff
+    run_migrations(engine)
+    trade_matcher.warm()
+    notification_producer.start()
+    if settings.cache_enabled:
+        cache_invalidation_bus.start()
+    if settings.outbox_relay_enabled:
+        outbox_relay.start()
+    yield
+    cache_invalidation_bus.stop()
+    outbox_relay.stop()
+    notification_producer.close()
+    if settings.async_db:
+        await async_engine.dispose()
+
 
+router = APIRouter()
 
-@app.get("/metrics", tags=["monitoring"])
+
+@router.get("/metrics", tags=["monitoring"])
 def metrics():
     return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 
-@app.get("/", tags=["root"])
+@router.get("/", tags=["root"])
 def root(request: Request):
     base_url = str(request.base_url).rstrip('/')
     return {
@@ -130,6 +160,11 @@ def root(request: Request):
                 "href": f"{base_url}/trade-offers",
                 "method": "GET"
             },
+            "trade_cycles": {
+                "rel": "trade_cycles",
+                "href": f"{base_url}/trade-cycles",
+                "method": "GET"
+            },
             "documentation": {
                 "rel": "documentation",
                 "href": f"{base_url}/docs",
@@ -144,7 +179,6 @@ def root(request: Request):
     }
 
 
-@app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     errors = []
     for error in exc.errors():
@@ -165,7 +199,6 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     )
 
 
-@app.exception_handler(SQLAlchemyError)
 async def sqlalchemy_exception_handler(request: Request, exc: SQLAlchemyError):
     
     return JSONResponse(
@@ -178,7 +211,6 @@ async def sqlalchemy_exception_handler(request: Request, exc: SQLAlchemyError):
     )
 
 
-@app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
     import traceback
     return JSONResponse(
@@ -191,3 +223,48 @@ async def general_exception_handler(request: Request, exc: Exception):
         }
     )
 
+
+def create_app() -> FastAPI:
+    setup_logging()
+    app = FastAPI(
+        title="Video Game Trading API",
+        description="A RESTful API for trading video games with HATEOAS support (REST Level 3)",
+        version="1.0.0",
+        docs_url="/docs",
+        redoc_url="/redoc",
+        openapi_url="/openapi.json",
+        default_response_class=TimedORJSONResponse,
+        lifespan=lifespan
+    )
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.middleware("http")(log_requests)
+
+    if settings.async_db:
+        from app.routers import aio
+        from app.routers.aio import users as async_users, games as async_games, trade_offers as async_trade_offers
+
+        app.include_router(aio.merge_routes(users.router, async_users.router))
+        app.include_router(aio.merge_routes(games.router, async_games.router))
+        app.include_router(aio.merge_routes(trade_offers.router, async_trade_offers.router))
+    else:
+        app.include_router(users.router)
+        app.include_router(games.router)
+        app.include_router(trade_offers.router)
+
+    app.include_router(trade_cycles.router)
+    app.include_router(router)
+
+    app.add_exception_handler(RequestValidationError, validation_exception_handler)
+    app.add_exception_handler(SQLAlchemyError, sqlalchemy_exception_handler)
+    app.add_exception_handler(Exception, general_exception_handler)
+    return app
+
+
+app = create_app()
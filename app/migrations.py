@@ -0,0 +1,182 @@
+import logging
+import time
+from datetime import datetime
+from sqlalchemy import (
+    Column, DateTime, Enum, ForeignKey, Index, Integer, MetaData, String, Table, delete, func, insert, inspect, literal,
+    select
+)
+from sqlalchemy.exc import OperationalError
+from app.config import settings
+from app.models import GameFacetCount, OutboxEvent, TradeOffer, User, VideoGame
+from app.search import GAME_SEARCH_DDL
+
+logger = logging.getLogger(__name__)
+
+migration_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+# the schema as it was before versioned migrations: frozen here, so later model changes
+# only reach a fresh database through the migrations that introduce them
+baseline_metadata = MetaData()
+
+Table(
+    "users",
+    baseline_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("email", String, nullable=False),
+    Column("hashed_password", String, nullable=False),
+    Column("street_address", String, nullable=False),
+    Index("ix_users_id", "id"),
+    Index("ix_users_email", "email", unique=True),
+)
+
+Table(
+    "video_games",
+    baseline_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("publisher", String, nullable=False),
+    Column("year_published", Integer, nullable=False),
+    Column("gaming_system", String, nullable=False),
+    Column("condition", Enum("MINT", "GOOD", "FAIR", "POOR", name="gamecondition"), nullable=False),
+    Column("previous_owners", Integer, nullable=True),
+    Column("owner_id", Integer, ForeignKey("users.id"), nullable=False),
+    Index("ix_video_games_id", "id"),
+    Index("ix_video_games_name", "name"),
+)
+
+Table(
+    "trade_offers",
+    baseline_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("offered_game_id", Integer, ForeignKey("video_games.id"), nullable=False),
+    Column("requested_game_id", Integer, ForeignKey("video_games.id"), nullable=False),
+    Column("offerer_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("receiver_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("status", Enum("PENDING", "ACCEPTED", "REJECTED", "CANCELLED", name="tradeofferstatus"), nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+    Index("ix_trade_offers_id", "id"),
+)
+
+
+def _create_indexes(conn, *tables):
+    for table in tables:
+        for index in table.indexes:
+            index.create(bind=conn, checkfirst=True)
+
+
+def _add_column(conn, column, backfill=None):
+    table = column.table
+    if column.name in {existing["name"] for existing in inspect(conn).get_columns(table.name)}:
+        return
+    ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(conn.dialect)}"
+    if backfill is not None:
+        # SQLite only adds a NOT NULL column with a constant default, which also fills the existing rows
+        value = literal(backfill, column.type).compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+        ddl += f"{'' if column.nullable else ' NOT NULL'} DEFAULT {value}"
+    conn.exec_driver_sql(ddl)
+
+
+def _baseline(conn):
+    baseline_metadata.create_all(bind=conn)
+
+
+def _trade_offer_indexes(conn):
+    _create_indexes(conn, TradeOffer.__table__, VideoGame.__table__)
+
+
+def _game_search_index(conn):
+    if conn.dialect.name != "sqlite":
+        return
+    for statement in GAME_SEARCH_DDL:
+        conn.exec_driver_sql(statement)
+
+
+def _game_facets(conn):
+    GameFacetCount.__table__.create(bind=conn, checkfirst=True)
+    _create_indexes(conn, VideoGame.__table__, GameFacetCount.__table__)
+
+    facet_columns = (VideoGame.gaming_system, VideoGame.condition, VideoGame.publisher, VideoGame.year_published)
+    conn.execute(delete(GameFacetCount))
+    conn.execute(insert(GameFacetCount).from_select(
+        ["gaming_system", "condition", "publisher", "year_published", "game_count"],
+        select(*facet_columns, func.count()).group_by(*facet_columns)
+    ))
+
+
+def _trade_offer_change_index(conn):
+    _create_indexes(conn, TradeOffer.__table__)
+
+
+def _resource_versions(conn):
+    backfilled_at = datetime.utcnow()
+    for column in (User.__table__.c.updated_at, VideoGame.__table__.c.updated_at):
+        _add_column(conn, column, backfill=backfilled_at)
+
+
+def _outbox(conn):
+    OutboxEvent.__table__.create(bind=conn, checkfirst=True)
+    _create_indexes(conn, OutboxEvent.__table__)
+
+
+def _outbox_dead_letters(conn):
+    _add_column(conn, OutboxEvent.__table__.c.dead_lettered_at)
+    _create_indexes(conn, OutboxEvent.__table__)
+
+
+MIGRATIONS = [
+    (1, "Baseline schema", _baseline),
+    (2, "Indexes for trade offer lookups and owner game listings", _trade_offer_indexes),
+    (3, "FTS5 search index over game name, publisher and gaming system", _game_search_index),
+    (4, "Game filter indexes and facet count rollup", _game_facets),
+    (5, "Index trade offer changes for the trade cycle engine", _trade_offer_change_index),
+    (6, "updated_at versions on users and video games", _resource_versions),
+    (7, "Transactional outbox for notification events", _outbox),
+    (8, "Dead-lettered outbox events", _outbox_dead_letters),
+]
+
+
+def _lock(conn):
+    # instances starting together queue here: the first one migrates while the others wait for it,
+    # well past busy_timeout, since building an index or the search table can take minutes
+    deadline = time.monotonic() + settings.migration_lock_timeout_seconds
+    while True:
+        try:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            return
+        except OperationalError as e:
+            conn.rollback()
+            if "locked" not in str(e.orig) or time.monotonic() >= deadline:
+                raise
+            logger.info("Waiting for another instance to finish the schema migrations")
+
+
+def run_migrations(engine):
+    with engine.connect() as conn:
+        if conn.dialect.name == "sqlite":
+            _lock(conn)
+
+        schema_migrations.create(bind=conn, checkfirst=True)
+        applied = set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+        for version, description, upgrade in MIGRATIONS:
+            if version in applied:
+                continue
+            logger.info(f"Applying schema migration {version}: {description}")
+            upgrade(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=version,
+                description=description,
+                applied_at=datetime.utcnow()
+            ))
+
+        conn.commit()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum as SQLEnum, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum as SQLEnum, DateTime, Index, JSON
 from sqlalchemy.orm import relationship
 from app.database import Base
 import enum
@@ -27,6 +27,7 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     street_address = Column(String, nullable=False)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     video_games = relationship("VideoGame", back_populates="owner", cascade="all, delete-orphan")
 
@@ -41,12 +42,36 @@ class VideoGame(Base):
     gaming_system = Column(String, nullable=False)
     condition = Column(SQLEnum(GameCondition), nullable=False)
     previous_owners = Column(Integer, nullable=True)
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     owner = relationship("User", back_populates="video_games")
     offered_trades = relationship("TradeOffer", foreign_keys="TradeOffer.offered_game_id", back_populates="offered_game")
     requested_trades = relationship("TradeOffer", foreign_keys="TradeOffer.requested_game_id", back_populates="requested_game")
 
+    __table_args__ = (
+        Index("ix_video_games_gaming_system_id", "gaming_system", "id"),
+        Index("ix_video_games_condition_id", "condition", "id"),
+        Index("ix_video_games_publisher_id", "publisher", "id"),
+        Index("ix_video_games_year_published_id", "year_published", "id"),
+    )
+
+
+class GameFacetCount(Base):
+    __tablename__ = "game_facet_counts"
+
+    gaming_system = Column(String, primary_key=True)
+    condition = Column(SQLEnum(GameCondition), primary_key=True)
+    publisher = Column(String, primary_key=True)
+    year_published = Column(Integer, primary_key=True)
+    game_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_game_facet_counts_condition", "condition"),
+        Index("ix_game_facet_counts_publisher", "publisher"),
+        Index("ix_game_facet_counts_year_published", "year_published"),
+    )
+
 
 class TradeOffer(Base):
     __tablename__ = "trade_offers"
@@ -65,3 +90,35 @@ class TradeOffer(Base):
     offerer = relationship("User", foreign_keys=[offerer_id])
     receiver = relationship("User", foreign_keys=[receiver_id])
 
+    __table_args__ = (
+        Index("ix_trade_offers_offered_requested_status", "offered_game_id", "requested_game_id", "status"),
+        Index("ix_trade_offers_requested_status", "requested_game_id", "status"),
+        Index("ix_trade_offers_offerer_created", "offerer_id", "created_at", "id"),
+        Index("ix_trade_offers_receiver_created", "receiver_id", "created_at", "id"),
+        Index("ix_trade_offers_status_created", "status", "created_at", "id"),
+        Index("ix_trade_offers_created", "created_at", "id"),
+        Index("ix_trade_offers_updated", "updated_at", "id"),
+    )
+
+
+class OutboxEvent(Base):
+    __tablename__ = "outbox"
+
+    id = Column(Integer, primary_key=True)
+    aggregate_type = Column(String, nullable=False)
+    aggregate_id = Column(String, nullable=False)
+    event_type = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=True)
+    claimed_by = Column(String, nullable=True)
+    claimed_until = Column(DateTime, nullable=True)
+    published_at = Column(DateTime, nullable=True)
+    dead_lettered_at = Column(DateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_outbox_published_id", "published_at", "id"),
+        Index("ix_outbox_aggregate_pending", "aggregate_type", "aggregate_id", "published_at", "dead_lettered_at", "id"),
+    )
@@ -0,0 +1,33 @@
+import threading
+from typing import Any, Dict
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models import OutboxEvent
+
+# set after a commit that wrote outbox rows, so the relay does not wait out its poll interval
+outbox_written = threading.Event()
+
+
+def add_event(db: Session, aggregate_type: str, aggregate_id: Any, event_type: str, data: Dict[str, Any]):
+    # written by the caller's transaction: the event exists if and only if the state change committed
+    db.add(OutboxEvent(
+        aggregate_type=aggregate_type,
+        aggregate_id=str(aggregate_id),
+        event_type=event_type,
+        payload=data
+    ))
+    db.info["outbox_pending"] = True
+
+
+def _after_commit(session: Session):
+    if session.info.pop("outbox_pending", False):
+        outbox_written.set()
+
+
+def _after_rollback(session: Session):
+    session.info.pop("outbox_pending", None)
+
+
+event.listen(SessionLocal, "after_commit", _after_commit)
+event.listen(SessionLocal, "after_rollback", _after_rollback)
@@ -0,0 +1,55 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps(
+        [value.isoformat() if isinstance(value, datetime) else value for value in values],
+        separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor does not match the collection ordering")
+        return [
+            datetime.fromisoformat(value) if column.type.python_type is datetime else column.type.python_type(value)
+            for column, value in zip(columns, values)
+        ]
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def paginate(query, order_columns: Sequence, cursor: Optional[str] = None, skip: int = 0, limit: int = 100):
+    query = query.order_by(*order_columns)
+
+    if cursor:
+        values = decode_cursor(cursor, order_columns)
+        if len(order_columns) == 1:
+            query = query.filter(order_columns[0] > values[0])
+        else:
+            query = query.filter(tuple_(*order_columns) > tuple_(*values))
+    elif skip:
+        query = query.offset(skip)
+
+    return query.limit(limit)
+
+
+def next_cursor(items: Sequence, order_columns: Sequence, limit: int) -> Optional[str]:
+    if not items or len(items) < limit:
+        return None
+
+    last = items[-1]
+    return encode_cursor(*(getattr(last, column.key) for column in order_columns))
@@ -0,0 +1,102 @@
+import logging
+import re
+from collections import Counter as ShapeCounter
+from contextvars import ContextVar
+from typing import Any, Optional
+from prometheus_client import Counter, Histogram
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("app.slow_queries")
+
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries',
+    'SQL statements executed while handling one request',
+    ['method', 'endpoint', 'instance'],
+    buckets=[0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89]
+)
+
+REQUEST_DB_DURATION = Histogram(
+    'http_request_db_duration_seconds',
+    'Time spent in SQL statements while handling one request',
+    ['method', 'endpoint', 'instance'],
+    buckets=settings.metrics_component_buckets
+)
+
+REPEATED_QUERIES = Counter(
+    'db_repeated_queries_total',
+    'Requests that ran the same statement shape at least QUERY_REPEAT_THRESHOLD times (likely N+1)',
+    ['method', 'endpoint', 'instance']
+)
+
+SLOW_QUERIES = Counter(
+    'db_slow_queries_total',
+    'SQL statements slower than SLOW_QUERY_MS',
+    ['instance']
+)
+
+# expanding IN lists render one placeholder per value; fold them so they share a shape
+IN_LIST = re.compile(r"\bIN \((?:\s*(?:\?|%\(\w+\)s)\s*,)+\s*(?:\?|%\(\w+\)s)\s*\)", re.IGNORECASE)
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = ShapeCounter()
+
+    def record(self, statement: str, duration: float, executemany: bool):
+        self.count += 1
+        self.duration += duration
+        # executemany batches come from one flush, not from a loop in a handler
+        if not executemany:
+            self.shapes[statement] += 1
+
+    def repeated(self, threshold: int):
+        repeated = ShapeCounter()
+        for statement, count in self.shapes.items():
+            repeated[IN_LIST.sub("IN (?)", statement)] += count
+        return [(shape, count) for shape, count in repeated.most_common() if count >= threshold]
+
+    def server_timing(self, total: float) -> str:
+        queries = "1 query" if self.count == 1 else f"{self.count} queries"
+        return f'db;dur={self.duration * 1e3:.2f};desc="{queries}", total;dur={total * 1e3:.2f}'
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def begin() -> QueryStats:
+    stats = QueryStats()
+    _current.set(stats)
+    return stats
+
+
+def _redact(parameters: Any) -> Any:
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_redact(value) if isinstance(value, (dict, list, tuple)) else type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def record_query(statement: str, parameters: Any, duration: float, executemany: bool):
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, duration, executemany)
+    if duration * 1e3 >= settings.slow_query_ms:
+        SLOW_QUERIES.labels(instance=settings.instance_name).inc()
+        redacted = f"{len(parameters)} parameter sets" if executemany else _redact(parameters)
+        slow_query_logger.warning(
+            f"Slow query ({duration * 1e3:.1f} ms): {' '.join(statement.split())} parameters={redacted}"
+        )
+
+
+def finish(stats: QueryStats, method: str, endpoint: str):
+    REQUEST_QUERIES.labels(method=method, endpoint=endpoint, instance=settings.instance_name).observe(stats.count)
+    REQUEST_DB_DURATION.labels(method=method, endpoint=endpoint, instance=settings.instance_name).observe(stats.duration)
+    repeated = stats.repeated(settings.query_repeat_threshold)
+    if repeated:
+        REPEATED_QUERIES.labels(method=method, endpoint=endpoint, instance=settings.instance_name).inc()
+        for shape, count in repeated:
+            logger.warning(f"Possible N+1 in {method} {endpoint}: {count}x {' '.join(shape.split())}")
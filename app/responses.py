@@ -0,0 +1,59 @@
+import time
+from functools import lru_cache
+from typing import Any, Iterable, List, Mapping, Optional, Type, TypeVar
+from fastapi import status
+from fastapi.responses import ORJSONResponse, Response
+from prometheus_client import Histogram
+from pydantic import BaseModel, TypeAdapter
+from app.config import settings
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+SERIALIZATION_DURATION = Histogram(
+    'response_serialization_duration_seconds',
+    'Time spent encoding response bodies to JSON',
+    ['encoder', 'instance'],
+    buckets=settings.metrics_component_buckets
+)
+
+
+class ModelResponse(Response):
+    # serializes an already validated model straight to JSON bytes; FastAPI passes Response
+    # objects through untouched, so the route's response_model only documents the schema
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        started = time.perf_counter()
+        body = content.__pydantic_serializer__.to_json(content)
+        SERIALIZATION_DURATION.labels(encoder="pydantic", instance=settings.instance_name).observe(
+            time.perf_counter() - started
+        )
+        return body
+
+
+class TimedORJSONResponse(ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        started = time.perf_counter()
+        body = super().render(content)
+        SERIALIZATION_DURATION.labels(encoder="orjson", instance=settings.instance_name).observe(
+            time.perf_counter() - started
+        )
+        return body
+
+
+@lru_cache(maxsize=None)
+def type_adapter(tp: Any) -> TypeAdapter:
+    return TypeAdapter(tp)
+
+
+def validate_list(model: Type[ModelT], rows: Iterable[Any]) -> List[ModelT]:
+    return type_adapter(List[model]).validate_python(rows, from_attributes=True)
+
+
+def model_response(
+    content: BaseModel,
+    status_code: int = status.HTTP_200_OK,
+    headers: Optional[Mapping[str, str]] = None
+) -> ModelResponse:
+    return ModelResponse(content, status_code=status_code, headers=headers)
+
@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from fastapi.routing import APIRoute
+
+
+def merge_routes(sync_router: APIRouter, async_router: APIRouter) -> APIRouter:
+    async_routes = {
+        (route.path, frozenset(route.methods)): route
+        for route in async_router.routes
+        if isinstance(route, APIRoute)
+    }
+
+    merged = APIRouter()
+    for route in sync_router.routes:
+        if isinstance(route, APIRoute):
+            route = async_routes.get((route.path, frozenset(route.methods)), route)
+        merged.routes.append(route)
+
+    return merged
@@ -0,0 +1,78 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.models import VideoGame
+from app.schemas import VideoGameResponse, VideoGameCollection
+from typing import Optional
+from app.hateoas import add_game_links, add_collection_links, link_mode
+from app.fieldsets import Representation, game_representation
+from app.pagination import paginate, next_cursor
+from app.cache import game_cache
+from app.etag import make_etag, not_modified, resource_version, collection_version
+from app.facets import GameFilters, facet_statement, facet_counts
+
+router = APIRouter(prefix="/games", tags=["games"], dependencies=[Depends(link_mode)])
+
+
+@router.get("/{game_id}", response_model=VideoGameResponse)
+async def get_game(
+    game_id: int,
+    request: Request,
+    representation: Representation = Depends(game_representation),
+    db: AsyncSession = Depends(get_async_db)
+):
+    cached = game_cache.get(game_id)
+    if cached is None:
+        epoch = game_cache.epoch
+        game = await db.scalar(select(VideoGame).where(VideoGame.id == game_id))
+        if not game:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Video game not found"
+            )
+        cached = VideoGameResponse.model_validate(game)
+        game_cache.put(game_id, cached, epoch)
+
+    etag = make_etag(request, resource_version(VideoGame.__tablename__, game_id, cached.updated_at))
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    links = add_game_links(request, game_id, cached.owner_id, is_owner=True)
+    return representation.resource_response(request, cached, links, {"ETag": etag})
+
+
+@router.get("", response_model=VideoGameCollection)
+async def get_games(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    facets: bool = False,
+    filters: GameFilters = Depends(),
+    representation: Representation = Depends(game_representation),
+    db: AsyncSession = Depends(get_async_db)
+):
+    order = filters.order_columns()
+    statement = select(VideoGame).where(*filters.clauses(VideoGame)).options(*representation.options(*order))
+    games = (await db.scalars(paginate(statement, order, cursor, skip, limit))).all()
+
+    facet_rows = facet_counts(await db.execute(facet_statement(filters))) if facets else None
+
+    etag = make_etag(request, collection_version(((item.id, item.updated_at) for item in games), facet_rows))
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    game_responses = representation.items(
+        request, games, lambda game: add_game_links(request, game.id, game.owner_id, is_owner=True)
+    )
+    collection_links = add_collection_links(
+        request, "/games", skip, limit, len(games), next_cursor(games, order, limit),
+        {**filters.query_params(), **representation.query_params()}
+    )
+
+    return representation.response(
+        VideoGameCollection, game_responses, {"ETag": etag}, facets=facet_rows, links=collection_links
+    )
@@ -0,0 +1,171 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.models import TradeOffer, User, TradeOfferStatus
+from app.schemas import TradeOfferResponse, TradeOfferCollection
+from typing import List, Optional
+from app.hateoas import add_trade_offer_links, add_collection_links, link_mode
+from app.fieldsets import Representation, trade_offer_representation
+from app.pagination import paginate, next_cursor
+from app.routers.trade_offers import TRADE_OFFER_ORDER
+from app.cache import trade_offer_cache
+from app.etag import make_etag, not_modified, resource_version, collection_version
+
+router = APIRouter(prefix="/trade-offers", tags=["trade-offers"], dependencies=[Depends(link_mode)])
+
+
+@router.get("/{trade_offer_id}", response_model=TradeOfferResponse)
+async def get_trade_offer(
+    trade_offer_id: int,
+    request: Request,
+    representation: Representation = Depends(trade_offer_representation),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # expansions need the related rows, which the cached response does not carry
+    cached = None if representation.expand else trade_offer_cache.get(trade_offer_id)
+    if cached is None:
+        epoch = trade_offer_cache.epoch
+        trade_offer = await db.scalar(
+            select(TradeOffer).options(*representation.expansions()).where(TradeOffer.id == trade_offer_id)
+        )
+        if not trade_offer:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Trade offer not found"
+            )
+        cached = TradeOfferResponse.model_validate(trade_offer)
+        trade_offer_cache.put(trade_offer_id, cached, epoch)
+
+    version = resource_version(TradeOffer.__tablename__, trade_offer_id, cached.updated_at)
+    if representation.expand:
+        version = collection_version((), version, representation.versions([trade_offer]))
+    etag = make_etag(request, version)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    links = add_trade_offer_links(request, cached.id, cached.offerer_id, cached.receiver_id)
+    resource = trade_offer if representation.expand else cached
+    return representation.resource_response(request, resource, links, {"ETag": etag})
+
+
+@router.get("", response_model=TradeOfferCollection)
+async def get_all_trade_offers(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    status_filter: TradeOfferStatus = None,
+    representation: Representation = Depends(trade_offer_representation),
+    db: AsyncSession = Depends(get_async_db)
+):
+    query = select(TradeOffer).options(*representation.options())
+
+    if status_filter:
+        query = query.where(TradeOffer.status == status_filter)
+
+    trade_offers = (await db.scalars(paginate(query, TRADE_OFFER_ORDER, cursor, skip, limit))).all()
+
+    etag = make_etag(request, collection_version(
+        ((item.id, item.updated_at) for item in trade_offers), representation.versions(trade_offers)
+    ))
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    items = representation.items(
+        request, trade_offers,
+        lambda offer: add_trade_offer_links(request, offer.id, offer.offerer_id, offer.receiver_id)
+    )
+
+    collection_links = add_collection_links(
+        request, "/trade-offers", skip, limit, len(items),
+        next_cursor(trade_offers, TRADE_OFFER_ORDER, limit),
+        {"status_filter": status_filter, **representation.query_params()}
+    )
+
+    return representation.response(TradeOfferCollection, items, {"ETag": etag}, links=collection_links)
+
+
+async def _get_user_offers(
+    db: AsyncSession, user_id: int, column, cursor: Optional[str], skip: int, limit: int, options: List
+):
+    user = await db.scalar(select(User).where(User.id == user_id))
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    return (await db.scalars(
+        paginate(select(TradeOffer).options(*options).where(column == user_id), TRADE_OFFER_ORDER, cursor, skip, limit)
+    )).all()
+
+
+@router.get("/user/{user_id}/sent", response_model=TradeOfferCollection)
+async def get_user_sent_offers(
+    user_id: int,
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    representation: Representation = Depends(trade_offer_representation),
+    db: AsyncSession = Depends(get_async_db)
+):
+    trade_offers = await _get_user_offers(
+        db, user_id, TradeOffer.offerer_id, cursor, skip, limit, representation.options()
+    )
+
+    etag = make_etag(request, collection_version(
+        ((item.id, item.updated_at) for item in trade_offers), representation.versions(trade_offers)
+    ))
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    items = representation.items(
+        request, trade_offers,
+        lambda offer: add_trade_offer_links(request, offer.id, offer.offerer_id, offer.receiver_id)
+    )
+
+    collection_links = add_collection_links(
+        request, f"/trade-offers/user/{user_id}/sent", skip, limit, len(items),
+        next_cursor(trade_offers, TRADE_OFFER_ORDER, limit), representation.query_params()
+    )
+
+    return representation.response(TradeOfferCollection, items, {"ETag": etag}, links=collection_links)
+
+
+@router.get("/user/{user_id}/received", response_model=TradeOfferCollection)
+async def get_user_received_offers(
+    user_id: int,
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    representation: Representation = Depends(trade_offer_representation),
+    db: AsyncSession = Depends(get_async_db)
+):
+    trade_offers = await _get_user_offers(
+        db, user_id, TradeOffer.receiver_id, cursor, skip, limit, representation.options()
+    )
+
+    etag = make_etag(request, collection_version(
+        ((item.id, item.updated_at) for item in trade_offers), representation.versions(trade_offers)
+    ))
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    items = representation.items(
+        request, trade_offers,
+        lambda offer: add_trade_offer_links(request, offer.id, offer.offerer_id, offer.receiver_id)
+    )
+
+    collection_links = add_collection_links(
+        request, f"/trade-offers/user/{user_id}/received", skip, limit, len(items),
+        next_cursor(trade_offers, TRADE_OFFER_ORDER, limit), representation.query_params()
+    )
+
+    return representation.response(TradeOfferCollection, items, {"ETag": etag}, links=collection_links)
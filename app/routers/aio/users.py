@@ -0,0 +1,111 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.models import User, VideoGame
+from app.schemas import UserResponse, UserCollection, VideoGameCollection
+from typing import Optional
+from app.hateoas import add_user_links, add_collection_links, add_game_links, link_mode
+from app.fieldsets import Representation, game_representation, user_representation
+from app.pagination import paginate, next_cursor
+from app.cache import user_cache
+from app.etag import make_etag, not_modified, resource_version, collection_version
+
+router = APIRouter(prefix="/users", tags=["users"], dependencies=[Depends(link_mode)])
+
+
+@router.get("/{user_id}", response_model=UserResponse)
+async def get_user(
+    user_id: int,
+    request: Request,
+    representation: Representation = Depends(user_representation),
+    db: AsyncSession = Depends(get_async_db)
+):
+    cached = user_cache.get(user_id)
+    if cached is None:
+        epoch = user_cache.epoch
+        user = await db.scalar(select(User).where(User.id == user_id))
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        cached = UserResponse.model_validate(user)
+        user_cache.put(user_id, cached, epoch)
+
+    etag = make_etag(request, resource_version(User.__tablename__, user_id, cached.updated_at))
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    links = add_user_links(request, user_id, is_owner=True)
+    return representation.resource_response(request, cached, links, {"ETag": etag})
+
+
+@router.get("", response_model=UserCollection)
+async def get_users(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    representation: Representation = Depends(user_representation),
+    db: AsyncSession = Depends(get_async_db)
+):
+    order = (User.id,)
+    users = (await db.scalars(paginate(select(User).options(*representation.options(*order)), order, cursor, skip, limit))).all()
+
+    etag = make_etag(request, collection_version((item.id, item.updated_at) for item in users))
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    user_responses = representation.items(
+        request, users, lambda user: add_user_links(request, user.id, is_owner=True)
+    )
+    collection_links = add_collection_links(
+        request, "/users", skip, limit, len(users), next_cursor(users, order, limit),
+        representation.query_params()
+    )
+
+    return representation.response(UserCollection, user_responses, {"ETag": etag}, links=collection_links)
+
+
+@router.get("/{user_id}/games", response_model=VideoGameCollection)
+async def get_user_games(
+    user_id: int,
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    representation: Representation = Depends(game_representation),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user = await db.scalar(select(User).where(User.id == user_id))
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    order = (VideoGame.id,)
+    games = (await db.scalars(
+        paginate(
+            select(VideoGame).options(*representation.options(*order)).where(VideoGame.owner_id == user_id),
+            order, cursor, skip, limit
+        )
+    )).all()
+
+    etag = make_etag(request, collection_version((item.id, item.updated_at) for item in games))
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    game_responses = representation.items(
+        request, games, lambda game: add_game_links(request, game.id, game.owner_id, is_owner=True)
+    )
+    collection_links = add_collection_links(
+        request, f"/users/{user_id}/games", skip, limit, len(games), next_cursor(games, order, limit),
+        representation.query_params()
+    )
+
+    return representation.response(VideoGameCollection, game_responses, {"ETag": etag}, links=collection_links)
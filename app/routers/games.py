@@ -1,12 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Body, Depends, HTTPException, status, Request
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, or_, select, update
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Any, Dict, List, Optional
 from app.database import get_db
-from app.models import User, VideoGame
-from app.schemas import VideoGameCreate, VideoGameUpdate, VideoGameResponse, VideoGameCollection
-from app.hateoas import add_game_links, add_collection_links
+from app.models import User, VideoGame, TradeOffer
+from app.schemas import (
+    VideoGameCreate, VideoGameUpdate, VideoGameResponse, VideoGameCollection,
+    BulkDeleteRequest, BulkOperationResult
+)
+from app.hateoas import add_game_links, add_collection_links, link_mode
+from app.responses import model_response
+from app.fieldsets import Representation, game_representation
+from app.pagination import paginate, next_cursor, encode_cursor
+from app.search import video_games_fts, to_match_query
+from app.cache import game_cache
+from app.etag import make_etag, not_modified, resource_version, collection_version, check_if_match
+from app.services.cache_invalidation import invalidate
+from app.facets import (
+    FACET_COLUMNS, GameFilters, facet_key, facet_statement, facet_counts, current_facet_keys, update_facet_counts
+)
+from app.export import ExportFormat, EXPORT_RESPONSES, export_response
+from app.bulk import (
+    chunked, check_batch_size, existing_values, validation_errors,
+    item_error, item_success, bulk_response
+)
 
-router = APIRouter(prefix="/games", tags=["games"])
+router = APIRouter(prefix="/games", tags=["games"], dependencies=[Depends(link_mode)])
 
 
 @router.post("", response_model=VideoGameResponse, status_code=status.HTTP_201_CREATED)
@@ -28,32 +48,259 @@ def create_game(
         owner_id=owner_id
     )
     db.add(db_game)
+    update_facet_counts(db, added=[facet_key(db_game)])
     db.commit()
     db.refresh(db_game)
 
     response = VideoGameResponse.model_validate(db_game)
     response.links = add_game_links(request, db_game.id, owner_id, is_owner=True)
 
-    return response
+    return model_response(response, status_code=status.HTTP_201_CREATED)
+
+
+@router.post("/bulk", response_model=BulkOperationResult)
+def bulk_create_games(
+    request: Request,
+    items: List[Dict[str, Any]] = Body(...),
+    owner_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    check_batch_size(items)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+
+    candidates = []
+    for index, item in enumerate(items):
+        try:
+            game = VideoGameCreate.model_validate(item)
+        except ValidationError as exc:
+            results[index] = {"index": index, "id": None, "status": "error", "errors": validation_errors(exc)}
+            continue
+
+        item_owner_id = item.get("owner_id", owner_id)
+        if item_owner_id is None:
+            results[index] = item_error(index, "owner_id", "owner_id is required", "missing")
+            continue
+        if type(item_owner_id) is not int:
+            # bool is an int subclass: true would otherwise pass as owner_id 1
+            results[index] = item_error(index, "owner_id", "owner_id must be an integer", "int_type")
+            continue
+
+        candidates.append((index, item_owner_id, game))
+
+    owners = existing_values(db, User.id, (item_owner_id for _, item_owner_id, _ in candidates))
+
+    rows = []
+    row_indexes = []
+    for index, item_owner_id, game in candidates:
+        if item_owner_id not in owners:
+            results[index] = item_error(index, "owner_id", "Owner user not found", "not_found")
+            continue
+        rows.append({**game.model_dump(), "owner_id": item_owner_id})
+        row_indexes.append(index)
+
+    if rows:
+        game_ids = db.scalars(
+            insert(VideoGame).returning(VideoGame.id, sort_by_parameter_order=True),
+            rows
+        ).all()
+        update_facet_counts(db, added=[facet_key(row) for row in rows])
+        db.commit()
+        for index, game_id in zip(row_indexes, game_ids):
+            results[index] = item_success(index, game_id, "created")
+
+    return bulk_response(request, "games_bulk", results)
+
+
+@router.patch("/bulk", response_model=BulkOperationResult)
+def bulk_update_games(
+    request: Request,
+    items: List[Dict[str, Any]] = Body(...),
+    db: Session = Depends(get_db)
+):
+    check_batch_size(items)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+
+    candidates = []
+    for index, item in enumerate(items):
+        game_id = item.get("id")
+        if game_id is None:
+            results[index] = item_error(index, "id", "id is required", "missing")
+            continue
+        if type(game_id) is not int:
+            # bool is an int subclass: true would otherwise pass as id 1
+            results[index] = item_error(index, "id", "id must be an integer", "int_type")
+            continue
+
+        try:
+            game_update = VideoGameUpdate.model_validate(item)
+        except ValidationError as exc:
+            results[index] = {"index": index, "id": game_id, "status": "error", "errors": validation_errors(exc)}
+            continue
+
+        candidates.append((index, game_id, game_update.model_dump(exclude_unset=True)))
+
+    current_keys = current_facet_keys(db, (game_id for _, game_id, _ in candidates))
+
+    rows = []
+    added_keys = []
+    removed_keys = []
+    for index, game_id, update_data in candidates:
+        if game_id not in current_keys:
+            results[index] = item_error(index, "id", "Video game not found", "not_found", game_id)
+            continue
+        if update_data:
+            rows.append({**update_data, "id": game_id})
+            old_key = current_keys[game_id]
+            new_key = facet_key({**dict(zip(FACET_COLUMNS, old_key)), **update_data})
+            if new_key != old_key:
+                removed_keys.append(old_key)
+                added_keys.append(new_key)
+                current_keys[game_id] = new_key
+        results[index] = item_success(index, game_id, "updated")
+
+    if rows:
+        db.execute(update(VideoGame), rows)
+        update_facet_counts(db, added=added_keys, removed=removed_keys)
+        db.commit()
+        invalidate(game_cache, {row["id"] for row in rows})
+
+    return bulk_response(request, "games_bulk", results)
+
+
+@router.delete("/bulk", response_model=BulkOperationResult)
+def bulk_delete_games(
+    request: Request,
+    bulk_delete: BulkDeleteRequest,
+    db: Session = Depends(get_db)
+):
+    check_batch_size(bulk_delete.ids)
+
+    found = current_facet_keys(db, bulk_delete.ids)
+    referenced = set()
+    for chunk in chunked(list(found)):
+        for offered_game_id, requested_game_id in db.execute(
+            select(TradeOffer.offered_game_id, TradeOffer.requested_game_id).where(
+                or_(TradeOffer.offered_game_id.in_(chunk), TradeOffer.requested_game_id.in_(chunk))
+            )
+        ):
+            referenced.update((offered_game_id, requested_game_id))
+
+    results = []
+    deletable = []
+    for index, game_id in enumerate(bulk_delete.ids):
+        if game_id not in found:
+            results.append(item_error(index, "ids", "Video game not found", "not_found", game_id))
+        elif game_id in referenced:
+            results.append(item_error(index, "ids", "Video game is part of a trade offer", "conflict", game_id))
+        else:
+            deletable.append(game_id)
+            results.append(item_success(index, game_id, "deleted"))
+
+    if deletable:
+        deletable = list(dict.fromkeys(deletable))
+        for chunk in chunked(deletable):
+            db.execute(delete(VideoGame).where(VideoGame.id.in_(chunk)))
+        update_facet_counts(db, removed=[found[game_id] for game_id in deletable])
+        db.commit()
+        invalidate(game_cache, deletable)
+
+    return bulk_response(request, "games_bulk", results)
+
+
+@router.get("/search", response_model=VideoGameCollection)
+def search_games(
+    request: Request,
+    q: str,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    representation: Representation = Depends(game_representation),
+    db: Session = Depends(get_db)
+):
+    if db.get_bind().dialect.name != "sqlite":
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Full-text search requires the SQLite FTS5 index"
+        )
+
+    match_query = to_match_query(q)
+    if not match_query:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Search query must contain at least one word"
+        )
+
+    order = (video_games_fts.c.rank, VideoGame.id)
+    query = db.query(VideoGame, video_games_fts.c.rank).join(
+        video_games_fts, video_games_fts.c.rowid == VideoGame.id
+    ).filter(video_games_fts.c.video_games_fts.match(match_query)).options(*representation.options())
+    results = paginate(query, order, cursor, 0, limit).all()
+
+    game_responses = representation.items(
+        request, [game for game, _ in results],
+        lambda game: add_game_links(request, game.id, game.owner_id, is_owner=True)
+    )
+
+    search_cursor = None
+    if results and len(results) == limit:
+        last_game, last_rank = results[-1]
+        search_cursor = encode_cursor(last_rank, last_game.id)
+
+    collection_links = add_collection_links(
+        request, "/games/search", 0, limit, len(results), search_cursor, {"q": q, **representation.query_params()}
+    )
+
+    return representation.response(VideoGameCollection, game_responses, links=collection_links)
+
+
+@router.get("/export", responses=EXPORT_RESPONSES)
+def export_games(
+    format: ExportFormat = ExportFormat.NDJSON,
+    owner_id: Optional[int] = None,
+    filters: GameFilters = Depends()
+):
+    statement = select(
+        VideoGame.id,
+        VideoGame.name,
+        VideoGame.publisher,
+        VideoGame.year_published,
+        VideoGame.gaming_system,
+        VideoGame.condition,
+        VideoGame.previous_owners,
+        VideoGame.owner_id
+    ).where(*filters.clauses(VideoGame)).order_by(*filters.order_columns())
+
+    if owner_id is not None:
+        statement = statement.where(VideoGame.owner_id == owner_id)
+
+    return export_response(statement, format, "games")
 
 
 @router.get("/{game_id}", response_model=VideoGameResponse)
 def get_game(
     game_id: int,
     request: Request,
+    representation: Representation = Depends(game_representation),
     db: Session = Depends(get_db)
 ):
-    game = db.query(VideoGame).filter(VideoGame.id == game_id).first()
-    if not game:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Video game not found"
-        )
+    cached = game_cache.get(game_id)
+    if cached is None:
+        epoch = game_cache.epoch
+        game = db.query(VideoGame).filter(VideoGame.id == game_id).first()
+        if not game:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Video game not found"
+            )
+        cached = VideoGameResponse.model_validate(game)
+        game_cache.put(game_id, cached, epoch)
 
-    response = VideoGameResponse.model_validate(game)
-    response.links = add_game_links(request, game_id, game.owner_id, is_owner=True)
+    etag = make_etag(request, resource_version(VideoGame.__tablename__, game_id, cached.updated_at))
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
 
-    return response
+    links = add_game_links(request, game_id, cached.owner_id, is_owner=True)
+    return representation.resource_response(request, cached, links, {"ETag": etag})
 
 
 @router.get("", response_model=VideoGameCollection)
@@ -61,20 +308,34 @@ def get_games(
     request: Request,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    facets: bool = False,
+    filters: GameFilters = Depends(),
+    representation: Representation = Depends(game_representation),
     db: Session = Depends(get_db)
 ):
-    games = db.query(VideoGame).offset(skip).limit(limit).all()
+    order = filters.order_columns()
+    query = db.query(VideoGame).filter(*filters.clauses(VideoGame)).options(*representation.options(*order))
+    games = paginate(query, order, cursor, skip, limit).all()
+
+    facet_rows = facet_counts(db.execute(facet_statement(filters))) if facets else None
 
-    game_responses = []
-    for game in games:
-        response = VideoGameResponse.model_validate(game)
-        response.links = add_game_links(request, game.id, game.owner_id, is_owner=True)
-        game_responses.append(response)
+    etag = make_etag(request, collection_version(((item.id, item.updated_at) for item in games), facet_rows))
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
 
-    collection = VideoGameCollection(items=game_responses)
-    collection.links = add_collection_links(request, "/games")
+    game_responses = representation.items(
+        request, games, lambda game: add_game_links(request, game.id, game.owner_id, is_owner=True)
+    )
+    collection_links = add_collection_links(
+        request, "/games", skip, limit, len(games), next_cursor(games, order, limit),
+        {**filters.query_params(), **representation.query_params()}
+    )
 
-    return collection
+    return representation.response(
+        VideoGameCollection, game_responses, {"ETag": etag}, facets=facet_rows, links=collection_links
+    )
 
 
 @router.put("/{game_id}", response_model=VideoGameResponse)
@@ -91,17 +352,23 @@ def update_game(
             detail="Video game not found"
         )
 
+    check_if_match(request, db, VideoGame, game)
+
     update_data = game_update.model_dump(exclude_unset=True)
+    old_key = facet_key(game)
     for field, value in update_data.items():
         setattr(game, field, value)
+    update_facet_counts(db, added=[facet_key(game)], removed=[old_key])
 
     db.commit()
+    invalidate(game_cache, [game_id])
     db.refresh(game)
 
     response = VideoGameResponse.model_validate(game)
     response.links = add_game_links(request, game_id, game.owner_id, is_owner=True)
+    etag = make_etag(request, resource_version(VideoGame.__tablename__, game_id, response.updated_at))
 
-    return response
+    return model_response(response, headers={"ETag": etag})
 
 
 @router.delete("/{game_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -117,7 +384,9 @@ def delete_game(
         )
 
     db.delete(game)
+    update_facet_counts(db, removed=[facet_key(game)])
     db.commit()
+    invalidate(game_cache, [game_id])
 
     return None
 
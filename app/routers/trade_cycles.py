@@ -0,0 +1,119 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.database import get_db
+from app.models import TradeOffer, TradeOfferStatus
+from app.schemas import TradeCycleResponse, TradeCycleCollection
+from app.hateoas import add_trade_cycle_links, add_collection_links, link_mode
+from app.responses import model_response
+from app.settlement import settle_trade, offer_notifications
+from app.services.trade_matching import trade_matcher, cycle_id, parse_cycle_id
+from app.outbox import add_event
+
+router = APIRouter(prefix="/trade-cycles", tags=["trade-cycles"], dependencies=[Depends(link_mode)])
+
+
+def _cycle_response(request: Request, key, game_ids, user_ids, cycle_status=TradeOfferStatus.PENDING):
+    response = TradeCycleResponse(
+        id=cycle_id(key),
+        length=len(key),
+        offer_ids=list(key),
+        game_ids=list(game_ids),
+        user_ids=list(user_ids),
+        status=cycle_status
+    )
+    response.links = add_trade_cycle_links(request, response.id, response.offer_ids)
+    return response
+
+
+def _parse(value: str):
+    key = parse_cycle_id(value)
+    if key is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Trade cycle not found"
+        )
+    return key
+
+
+@router.get("", response_model=TradeCycleCollection)
+def get_trade_cycles(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    user_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    trade_matcher.sync(db)
+    cycles = trade_matcher.cycles(user_id, skip, limit)
+
+    collection = TradeCycleCollection(
+        items=[_cycle_response(request, key, game_ids, user_ids) for key, game_ids, user_ids in cycles]
+    )
+    collection.links = add_collection_links(
+        request, "/trade-cycles", skip, limit, len(cycles), query_params={"user_id": user_id}
+    )
+
+    return model_response(collection)
+
+
+@router.get("/{trade_cycle_id}", response_model=TradeCycleResponse)
+def get_trade_cycle(
+    trade_cycle_id: str,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    key = _parse(trade_cycle_id)
+    trade_matcher.sync(db)
+    cycle = trade_matcher.get(key)
+    if not cycle:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Trade cycle not found"
+        )
+
+    game_ids, user_ids = cycle
+    return model_response(_cycle_response(request, key, game_ids, user_ids))
+
+
+@router.put("/{trade_cycle_id}/accept", response_model=TradeCycleResponse)
+def accept_trade_cycle(
+    trade_cycle_id: str,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    key = _parse(trade_cycle_id)
+    offers = {offer.id: offer for offer in db.query(TradeOffer).filter(TradeOffer.id.in_(key))}
+    if len(offers) != len(key):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Trade cycle not found"
+        )
+
+    chain = [offers[offer_id] for offer_id in key]
+    if any(offer.requested_game_id != following.offered_game_id for offer, following in zip(chain, chain[1:] + chain[:1])):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Trade cycle not found"
+        )
+
+    if any(offer.status != TradeOfferStatus.PENDING for offer in chain):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Trade cycle is no longer available"
+        )
+
+    def notify(cancelled):
+        add_event(db, "trade_cycle", cycle_id(key), "trade_cycle_accepted", {
+            "accepted_offers": offer_notifications(db, chain),
+            "cancelled_offers": offer_notifications(db, cancelled)
+        })
+
+    settle_trade(db, chain, {
+        offer.requested_game_id: (offer.receiver_id, offer.offerer_id) for offer in chain
+    }, notify)
+
+    return model_response(_cycle_response(
+        request, key, [offer.offered_game_id for offer in chain], [offer.offerer_id for offer in chain],
+        TradeOfferStatus.ACCEPTED
+    ))
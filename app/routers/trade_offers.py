@@ -1,13 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.database import get_db
 from app.models import TradeOffer, VideoGame, User, TradeOfferStatus
 from app.schemas import TradeOfferCreate, TradeOfferResponse, TradeOfferCollection
-from app.hateoas import add_trade_offer_links, add_collection_links
-from app.services.kafka_producer import notification_producer
+from app.hateoas import add_trade_offer_links, add_collection_links, link_mode
+from app.responses import model_response
+from app.fieldsets import Representation, trade_offer_representation
+from app.pagination import paginate, next_cursor
+from app.export import ExportFormat, EXPORT_RESPONSES, export_response
+from app.settlement import close_offer, settle_trade, offer_notifications
+from app.cache import trade_offer_cache
+from app.etag import make_etag, not_modified, resource_version, collection_version, check_if_match
+from app.services.cache_invalidation import invalidate
+from app.outbox import add_event
 
-router = APIRouter(prefix="/trade-offers", tags=["trade-offers"])
+router = APIRouter(prefix="/trade-offers", tags=["trade-offers"], dependencies=[Depends(link_mode)])
+
+TRADE_OFFER_ORDER = (TradeOffer.created_at, TradeOffer.id)
 
 
 @router.post("", response_model=TradeOfferResponse, status_code=status.HTTP_201_CREATED)
@@ -62,14 +73,12 @@ def create_trade_offer(
         status=TradeOfferStatus.PENDING
     )
     
-    db.add(db_trade_offer)
-    db.commit()
-    db.refresh(db_trade_offer)
-
     offerer = db.query(User).filter(User.id == offered_game.owner_id).first()
     receiver = db.query(User).filter(User.id == requested_game.owner_id).first()
 
-    notification_producer.send_notification("trade_offer_created", {
+    db.add(db_trade_offer)
+    db.flush()
+    add_event(db, "trade_offer", db_trade_offer.id, "trade_offer_created", {
         "offerer_email": offerer.email,
         "offerer_name": offerer.name,
         "receiver_email": receiver.email,
@@ -77,30 +86,76 @@ def create_trade_offer(
         "offered_game": offered_game.name,
         "requested_game": requested_game.name
     })
+    db.commit()
+    db.refresh(db_trade_offer)
 
     response = TradeOfferResponse.model_validate(db_trade_offer)
     response.links = add_trade_offer_links(request, db_trade_offer.id, db_trade_offer.offerer_id, db_trade_offer.receiver_id)
 
-    return response
+    return model_response(response, status_code=status.HTTP_201_CREATED)
+
+
+@router.get("/export", responses=EXPORT_RESPONSES)
+def export_trade_offers(
+    format: ExportFormat = ExportFormat.NDJSON,
+    status_filter: TradeOfferStatus = None,
+    offerer_id: Optional[int] = None,
+    receiver_id: Optional[int] = None
+):
+    statement = select(
+        TradeOffer.id,
+        TradeOffer.offered_game_id,
+        TradeOffer.requested_game_id,
+        TradeOffer.offerer_id,
+        TradeOffer.receiver_id,
+        TradeOffer.status,
+        TradeOffer.created_at,
+        TradeOffer.updated_at
+    ).order_by(*TRADE_OFFER_ORDER)
+
+    if status_filter:
+        statement = statement.where(TradeOffer.status == status_filter)
+    if offerer_id is not None:
+        statement = statement.where(TradeOffer.offerer_id == offerer_id)
+    if receiver_id is not None:
+        statement = statement.where(TradeOffer.receiver_id == receiver_id)
+
+    return export_response(statement, format, "trade-offers")
 
 
 @router.get("/{trade_offer_id}", response_model=TradeOfferResponse)
 def get_trade_offer(
     trade_offer_id: int,
     request: Request,
+    representation: Representation = Depends(trade_offer_representation),
     db: Session = Depends(get_db)
 ):
-    trade_offer = db.query(TradeOffer).filter(TradeOffer.id == trade_offer_id).first()
-    if not trade_offer:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Trade offer not found"
-        )
-    
-    response = TradeOfferResponse.model_validate(trade_offer)
-    response.links = add_trade_offer_links(request, trade_offer.id, trade_offer.offerer_id, trade_offer.receiver_id)
-    
-    return response
+    # expansions need the related rows, which the cached response does not carry
+    cached = None if representation.expand else trade_offer_cache.get(trade_offer_id)
+    if cached is None:
+        epoch = trade_offer_cache.epoch
+        trade_offer = db.query(TradeOffer).options(*representation.expansions()).filter(
+            TradeOffer.id == trade_offer_id
+        ).first()
+        if not trade_offer:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Trade offer not found"
+            )
+        cached = TradeOfferResponse.model_validate(trade_offer)
+        trade_offer_cache.put(trade_offer_id, cached, epoch)
+
+    version = resource_version(TradeOffer.__tablename__, trade_offer_id, cached.updated_at)
+    if representation.expand:
+        version = collection_version((), version, representation.versions([trade_offer]))
+    etag = make_etag(request, version)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    links = add_trade_offer_links(request, cached.id, cached.offerer_id, cached.receiver_id)
+    resource = trade_offer if representation.expand else cached
+    return representation.resource_response(request, resource, links, {"ETag": etag})
 
 
 @router.get("", response_model=TradeOfferCollection)
@@ -108,26 +163,37 @@ def get_all_trade_offers(
     request: Request,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     status_filter: TradeOfferStatus = None,
+    representation: Representation = Depends(trade_offer_representation),
     db: Session = Depends(get_db)
 ):
-    query = db.query(TradeOffer)
+    query = db.query(TradeOffer).options(*representation.options())
     
     if status_filter:
         query = query.filter(TradeOffer.status == status_filter)
     
-    trade_offers = query.offset(skip).limit(limit).all()
+    trade_offers = paginate(query, TRADE_OFFER_ORDER, cursor, skip, limit).all()
+
+    etag = make_etag(request, collection_version(
+        ((item.id, item.updated_at) for item in trade_offers), representation.versions(trade_offers)
+    ))
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
     
-    items = []
-    for trade_offer in trade_offers:
-        response = TradeOfferResponse.model_validate(trade_offer)
-        response.links = add_trade_offer_links(request, trade_offer.id, trade_offer.offerer_id, trade_offer.receiver_id)
-        items.append(response)
+    items = representation.items(
+        request, trade_offers,
+        lambda offer: add_trade_offer_links(request, offer.id, offer.offerer_id, offer.receiver_id)
+    )
     
-    base_url = str(request.base_url).rstrip('/')
-    collection_links = add_collection_links(request, "/trade-offers", skip, limit, len(items))
+    collection_links = add_collection_links(
+        request, "/trade-offers", skip, limit, len(items),
+        next_cursor(trade_offers, TRADE_OFFER_ORDER, limit),
+        {"status_filter": status_filter, **representation.query_params()}
+    )
 
-    return TradeOfferCollection(items=items, links=collection_links)
+    return representation.response(TradeOfferCollection, items, {"ETag": etag}, links=collection_links)
 
 
 @router.get("/user/{user_id}/sent", response_model=TradeOfferCollection)
@@ -136,6 +202,8 @@ def get_user_sent_offers(
     request: Request,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    representation: Representation = Depends(trade_offer_representation),
     db: Session = Depends(get_db)
 ):
     user = db.query(User).filter(User.id == user_id).first()
@@ -145,20 +213,29 @@ def get_user_sent_offers(
             detail="User not found"
         )
 
-    trade_offers = db.query(TradeOffer).filter(
-        TradeOffer.offerer_id == user_id
-    ).offset(skip).limit(limit).all()
-
-    items = []
-    for trade_offer in trade_offers:
-        response = TradeOfferResponse.model_validate(trade_offer)
-        response.links = add_trade_offer_links(request, trade_offer.id, trade_offer.offerer_id, trade_offer.receiver_id)
-        items.append(response)
+    trade_offers = paginate(
+        db.query(TradeOffer).options(*representation.options()).filter(TradeOffer.offerer_id == user_id),
+        TRADE_OFFER_ORDER, cursor, skip, limit
+    ).all()
+
+    etag = make_etag(request, collection_version(
+        ((item.id, item.updated_at) for item in trade_offers), representation.versions(trade_offers)
+    ))
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    items = representation.items(
+        request, trade_offers,
+        lambda offer: add_trade_offer_links(request, offer.id, offer.offerer_id, offer.receiver_id)
+    )
 
-    base_url = str(request.base_url).rstrip('/')
-    collection_links = add_collection_links(request, f"/trade-offers/user/{user_id}/sent", skip, limit, len(items))
+    collection_links = add_collection_links(
+        request, f"/trade-offers/user/{user_id}/sent", skip, limit, len(items),
+        next_cursor(trade_offers, TRADE_OFFER_ORDER, limit), representation.query_params()
+    )
 
-    return TradeOfferCollection(items=items, links=collection_links)
+    return representation.response(TradeOfferCollection, items, {"ETag": etag}, links=collection_links)
 
 
 @router.get("/user/{user_id}/received", response_model=TradeOfferCollection)
@@ -167,6 +244,8 @@ def get_user_received_offers(
     request: Request,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    representation: Representation = Depends(trade_offer_representation),
     db: Session = Depends(get_db)
 ):
     user = db.query(User).filter(User.id == user_id).first()
@@ -176,20 +255,29 @@ def get_user_received_offers(
             detail="User not found"
         )
 
-    trade_offers = db.query(TradeOffer).filter(
-        TradeOffer.receiver_id == user_id
-    ).offset(skip).limit(limit).all()
-
-    items = []
-    for trade_offer in trade_offers:
-        response = TradeOfferResponse.model_validate(trade_offer)
-        response.links = add_trade_offer_links(request, trade_offer.id, trade_offer.offerer_id, trade_offer.receiver_id)
-        items.append(response)
+    trade_offers = paginate(
+        db.query(TradeOffer).options(*representation.options()).filter(TradeOffer.receiver_id == user_id),
+        TRADE_OFFER_ORDER, cursor, skip, limit
+    ).all()
+
+    etag = make_etag(request, collection_version(
+        ((item.id, item.updated_at) for item in trade_offers), representation.versions(trade_offers)
+    ))
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    items = representation.items(
+        request, trade_offers,
+        lambda offer: add_trade_offer_links(request, offer.id, offer.offerer_id, offer.receiver_id)
+    )
 
-    base_url = str(request.base_url).rstrip('/')
-    collection_links = add_collection_links(request, f"/trade-offers/user/{user_id}/received", skip, limit, len(items))
+    collection_links = add_collection_links(
+        request, f"/trade-offers/user/{user_id}/received", skip, limit, len(items),
+        next_cursor(trade_offers, TRADE_OFFER_ORDER, limit), representation.query_params()
+    )
 
-    return TradeOfferCollection(items=items, links=collection_links)
+    return representation.response(TradeOfferCollection, items, {"ETag": etag}, links=collection_links)
 
 
 @router.put("/{trade_offer_id}/accept", response_model=TradeOfferResponse)
@@ -205,34 +293,31 @@ def accept_trade_offer(
             detail="Trade offer not found"
         )
 
+    check_if_match(request, db, TradeOffer, trade_offer)
+
     if trade_offer.status != TradeOfferStatus.PENDING:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Cannot accept trade offer with status: {trade_offer.status}"
         )
 
-    trade_offer.status = TradeOfferStatus.ACCEPTED
-    db.commit()
+    def notify(cancelled):
+        accepted_notification, = offer_notifications(db, [trade_offer])
+        add_event(db, "trade_offer", trade_offer.id, "trade_offer_accepted", {
+            **accepted_notification,
+            "cancelled_offers": offer_notifications(db, cancelled)
+        })
+
+    settle_trade(db, [trade_offer], {
+        trade_offer.offered_game_id: (trade_offer.offerer_id, trade_offer.receiver_id),
+        trade_offer.requested_game_id: (trade_offer.receiver_id, trade_offer.offerer_id),
+    }, notify)
     db.refresh(trade_offer)
 
-    offered_game = db.query(VideoGame).filter(VideoGame.id == trade_offer.offered_game_id).first()
-    requested_game = db.query(VideoGame).filter(VideoGame.id == trade_offer.requested_game_id).first()
-    offerer = db.query(User).filter(User.id == trade_offer.offerer_id).first()
-    receiver = db.query(User).filter(User.id == trade_offer.receiver_id).first()
-
-    notification_producer.send_notification("trade_offer_accepted", {
-        "offerer_email": offerer.email,
-        "offerer_name": offerer.name,
-        "receiver_email": receiver.email,
-        "receiver_name": receiver.name,
-        "offered_game": offered_game.name,
-        "requested_game": requested_game.name
-    })
-
     response = TradeOfferResponse.model_validate(trade_offer)
     response.links = add_trade_offer_links(request, trade_offer.id, trade_offer.offerer_id, trade_offer.receiver_id)
 
-    return response
+    return model_response(response)
 
 
 @router.put("/{trade_offer_id}/reject", response_model=TradeOfferResponse)
@@ -248,22 +333,21 @@ def reject_trade_offer(
             detail="Trade offer not found"
         )
 
+    check_if_match(request, db, TradeOffer, trade_offer)
+
     if trade_offer.status != TradeOfferStatus.PENDING:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Cannot reject trade offer with status: {trade_offer.status}"
         )
 
-    trade_offer.status = TradeOfferStatus.REJECTED
-    db.commit()
-    db.refresh(trade_offer)
-
     offered_game = db.query(VideoGame).filter(VideoGame.id == trade_offer.offered_game_id).first()
     requested_game = db.query(VideoGame).filter(VideoGame.id == trade_offer.requested_game_id).first()
     offerer = db.query(User).filter(User.id == trade_offer.offerer_id).first()
     receiver = db.query(User).filter(User.id == trade_offer.receiver_id).first()
 
-    notification_producer.send_notification("trade_offer_rejected", {
+    close_offer(db, trade_offer, TradeOfferStatus.REJECTED, "reject")
+    add_event(db, "trade_offer", trade_offer.id, "trade_offer_rejected", {
         "offerer_email": offerer.email,
         "offerer_name": offerer.name,
         "receiver_email": receiver.email,
@@ -271,11 +355,14 @@ def reject_trade_offer(
         "offered_game": offered_game.name,
         "requested_game": requested_game.name
     })
+    db.commit()
+    invalidate(trade_offer_cache, [trade_offer_id])
+    db.refresh(trade_offer)
 
     response = TradeOfferResponse.model_validate(trade_offer)
     response.links = add_trade_offer_links(request, trade_offer.id, trade_offer.offerer_id, trade_offer.receiver_id)
 
-    return response
+    return model_response(response)
 
 
 @router.put("/{trade_offer_id}/cancel", response_model=TradeOfferResponse)
@@ -291,18 +378,21 @@ def cancel_trade_offer(
             detail="Trade offer not found"
         )
 
+    check_if_match(request, db, TradeOffer, trade_offer)
+
     if trade_offer.status != TradeOfferStatus.PENDING:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Cannot cancel trade offer with status: {trade_offer.status}"
         )
 
-    trade_offer.status = TradeOfferStatus.CANCELLED
+    close_offer(db, trade_offer, TradeOfferStatus.CANCELLED, "cancel")
     db.commit()
+    invalidate(trade_offer_cache, [trade_offer_id])
     db.refresh(trade_offer)
 
     response = TradeOfferResponse.model_validate(trade_offer)
     response.links = add_trade_offer_links(request, trade_offer.id, trade_offer.offerer_id, trade_offer.receiver_id)
 
-    return response
+    return model_response(response)
 
@@ -1,14 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Body, Depends, HTTPException, status, Request
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from typing import List
-from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, ValidationError
 from app.database import get_db
 from app.models import User, VideoGame
-from app.schemas import UserCreate, UserUpdate, UserResponse, UserCollection, VideoGameResponse, VideoGameCollection
-from app.hateoas import add_user_links, add_collection_links, add_game_links
-from app.services.kafka_producer import notification_producer
-
-router = APIRouter(prefix="/users", tags=["users"])
+from app.schemas import (
+    UserCreate, UserUpdate, UserResponse, UserCollection, VideoGameCollection,
+    BulkOperationResult
+)
+from app.hateoas import add_user_links, add_collection_links, add_game_links, link_mode
+from app.responses import model_response
+from app.fieldsets import Representation, game_representation, user_representation
+from app.bulk import check_batch_size, existing_values, validation_errors, item_error, item_success, bulk_response
+from app.pagination import paginate, next_cursor
+from app.cache import user_cache
+from app.etag import make_etag, not_modified, resource_version, collection_version, check_if_match
+from app.services.cache_invalidation import invalidate
+from app.outbox import add_event
+
+router = APIRouter(prefix="/users", tags=["users"], dependencies=[Depends(link_mode)])
 
 
 class PasswordChange(BaseModel):
@@ -37,26 +48,80 @@ def register_user(user: UserCreate, request: Request, db: Session = Depends(get_
     response = UserResponse.model_validate(db_user)
     response.links = add_user_links(request, db_user.id, is_owner=True)
 
-    return response
+    return model_response(response, status_code=status.HTTP_201_CREATED)
+
+
+@router.post("/bulk", response_model=BulkOperationResult)
+def bulk_register_users(
+    request: Request,
+    items: List[Dict[str, Any]] = Body(...),
+    db: Session = Depends(get_db)
+):
+    check_batch_size(items)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+
+    candidates = []
+    for index, item in enumerate(items):
+        try:
+            candidates.append((index, UserCreate.model_validate(item)))
+        except ValidationError as exc:
+            results[index] = {"index": index, "id": None, "status": "error", "errors": validation_errors(exc)}
+
+    taken = existing_values(db, User.email, (user.email for _, user in candidates))
+
+    rows = []
+    row_indexes = []
+    for index, user in candidates:
+        if user.email in taken:
+            results[index] = item_error(index, "email", "Email already registered", "conflict")
+            continue
+        taken.add(user.email)
+        rows.append({
+            "name": user.name,
+            "email": user.email,
+            "hashed_password": user.password,
+            "street_address": user.street_address
+        })
+        row_indexes.append(index)
+
+    if rows:
+        user_ids = db.scalars(
+            insert(User).returning(User.id, sort_by_parameter_order=True),
+            rows
+        ).all()
+        db.commit()
+        for index, user_id in zip(row_indexes, user_ids):
+            results[index] = item_success(index, user_id, "created")
+
+    return bulk_response(request, "users_bulk", results)
 
 
 @router.get("/{user_id}", response_model=UserResponse)
 def get_user(
     user_id: int,
     request: Request,
+    representation: Representation = Depends(user_representation),
     db: Session = Depends(get_db)
 ):
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-
-    response = UserResponse.model_validate(user)
-    response.links = add_user_links(request, user_id, is_owner=True)
-
-    return response
+    cached = user_cache.get(user_id)
+    if cached is None:
+        epoch = user_cache.epoch
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        cached = UserResponse.model_validate(user)
+        user_cache.put(user_id, cached, epoch)
+
+    etag = make_etag(request, resource_version(User.__tablename__, user_id, cached.updated_at))
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    links = add_user_links(request, user_id, is_owner=True)
+    return representation.resource_response(request, cached, links, {"ETag": etag})
 
 
 @router.get("", response_model=UserCollection)
@@ -64,20 +129,27 @@ def get_users(
     request: Request,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    representation: Representation = Depends(user_representation),
     db: Session = Depends(get_db)
 ):
-    users = db.query(User).offset(skip).limit(limit).all()
+    order = (User.id,)
+    users = paginate(db.query(User).options(*representation.options(*order)), order, cursor, skip, limit).all()
 
-    user_responses = []
-    for user in users:
-        response = UserResponse.model_validate(user)
-        response.links = add_user_links(request, user.id, is_owner=True)
-        user_responses.append(response)
+    etag = make_etag(request, collection_version((item.id, item.updated_at) for item in users))
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
 
-    collection = UserCollection(items=user_responses)
-    collection.links = add_collection_links(request, "/users")
+    user_responses = representation.items(
+        request, users, lambda user: add_user_links(request, user.id, is_owner=True)
+    )
+    collection_links = add_collection_links(
+        request, "/users", skip, limit, len(users), next_cursor(users, order, limit),
+        representation.query_params()
+    )
 
-    return collection
+    return representation.response(UserCollection, user_responses, {"ETag": etag}, links=collection_links)
 
 
 @router.put("/{user_id}", response_model=UserResponse)
@@ -94,17 +166,21 @@ def update_user(
             detail="User not found"
         )
 
+    check_if_match(request, db, User, user)
+
     update_data = user_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(user, field, value)
 
     db.commit()
+    invalidate(user_cache, [user_id])
     db.refresh(user)
 
     response = UserResponse.model_validate(user)
     response.links = add_user_links(request, user_id, is_owner=True)
+    etag = make_etag(request, resource_version(User.__tablename__, user_id, response.updated_at))
 
-    return response
+    return model_response(response, headers={"ETag": etag})
 
 
 @router.get("/{user_id}/games", response_model=VideoGameCollection)
@@ -113,6 +189,8 @@ def get_user_games(
     request: Request,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    representation: Representation = Depends(game_representation),
     db: Session = Depends(get_db)
 ):
     user = db.query(User).filter(User.id == user_id).first()
@@ -122,18 +200,26 @@ def get_user_games(
             detail="User not found"
         )
 
-    games = db.query(VideoGame).filter(VideoGame.owner_id == user_id).offset(skip).limit(limit).all()
+    order = (VideoGame.id,)
+    games = paginate(
+        db.query(VideoGame).options(*representation.options(*order)).filter(VideoGame.owner_id == user_id),
+        order, cursor, skip, limit
+    ).all()
 
-    game_responses = []
-    for game in games:
-        response = VideoGameResponse.model_validate(game)
-        response.links = add_game_links(request, game.id, game.owner_id, is_owner=True)
-        game_responses.append(response)
+    etag = make_etag(request, collection_version((item.id, item.updated_at) for item in games))
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
 
-    collection = VideoGameCollection(items=game_responses)
-    collection.links = add_collection_links(request, f"/users/{user_id}/games")
+    game_responses = representation.items(
+        request, games, lambda game: add_game_links(request, game.id, game.owner_id, is_owner=True)
+    )
+    collection_links = add_collection_links(
+        request, f"/users/{user_id}/games", skip, limit, len(games), next_cursor(games, order, limit),
+        representation.query_params()
+    )
 
-    return collection
+    return representation.response(VideoGameCollection, game_responses, {"ETag": etag}, links=collection_links)
 
 
 @router.put("/{user_id}/password", response_model=UserResponse)
@@ -150,17 +236,20 @@ def change_password(
             detail="User not found"
         )
 
-    user.hashed_password = password_change.new_password
-    db.commit()
-    db.refresh(user)
+    check_if_match(request, db, User, user)
 
-    notification_producer.send_notification("password_changed", {
+    user.hashed_password = password_change.new_password
+    add_event(db, "user", user.id, "password_changed", {
         "user_email": user.email,
         "user_name": user.name
     })
+    db.commit()
+    invalidate(user_cache, [user_id])
+    db.refresh(user)
 
     response = UserResponse.model_validate(user)
     response.links = add_user_links(request, user_id, is_owner=True)
+    etag = make_etag(request, resource_version(User.__tablename__, user_id, response.updated_at))
 
-    return response
+    return model_response(response, headers={"ETag": etag})
 
@@ -21,6 +21,7 @@ class UserUpdate(BaseModel):
 
 class UserResponse(UserBase):
     id: int
+    updated_at: datetime
     links: Dict[str, Any] = {}
     
     model_config = ConfigDict(from_attributes=True)
@@ -51,6 +52,7 @@ class VideoGameUpdate(BaseModel):
 class VideoGameResponse(VideoGameBase):
     id: int
     owner_id: int
+    updated_at: datetime
     links: Dict[str, Any] = {}
     
     model_config = ConfigDict(from_attributes=True)
@@ -68,6 +70,7 @@ class TokenData(BaseModel):
 
 class VideoGameCollection(BaseModel):
     items: List[VideoGameResponse]
+    facets: Optional[Dict[str, Dict[str, int]]] = None
     links: Dict[str, Any] = {}
 
 
@@ -102,6 +105,39 @@ class TradeOfferCollection(BaseModel):
     links: Dict[str, Any] = {}
 
 
+class TradeCycleResponse(BaseModel):
+    id: str
+    length: int
+    offer_ids: List[int]
+    game_ids: List[int]
+    user_ids: List[int]
+    status: TradeOfferStatus = TradeOfferStatus.PENDING
+    links: Dict[str, Any] = {}
+
+
+class TradeCycleCollection(BaseModel):
+    items: List[TradeCycleResponse]
+    links: Dict[str, Any] = {}
+
+
+class BulkDeleteRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1)
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    status: str
+    errors: List[Dict[str, Any]] = []
+
+
+class BulkOperationResult(BaseModel):
+    succeeded: int
+    failed: int
+    items: List[BulkItemResult]
+    links: Dict[str, Any] = {}
+
+
 class ErrorResponse(BaseModel):
     error: str
     detail: str
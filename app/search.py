@@ -0,0 +1,56 @@
+import re
+from typing import Optional
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table
+
+search_metadata = MetaData()
+
+video_games_fts = Table(
+    "video_games_fts",
+    search_metadata,
+    Column("rowid", Integer),
+    Column("name", String),
+    Column("publisher", String),
+    Column("gaming_system", String),
+    Column("rank", Float),
+    Column("video_games_fts", String),
+)
+
+GAME_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS video_games_fts USING fts5(
+        name, publisher, gaming_system,
+        content='video_games', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS video_games_fts_insert AFTER INSERT ON video_games BEGIN
+        INSERT INTO video_games_fts (rowid, name, publisher, gaming_system)
+        VALUES (new.id, new.name, new.publisher, new.gaming_system);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS video_games_fts_delete AFTER DELETE ON video_games BEGIN
+        INSERT INTO video_games_fts (video_games_fts, rowid, name, publisher, gaming_system)
+        VALUES ('delete', old.id, old.name, old.publisher, old.gaming_system);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS video_games_fts_update AFTER UPDATE OF name, publisher, gaming_system ON video_games BEGIN
+        INSERT INTO video_games_fts (video_games_fts, rowid, name, publisher, gaming_system)
+        VALUES ('delete', old.id, old.name, old.publisher, old.gaming_system);
+        INSERT INTO video_games_fts (rowid, name, publisher, gaming_system)
+        VALUES (new.id, new.name, new.publisher, new.gaming_system);
+    END
+    """,
+    "INSERT INTO video_games_fts (video_games_fts) VALUES ('rebuild')",
+]
+
+SEARCH_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def to_match_query(q: str) -> Optional[str]:
+    tokens = SEARCH_TOKEN.findall(q)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
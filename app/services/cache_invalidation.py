@@ -0,0 +1,112 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Hashable, Iterable
+from kafka import KafkaConsumer, KafkaProducer
+from app.cache import CACHES, ResourceCache
+from app.config import settings
+from app.services.kafka_producer import KAFKA_PUBLISH_DURATION
+
+logger = logging.getLogger(__name__)
+
+
+class CacheInvalidationBus:
+    def __init__(self):
+        self.bootstrap_servers = settings.kafka_bootstrap_servers
+        self.topic = settings.kafka_topic_cache_invalidations
+        self.origin = f"{settings.instance_name}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.producer = None
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-invalidation", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self.producer:
+            self.producer.close(timeout=5)
+            self.producer = None
+
+    def publish(self, cache_name: str, keys: Iterable[Hashable]):
+        if not self.producer:
+            return
+        started = time.perf_counter()
+        outcome = "queued"
+        try:
+            self.producer.send(self.topic, value={"cache": cache_name, "keys": list(keys), "origin": self.origin}).add_errback(
+                lambda exc: logger.error(f"Failed to publish cache invalidation: {exc}")
+            )
+        except Exception as e:
+            outcome = "failed"
+            logger.error(f"Failed to publish cache invalidation: {e}")
+        KAFKA_PUBLISH_DURATION.labels(
+            topic=self.topic, outcome=outcome, instance=settings.instance_name
+        ).observe(time.perf_counter() - started)
+
+    def _run(self):
+        backoff = settings.kafka_reconnect_backoff_seconds
+        while not self._stopping.is_set():
+            try:
+                if self.producer is None:
+                    self.producer = KafkaProducer(
+                        bootstrap_servers=self.bootstrap_servers,
+                        value_serializer=lambda v: json.dumps(v).encode('utf-8'),
+                        linger_ms=5
+                    )
+                consumer = KafkaConsumer(
+                    self.topic,
+                    bootstrap_servers=self.bootstrap_servers,
+                    group_id=None,
+                    auto_offset_reset='latest',
+                    value_deserializer=lambda m: json.loads(m.decode('utf-8'))
+                )
+            except Exception as e:
+                logger.error(f"Cache invalidation bus unavailable, retrying in {backoff:g}s: {e}")
+                self._stopping.wait(backoff)
+                backoff = min(backoff * 2, settings.kafka_reconnect_backoff_max_seconds)
+                continue
+
+            # anything published while this instance was not listening has been missed
+            for cache in CACHES.values():
+                cache.clear()
+            logger.info(f"Cache invalidation consumer connected. Topic: {self.topic}")
+            backoff = settings.kafka_reconnect_backoff_seconds
+
+            try:
+                while not self._stopping.is_set():
+                    for records in consumer.poll(timeout_ms=1000).values():
+                        for record in records:
+                            self._apply(record.value)
+            except Exception as e:
+                logger.error(f"Cache invalidation consumer error: {e}")
+            finally:
+                consumer.close()
+
+    def _apply(self, message: dict):
+        if message.get("origin") == self.origin:
+            return
+        cache = CACHES.get(message.get("cache"))
+        if cache is not None:
+            cache.invalidate(message.get("keys", []))
+
+
+cache_invalidation_bus = CacheInvalidationBus()
+
+
+def invalidate(cache: ResourceCache, keys: Iterable[Hashable]):
+    keys = list(keys)
+    if not keys:
+        return
+    cache.invalidate(keys)
+    cache_invalidation_bus.publish(cache.name, keys)
@@ -1,54 +1,125 @@
 from kafka import KafkaProducer
-import json
+from prometheus_client import Counter, Histogram
+from app.config import settings
+from events import ENCODINGS, encode
 import logging
 import os
+import threading
+import time
 from typing import Dict, Any
 
 logger = logging.getLogger(__name__)
 
+KAFKA_PUBLISH_DURATION = Histogram(
+    'kafka_publish_duration_seconds',
+    'Time from handing a message to the producer until Kafka acknowledged it (or it failed)',
+    ['topic', 'outcome', 'instance'],
+    buckets=settings.metrics_component_buckets
+)
+
+KAFKA_MESSAGES = Counter(
+    'kafka_messages_total',
+    'Notification messages by final outcome: delivered or failed',
+    ['topic', 'outcome', 'instance']
+)
+
 
 class NotificationProducer:
     def __init__(self):
         self.bootstrap_servers = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "kafka:9092")
         self.topic = os.getenv("KAFKA_TOPIC_NOTIFICATIONS", "email-notifications")
+        self.encoding = settings.kafka_event_encoding
+        if self.encoding not in ENCODINGS:
+            raise ValueError(f"KAFKA_EVENT_ENCODING must be one of {', '.join(ENCODINGS)}")
         self.producer = None
-        self._initialize_producer()
-    
-    def _initialize_producer(self):
-        try:
-            self.producer = KafkaProducer(
-                bootstrap_servers=self.bootstrap_servers,
-                value_serializer=lambda v: json.dumps(v).encode('utf-8'),
-                acks='all',
-                retries=3,
-                max_in_flight_requests_per_connection=1
-            )
+        self._connector = None
+        self._stopping = threading.Event()
+        self._connected = threading.Event()
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    def wait_connected(self, timeout: float = None) -> bool:
+        return self._connected.wait(timeout)
+
+    def start(self):
+        # connecting can take seconds while the broker is still starting; the API serves meanwhile
+        if self._connector is not None or self.producer is not None:
+            return
+        self._stopping.clear()
+        self._connector = threading.Thread(target=self._connect, name="notification-connector", daemon=True)
+        self._connector.start()
+
+    def _connect(self):
+        backoff = settings.kafka_reconnect_backoff_seconds
+        while not self._stopping.is_set():
+            try:
+                producer = KafkaProducer(
+                    bootstrap_servers=self.bootstrap_servers,
+                    acks='all',
+                    retries=3,
+                    # the relay has at most one event per aggregate in flight, so retries cannot reorder a key
+                    max_in_flight_requests_per_connection=5,
+                    linger_ms=settings.kafka_linger_ms,
+                    batch_size=settings.kafka_batch_size,
+                    compression_type=settings.kafka_compression_type or None,
+                    reconnect_backoff_max_ms=int(settings.kafka_reconnect_backoff_max_seconds * 1000)
+                )
+            except Exception as e:
+                logger.error(f"Failed to initialize Kafka producer, retrying in {backoff:g}s: {e}")
+                self._stopping.wait(backoff)
+                backoff = min(backoff * 2, settings.kafka_reconnect_backoff_max_seconds)
+                continue
+            # once bootstrapped, the client reconnects to brokers on its own with the same backoff cap
+            self.producer = producer
             logger.info(f"Kafka producer initialized successfully. Bootstrap servers: {self.bootstrap_servers}")
-        except Exception as e:
-            logger.error(f"Failed to initialize Kafka producer: {e}")
-            self.producer = None
-    
-    def send_notification(self, event_type: str, data: Dict[str, Any]):
-        if not self.producer:
-            logger.warning("Kafka producer not initialized. Skipping notification.")
+            self._connected.set()
             return
-        
-        try:
-            message = {
-                "event_type": event_type,
-                "data": data
-            }
-            
-            future = self.producer.send(self.topic, value=message)
-            future.get(timeout=10)
-            logger.info(f"Notification sent: {event_type}")
-        except Exception as e:
-            logger.error(f"Failed to send notification: {e}")
-    
+
+    def send_event(self, message: Dict[str, Any], key: str):
+        # the outbox relay needs the delivery future itself to know which rows were published
+        if not self.producer:
+            raise RuntimeError("Kafka producer not initialized")
+        started = time.perf_counter()
+        return self._send(message, key.encode("utf-8")).add_callback(
+            self._delivered, started
+        ).add_errback(
+            self._failed, started
+        )
+
+    def _send(self, message: Dict[str, Any], key: bytes = None):
+        # the content-type header tells consumers which encoding the value uses
+        value, headers = encode(message, self.encoding)
+        return self.producer.send(self.topic, key=key, value=value, headers=headers)
+
+    def _delivered(self, started: float, metadata):
+        KAFKA_MESSAGES.labels(topic=self.topic, outcome="delivered", instance=settings.instance_name).inc()
+        KAFKA_PUBLISH_DURATION.labels(
+            topic=self.topic, outcome="delivered", instance=settings.instance_name
+        ).observe(time.perf_counter() - started)
+
+    def _failed(self, started: float, exc: Exception):
+        logger.error(f"Failed to send notification: {exc}")
+        KAFKA_MESSAGES.labels(topic=self.topic, outcome="failed", instance=settings.instance_name).inc()
+        KAFKA_PUBLISH_DURATION.labels(
+            topic=self.topic, outcome="failed", instance=settings.instance_name
+        ).observe(time.perf_counter() - started)
+
+    def flush(self, timeout: float = None):
+        self._stopping.set()
+        if self._connector is not None:
+            self._connector.join(timeout)
+            self._connector = None
+        if self.producer:
+            self.producer.flush(timeout)
+
     def close(self):
+        self.flush(settings.kafka_flush_timeout_seconds)
         if self.producer:
-            self.producer.close()
+            self.producer.close(settings.kafka_flush_timeout_seconds)
+            self.producer = None
+        self._connected.clear()
 
 
 notification_producer = NotificationProducer()
-
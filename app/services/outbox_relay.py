@@ -0,0 +1,246 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.orm import aliased
+from app.config import settings
+from app.database import SessionLocal
+from app.models import OutboxEvent
+from app.outbox import outbox_written
+from app.services.kafka_producer import notification_producer
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_PENDING = Gauge(
+    'outbox_pending_events',
+    'Outbox events not yet published to Kafka',
+    ['instance']
+)
+
+OUTBOX_OLDEST_AGE = Gauge(
+    'outbox_oldest_event_age_seconds',
+    'Age of the oldest unpublished outbox event (0 when the outbox is drained)',
+    ['instance']
+)
+
+OUTBOX_PUBLISHED = Counter(
+    'outbox_events_published_total',
+    'Outbox events published to Kafka by this relay',
+    ['instance']
+)
+
+OUTBOX_FAILURES = Counter(
+    'outbox_publish_failures_total',
+    'Outbox publish attempts that failed and were scheduled for retry',
+    ['instance']
+)
+
+OUTBOX_DEAD_LETTERED = Counter(
+    'outbox_events_dead_lettered_total',
+    'Outbox events given up on after OUTBOX_MAX_ATTEMPTS failed attempts',
+    ['instance']
+)
+
+OUTBOX_DEAD_LETTERS = Gauge(
+    'outbox_dead_lettered_events',
+    'Dead-lettered outbox events waiting to be inspected or requeued',
+    ['instance']
+)
+
+OUTBOX_LAG = Histogram(
+    'outbox_publish_lag_seconds',
+    'Time from the committing transaction to the Kafka acknowledgement',
+    ['instance'],
+    buckets=settings.metrics_request_buckets
+)
+
+
+class OutboxRelay:
+    def __init__(self):
+        self.relay_id = f"{settings.instance_name}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._stopping = threading.Event()
+        self._thread = None
+        self._last_cleanup = 0.0
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="outbox-relay", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        outbox_written.set()
+        if self._thread is not None:
+            self._thread.join(timeout=settings.kafka_flush_timeout_seconds)
+            self._thread = None
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                if notification_producer.connected:
+                    published = self.relay_batch()
+                else:
+                    # claiming now would only burn retry attempts; keep the backlog gauges current meanwhile
+                    published = 0
+                    with SessionLocal() as db:
+                        self._observe(db)
+                if time.monotonic() - self._last_cleanup >= settings.outbox_cleanup_interval_seconds:
+                    self.cleanup()
+                    self._last_cleanup = time.monotonic()
+            except Exception as e:
+                logger.error(f"Outbox relay failed: {e}")
+                published = 0
+            if published < settings.outbox_batch_size:
+                outbox_written.wait(settings.outbox_poll_interval_ms / 1000)
+                outbox_written.clear()
+
+    def _claim(self, db, now: datetime) -> List[OutboxEvent]:
+        # only the oldest live event of each aggregate is a candidate, so a retrying event holds back
+        # everything after it for the same aggregate, across every relay sharing the table; events that
+        # are not due are filtered before the limit, so a backlog of retries cannot crowd out newer events
+        head = aliased(OutboxEvent)
+        head_id = (
+            select(func.min(head.id))
+            .where(
+                head.aggregate_type == OutboxEvent.aggregate_type,
+                head.aggregate_id == OutboxEvent.aggregate_id,
+                head.published_at.is_(None),
+                head.dead_lettered_at.is_(None)
+            )
+            .scalar_subquery()
+        )
+        candidates = db.execute(
+            select(OutboxEvent.id)
+            .where(
+                OutboxEvent.published_at.is_(None),
+                OutboxEvent.dead_lettered_at.is_(None),
+                OutboxEvent.id == head_id,
+                or_(OutboxEvent.next_attempt_at.is_(None), OutboxEvent.next_attempt_at <= now),
+                or_(OutboxEvent.claimed_until.is_(None), OutboxEvent.claimed_until <= now)
+            )
+            .order_by(OutboxEvent.id)
+            .limit(settings.outbox_batch_size)
+        ).scalars().all()
+        if not candidates:
+            return []
+
+        claimed = db.execute(
+            update(OutboxEvent)
+            .where(
+                OutboxEvent.id.in_(candidates),
+                OutboxEvent.published_at.is_(None),
+                OutboxEvent.dead_lettered_at.is_(None),
+                or_(OutboxEvent.claimed_until.is_(None), OutboxEvent.claimed_until <= now)
+            )
+            .values(claimed_by=self.relay_id, claimed_until=now + timedelta(seconds=settings.outbox_claim_seconds))
+            .returning(OutboxEvent.id),
+            execution_options={"synchronize_session": False}
+        ).scalars().all()
+        db.commit()
+        if not claimed:
+            return []
+        return db.query(OutboxEvent).filter(OutboxEvent.id.in_(claimed)).order_by(OutboxEvent.id).all()
+
+    def relay_batch(self) -> int:
+        with SessionLocal() as db:
+            events = self._claim(db, datetime.utcnow())
+            if events:
+                futures = {}
+                for outbox_event in events:
+                    try:
+                        futures[outbox_event.id] = notification_producer.send_event(
+                            {"event_type": outbox_event.event_type, "data": outbox_event.payload},
+                            f"{outbox_event.aggregate_type}:{outbox_event.aggregate_id}"
+                        )
+                    except Exception as e:
+                        futures[outbox_event.id] = e
+                if any(not isinstance(future, Exception) for future in futures.values()):
+                    notification_producer.producer.flush(settings.kafka_flush_timeout_seconds)
+                self._settle(db, events, futures)
+            self._observe(db)
+        return len(events)
+
+    def _settle(self, db, events: List[OutboxEvent], futures: Dict[int, object]):
+        now = datetime.utcnow()
+        published = []
+        for outbox_event in events:
+            future = futures[outbox_event.id]
+            if isinstance(future, Exception):
+                error = future
+            elif not future.is_done:
+                error = TimeoutError("no acknowledgement before the flush timeout")
+            else:
+                error = future.exception
+            if error is None:
+                published.append(outbox_event.id)
+                OUTBOX_LAG.labels(instance=settings.instance_name).observe((now - outbox_event.created_at).total_seconds())
+                continue
+            # an unacknowledged send may still land; the consumer sees it at least once either way
+            backoff = min(settings.outbox_retry_max_seconds, settings.outbox_retry_base_seconds * 2 ** outbox_event.attempts)
+            outbox_event.attempts += 1
+            outbox_event.last_error = str(error)[:500]
+            outbox_event.claimed_by = None
+            outbox_event.claimed_until = None
+            OUTBOX_FAILURES.labels(instance=settings.instance_name).inc()
+            if outbox_event.attempts >= settings.outbox_max_attempts:
+                # out of the claim path for good; later events of its aggregate are released
+                outbox_event.dead_lettered_at = now
+                OUTBOX_DEAD_LETTERED.labels(instance=settings.instance_name).inc()
+                logger.error(
+                    f"Outbox event {outbox_event.id} ({outbox_event.event_type}) dead-lettered after "
+                    f"{outbox_event.attempts} attempts: {error}"
+                )
+                continue
+            outbox_event.next_attempt_at = now + timedelta(seconds=backoff)
+            logger.warning(
+                f"Outbox event {outbox_event.id} ({outbox_event.event_type}) failed, attempt {outbox_event.attempts}, "
+                f"retrying in {backoff:.0f}s: {error}"
+            )
+
+        if published:
+            db.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id.in_(published))
+                .values(published_at=now, claimed_by=None, claimed_until=None),
+                execution_options={"synchronize_session": False}
+            )
+            OUTBOX_PUBLISHED.labels(instance=settings.instance_name).inc(len(published))
+        db.commit()
+
+    def _observe(self, db):
+        pending, oldest = db.execute(
+            select(func.count(), func.min(OutboxEvent.id))
+            .where(OutboxEvent.published_at.is_(None), OutboxEvent.dead_lettered_at.is_(None))
+        ).one()
+        dead = db.execute(
+            select(func.count()).where(OutboxEvent.published_at.is_(None), OutboxEvent.dead_lettered_at.is_not(None))
+        ).scalar()
+        OUTBOX_PENDING.labels(instance=settings.instance_name).set(pending)
+        OUTBOX_DEAD_LETTERS.labels(instance=settings.instance_name).set(dead)
+        age = 0.0
+        if oldest is not None:
+            created_at = db.execute(select(OutboxEvent.created_at).where(OutboxEvent.id == oldest)).scalar()
+            age = (datetime.utcnow() - created_at).total_seconds()
+        OUTBOX_OLDEST_AGE.labels(instance=settings.instance_name).set(age)
+
+    def cleanup(self) -> int:
+        cutoff = datetime.utcnow() - timedelta(hours=settings.outbox_retention_hours)
+        with SessionLocal() as db:
+            removed = db.execute(
+                delete(OutboxEvent).where(OutboxEvent.published_at < cutoff),
+                execution_options={"synchronize_session": False}
+            ).rowcount
+            db.commit()
+        if removed:
+            logger.info(f"Removed {removed} published outbox events older than {settings.outbox_retention_hours}h")
+        return removed
+
+
+outbox_relay = OutboxRelay()
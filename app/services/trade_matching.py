@@ -0,0 +1,293 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from prometheus_client import Gauge, Histogram
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import Session
+from app.bulk import chunked
+from app.config import settings
+from app.database import SessionLocal
+from app.models import TradeOffer, TradeOfferStatus
+
+logger = logging.getLogger(__name__)
+
+TRADE_GRAPH_EDGES = Gauge(
+    'trade_cycle_graph_edges',
+    'Pending trade offers held as edges in the trade cycle graph',
+    ['instance']
+)
+
+TRADE_CYCLES = Gauge(
+    'trade_cycles_active',
+    'Trade cycles currently available',
+    ['instance']
+)
+
+TRADE_CYCLE_SYNC_DURATION = Histogram(
+    'trade_cycle_sync_duration_seconds',
+    'Time spent applying trade offer changes to the trade cycle graph',
+    ['instance']
+)
+
+CycleKey = Tuple[int, ...]
+
+
+def cycle_id(key: CycleKey) -> str:
+    return "-".join(str(offer_id) for offer_id in key)
+
+
+def parse_cycle_id(value: str) -> Optional[CycleKey]:
+    try:
+        key = tuple(int(part) for part in value.split("-"))
+    except ValueError:
+        return None
+    if len(key) < 2 or len(set(key)) != len(key) or key != canonical_key(key):
+        return None
+    return key
+
+
+def canonical_key(offer_ids: Tuple[int, ...]) -> CycleKey:
+    start = offer_ids.index(min(offer_ids))
+    return tuple(offer_ids[start:] + offer_ids[:start])
+
+
+class TradeCycleEngine:
+    def __init__(self, max_length: int = 4, sync_overlap_seconds: int = 5):
+        self.max_length = max_length
+        self.sync_overlap = timedelta(seconds=sync_overlap_seconds)
+        self.watermark: Optional[datetime] = None
+        # newest (updated_at, id) applied; only rows past it are read in full on each sync
+        self.high_water: Optional[Tuple[datetime, int]] = None
+        # offer id -> updated_at applied, for rows still inside the overlap window
+        self._applied: Dict[int, datetime] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._offers: Dict[int, Tuple[int, int, int]] = {}
+        self._out: Dict[int, Dict[int, int]] = {}
+        self._in: Dict[int, Dict[int, int]] = {}
+        self._duplicates: Dict[Tuple[int, int], Set[int]] = {}
+        self._cycles: Dict[CycleKey, Tuple[Tuple[int, ...], Tuple[int, ...]]] = {}
+        self._offer_cycles: Dict[int, Set[CycleKey]] = {}
+        self._user_cycles: Dict[int, Set[CycleKey]] = {}
+
+    def sync(self, db: Session):
+        with self._lock:
+            started = time.perf_counter()
+            query_time = datetime.utcnow()
+            columns = (
+                TradeOffer.id, TradeOffer.offered_game_id, TradeOffer.requested_game_id,
+                TradeOffer.offerer_id, TradeOffer.status, TradeOffer.updated_at
+            )
+
+            if not self._loaded:
+                newest = db.execute(
+                    select(TradeOffer.updated_at, TradeOffer.id)
+                    .order_by(TradeOffer.updated_at.desc(), TradeOffer.id.desc())
+                    .limit(1)
+                ).first()
+                self.high_water = tuple(newest) if newest else None
+                self._apply(db.execute(select(*columns).where(TradeOffer.status == TradeOfferStatus.PENDING)))
+                self._loaded = True
+                logger.info(f"Trade cycle graph loaded: {len(self._offers)} offers, {len(self._cycles)} cycles")
+            else:
+                newer = select(*columns).order_by(TradeOffer.updated_at, TradeOffer.id)
+                if self.high_water:
+                    newer = newer.where(tuple_(TradeOffer.updated_at, TradeOffer.id) > tuple_(*self.high_water))
+                self._apply(db.execute(newer))
+                if self.high_water:
+                    self._apply_late(db, columns)
+
+            self.watermark = query_time - self.sync_overlap
+            self._applied = {
+                offer_id: updated_at for offer_id, updated_at in self._applied.items() if updated_at >= self.watermark
+            }
+            self._update_metrics()
+            TRADE_CYCLE_SYNC_DURATION.labels(instance=settings.instance_name).observe(time.perf_counter() - started)
+
+    def _apply_late(self, db: Session, columns):
+        # a transaction can commit after a later one, below the high-water mark; the overlap window is
+        # compared by count and id sum first, so a quiet window costs one index-only aggregate
+        in_window = (
+            TradeOffer.updated_at >= self.watermark,
+            tuple_(TradeOffer.updated_at, TradeOffer.id) <= tuple_(*self.high_water)
+        )
+        count, id_sum = db.execute(select(func.count(), func.coalesce(func.sum(TradeOffer.id), 0)).where(*in_window)).one()
+        applied = [
+            offer_id for offer_id, updated_at in self._applied.items()
+            if updated_at >= self.watermark and (updated_at, offer_id) <= self.high_water
+        ]
+        if count == len(applied) and id_sum == sum(applied):
+            return
+
+        late = [
+            offer_id
+            for offer_id, updated_at in db.execute(select(TradeOffer.id, TradeOffer.updated_at).where(*in_window))
+            if self._applied.get(offer_id) != updated_at
+        ]
+        for chunk in chunked(late):
+            self._apply(db.execute(select(*columns).where(TradeOffer.id.in_(chunk))))
+
+    def _apply(self, rows):
+        for offer_id, offered_game_id, requested_game_id, offerer_id, offer_status, updated_at in rows:
+            if offer_status == TradeOfferStatus.PENDING:
+                self._add_offer(offer_id, offered_game_id, requested_game_id, offerer_id)
+            else:
+                self._remove_offer(offer_id)
+            if self.watermark is None or updated_at >= self.watermark:
+                self._applied[offer_id] = updated_at
+            if self.high_water is None or (updated_at, offer_id) > self.high_water:
+                self.high_water = (updated_at, offer_id)
+
+    def warm(self):
+        # the first request would otherwise build the whole graph while holding the lock
+        def load():
+            try:
+                with SessionLocal() as db:
+                    self.sync(db)
+            except Exception as e:
+                logger.error(f"Trade cycle graph warm-up failed, the first request will load it: {e}")
+
+        threading.Thread(target=load, name="trade-cycle-warmup", daemon=True).start()
+
+    def discard(self, offer_ids: Iterable[int]):
+        with self._lock:
+            for offer_id in offer_ids:
+                self._remove_offer(offer_id)
+            self._update_metrics()
+
+    def get(self, key: CycleKey) -> Optional[Tuple[Tuple[int, ...], Tuple[int, ...]]]:
+        with self._lock:
+            return self._cycles.get(key)
+
+    def cycles(self, user_id: Optional[int] = None, skip: int = 0, limit: int = 100) -> List[Tuple[CycleKey, Tuple[int, ...], Tuple[int, ...]]]:
+        with self._lock:
+            if user_id is None:
+                keys = self._cycles.keys()
+            else:
+                keys = sorted(self._user_cycles.get(user_id, ()))
+            page = []
+            for index, key in enumerate(keys):
+                if index < skip:
+                    continue
+                if len(page) == limit:
+                    break
+                page.append((key, *self._cycles[key]))
+            return page
+
+    def _add_offer(self, offer_id: int, offered_game_id: int, requested_game_id: int, offerer_id: int):
+        if offer_id in self._offers or offered_game_id == requested_game_id:
+            return
+        self._offers[offer_id] = (offered_game_id, requested_game_id, offerer_id)
+
+        edges = self._out.setdefault(offered_game_id, {})
+        if requested_game_id in edges:
+            self._duplicates.setdefault((offered_game_id, requested_game_id), set()).add(offer_id)
+            return
+        self._link(offer_id, offered_game_id, requested_game_id)
+
+    def _remove_offer(self, offer_id: int):
+        offer = self._offers.pop(offer_id, None)
+        if offer is None:
+            return
+        offered_game_id, requested_game_id, _ = offer
+        pair = (offered_game_id, requested_game_id)
+
+        if self._out[offered_game_id].get(requested_game_id) != offer_id:
+            self._duplicates[pair].discard(offer_id)
+            if not self._duplicates[pair]:
+                del self._duplicates[pair]
+            return
+
+        self._unlink(offer_id, offered_game_id, requested_game_id)
+        if pair in self._duplicates:
+            replacement = self._duplicates[pair].pop()
+            if not self._duplicates[pair]:
+                del self._duplicates[pair]
+            self._link(replacement, offered_game_id, requested_game_id)
+
+    def _link(self, offer_id: int, offered_game_id: int, requested_game_id: int):
+        self._out.setdefault(offered_game_id, {})[requested_game_id] = offer_id
+        self._in.setdefault(requested_game_id, {})[offered_game_id] = offer_id
+        for path in self._paths(requested_game_id, offered_game_id):
+            self._record_cycle((offer_id,) + tuple(path))
+
+    def _unlink(self, offer_id: int, offered_game_id: int, requested_game_id: int):
+        edges = self._out[offered_game_id]
+        del edges[requested_game_id]
+        if not edges:
+            del self._out[offered_game_id]
+        edges = self._in[requested_game_id]
+        del edges[offered_game_id]
+        if not edges:
+            del self._in[requested_game_id]
+        for key in self._offer_cycles.pop(offer_id, ()):
+            self._drop_cycle(key, offer_id)
+
+    def _paths(self, start: int, target: int) -> List[List[int]]:
+        into_target = self._in.get(target)
+        if not into_target:
+            return []
+        paths: List[List[int]] = []
+        path: List[int] = []
+        visited = {start, target}
+
+        def visit(game_id: int, remaining: int):
+            edges = self._out.get(game_id)
+            if not edges:
+                return
+            closing = edges.get(target)
+            if closing is not None:
+                paths.append(path + [closing])
+            if remaining == 2:
+                # the last two hops meet in the middle: games this one reaches that also reach the target
+                for middle in edges.keys() & into_target.keys():
+                    if middle not in visited:
+                        paths.append(path + [edges[middle], into_target[middle]])
+            elif remaining > 2:
+                for next_game_id, next_offer_id in edges.items():
+                    if next_game_id in visited:
+                        continue
+                    visited.add(next_game_id)
+                    path.append(next_offer_id)
+                    visit(next_game_id, remaining - 1)
+                    path.pop()
+                    visited.remove(next_game_id)
+
+        visit(start, self.max_length - 1)
+        return paths
+
+    def _record_cycle(self, offer_ids: Tuple[int, ...]):
+        key = canonical_key(offer_ids)
+        if key in self._cycles:
+            return
+        game_ids = tuple(self._offers[offer_id][0] for offer_id in key)
+        user_ids = tuple(self._offers[offer_id][2] for offer_id in key)
+        self._cycles[key] = (game_ids, user_ids)
+        for offer_id in key:
+            self._offer_cycles.setdefault(offer_id, set()).add(key)
+        for user_id in set(user_ids):
+            self._user_cycles.setdefault(user_id, set()).add(key)
+
+    def _drop_cycle(self, key: CycleKey, removed_offer_id: int):
+        _, user_ids = self._cycles.pop(key)
+        for offer_id in key:
+            if offer_id == removed_offer_id:
+                continue
+            cycles = self._offer_cycles[offer_id]
+            cycles.discard(key)
+            if not cycles:
+                del self._offer_cycles[offer_id]
+        for user_id in set(user_ids):
+            cycles = self._user_cycles[user_id]
+            cycles.discard(key)
+            if not cycles:
+                del self._user_cycles[user_id]
+
+    def _update_metrics(self):
+        TRADE_GRAPH_EDGES.labels(instance=settings.instance_name).set(len(self._offers))
+        TRADE_CYCLES.labels(instance=settings.instance_name).set(len(self._cycles))
+
+
+trade_matcher = TradeCycleEngine(settings.trade_cycle_max_length, settings.trade_cycle_sync_overlap_seconds)
@@ -0,0 +1,127 @@
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import case, func, or_, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import UnaryExpression
+from app.cache import game_cache, trade_offer_cache
+from app.models import TradeOffer, TradeOfferStatus, User, VideoGame
+from app.services.cache_invalidation import invalidate
+from app.services.trade_matching import trade_matcher
+
+UNSYNCHRONIZED = {"synchronize_session": False}
+
+
+def _unindexed(db: Session, column):
+    # SQLite's "+column" keeps the planner off the status index so the game id IN lists drive a multi-index OR
+    if db.get_bind().dialect.name != "sqlite":
+        return column
+    return UnaryExpression(column.expression, operator=operators.custom_op("+"), type_=column.type)
+
+
+def _conflict(db: Session, detail: str):
+    db.rollback()
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=detail
+    )
+
+
+def close_offer(db: Session, offer: TradeOffer, new_status: TradeOfferStatus, action: str):
+    # the status check and the write are one statement, so a concurrent accept or reject cannot both win
+    closed = db.execute(
+        update(TradeOffer)
+        .where(TradeOffer.id == offer.id, TradeOffer.status == TradeOfferStatus.PENDING)
+        .values(status=new_status, updated_at=datetime.utcnow()),
+        execution_options=UNSYNCHRONIZED
+    )
+    if closed.rowcount != 1:
+        _conflict(db, f"Cannot {action} trade offer: it is no longer pending")
+
+
+def settle_trade(
+    db: Session,
+    offers: Sequence[TradeOffer],
+    transfers: Dict[int, Tuple[int, int]],
+    before_commit: Callable[[List[Any]], None]
+) -> List[Any]:
+    now = datetime.utcnow()
+    offer_ids = [offer.id for offer in offers]
+
+    accepted = db.execute(
+        update(TradeOffer)
+        .where(TradeOffer.id.in_(offer_ids), TradeOffer.status == TradeOfferStatus.PENDING)
+        .values(status=TradeOfferStatus.ACCEPTED, updated_at=now),
+        execution_options=UNSYNCHRONIZED
+    )
+    if accepted.rowcount != len(offer_ids):
+        _conflict(db, "Trade offer is no longer pending")
+
+    game_ids = list(transfers)
+    swapped = db.execute(
+        update(VideoGame)
+        .where(
+            VideoGame.id.in_(game_ids),
+            VideoGame.owner_id == case({game_id: from_owner for game_id, (from_owner, _) in transfers.items()}, value=VideoGame.id)
+        )
+        .values(
+            owner_id=case({game_id: to_owner for game_id, (_, to_owner) in transfers.items()}, value=VideoGame.id),
+            previous_owners=func.coalesce(VideoGame.previous_owners, 0) + 1
+        ),
+        execution_options=UNSYNCHRONIZED
+    )
+    if swapped.rowcount != len(game_ids):
+        _conflict(db, "Traded games have changed owner")
+
+    cancelled = db.execute(
+        update(TradeOffer)
+        .where(
+            _unindexed(db, TradeOffer.status) == TradeOfferStatus.PENDING,
+            or_(TradeOffer.offered_game_id.in_(game_ids), TradeOffer.requested_game_id.in_(game_ids))
+        )
+        .values(status=TradeOfferStatus.CANCELLED, updated_at=now)
+        .returning(
+            TradeOffer.id, TradeOffer.offered_game_id, TradeOffer.requested_game_id,
+            TradeOffer.offerer_id, TradeOffer.receiver_id
+        ),
+        execution_options=UNSYNCHRONIZED
+    ).all()
+
+    before_commit(cancelled)
+    db.commit()
+    settled_offer_ids = offer_ids + [offer.id for offer in cancelled]
+    invalidate(trade_offer_cache, settled_offer_ids)
+    invalidate(game_cache, game_ids)
+    trade_matcher.discard(settled_offer_ids)
+
+    return cancelled
+
+
+def offer_notifications(db: Session, offers: Iterable[Any]) -> List[Dict[str, Any]]:
+    offers = list(offers)
+    if not offers:
+        return []
+
+    users = {
+        user.id: user
+        for user in db.query(User).filter(User.id.in_({offer.offerer_id for offer in offers} | {offer.receiver_id for offer in offers}))
+    }
+    games = {
+        game.id: game.name
+        for game in db.query(VideoGame).filter(
+            VideoGame.id.in_({offer.offered_game_id for offer in offers} | {offer.requested_game_id for offer in offers})
+        )
+    }
+
+    return [
+        {
+            "offerer_email": users[offer.offerer_id].email,
+            "offerer_name": users[offer.offerer_id].name,
+            "receiver_email": users[offer.receiver_id].email,
+            "receiver_name": users[offer.receiver_id].name,
+            "offered_game": games[offer.offered_game_id],
+            "requested_game": games[offer.requested_game_id]
+        }
+        for offer in offers
+    ]
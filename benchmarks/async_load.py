@@ -0,0 +1,111 @@
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(async_db, database_url, port):
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_url,
+        ASYNC_DB="true" if async_db else "false",
+        KAFKA_BOOTSTRAP_SERVERS=os.getenv("KAFKA_BOOTSTRAP_SERVERS", "127.0.0.1:1"),
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/").status_code == 200:
+                return process
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("API did not start")
+
+
+def _seed(base_url, games):
+    with httpx.Client(base_url=base_url) as client:
+        owner = client.post("/users", json={
+            "name": "Bench", "email": "bench@example.com",
+            "password": "benchmark1", "street_address": "1 Bench St"
+        }).json()
+        for i in range(games):
+            client.post(f"/games?owner_id={owner['id']}", json={
+                "name": f"Game {i}", "publisher": "Bench", "year_published": 2000,
+                "gaming_system": "PC", "condition": "good"
+            })
+
+
+async def _load(base_url, clients, duration, path):
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0.0
+    return len(latencies) / elapsed, p99, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync vs async database path under concurrent load")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--path", default="/games?limit=20")
+    args = parser.parse_args()
+
+    for async_db in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            port = _free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            server = _start_server(async_db, f"sqlite:///{os.path.join(tmp, 'bench.db')}", port)
+            try:
+                _seed(base_url, args.games)
+                rps, p99, errors = asyncio.run(_load(base_url, args.clients, args.duration, args.path))
+            finally:
+                server.terminate()
+                try:
+                    server.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    server.kill()
+        mode = "async" if async_db else "sync"
+        print(f"{mode:>5}: {rps:8.1f} req/s  p99={p99 * 1000:8.1f} ms  errors={errors}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import games one POST at a time vs through POST /games/bulk")
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--single", type=int, default=500, help="games to import through POST /games")
+    parser.add_argument("--batch", type=int, default=10000)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ.setdefault("KAFKA_BOOTSTRAP_SERVERS", "127.0.0.1:1")
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    logging.disable(logging.WARNING)
+    with TestClient(app) as client:
+        owner = client.post("/users", json={
+            "name": "Importer", "email": "importer@example.com",
+            "password": "password123", "street_address": "1 Import Way"
+        }).json()
+
+        def game(i):
+            return {
+                "owner_id": owner["id"], "name": f"Game {i}", "publisher": "Bench",
+                "year_published": 2000, "gaming_system": "PC", "condition": "good"
+            }
+
+        started = time.perf_counter()
+        for i in range(args.single):
+            client.post(f"/games?owner_id={owner['id']}", json=game(i))
+        single_rate = args.single / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for start in range(0, args.games, args.batch):
+            response = client.post("/games/bulk", json=[game(i) for i in range(start, min(args.games, start + args.batch))])
+            assert response.json()["failed"] == 0
+        bulk_elapsed = time.perf_counter() - started
+
+        print(f"single: {single_rate:10.1f} games/s  (100k games would take {100000 / single_rate:8.1f}s)")
+        print(f"  bulk: {args.games / bulk_elapsed:10.1f} games/s  ({args.games} games in {bulk_elapsed:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+
+def _poll(client, path, requests, etag=None):
+    headers = {"If-None-Match": etag} if etag else {}
+    sent = 0
+    started_cpu = time.process_time()
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(path, headers=headers)
+        sent += len(response.content) + sum(len(k) + len(v) + 4 for k, v in response.headers.items())
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - started_cpu
+    return response.status_code, sent / requests, cpu / requests * 1e6, elapsed / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bandwidth and CPU per poll for full GETs vs If-None-Match revalidation")
+    parser.add_argument("--offers", type=int, default=100, help="pending offers received by the polling user")
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ.setdefault("KAFKA_BOOTSTRAP_SERVERS", "127.0.0.1:1")
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    logging.disable(logging.WARNING)
+    with TestClient(app) as client:
+
+        def user(i):
+            return client.post("/users", json={
+                "name": f"Poller {i}", "email": f"poller{i}@example.com",
+                "password": "password123", "street_address": f"{i} Poll Street"
+            }).json()
+
+        def game(owner, i):
+            return {
+                "owner_id": owner["id"], "name": f"Game {i}", "publisher": "Bench",
+                "year_published": 2000, "gaming_system": "PC", "condition": "good"
+            }
+
+        receiver, offerer = user(0), user(1)
+        client.post("/games/bulk", json=[game(receiver, i) for i in range(args.offers)])
+        client.post("/games/bulk", json=[game(offerer, i) for i in range(args.offers)])
+        received = client.get(f"/users/{receiver['id']}/games?limit={args.offers}").json()["items"]
+        offered = client.get(f"/users/{offerer['id']}/games?limit={args.offers}").json()["items"]
+        for mine, theirs in zip(offered, received):
+            client.post("/trade-offers", json={
+                "offered_game_id": mine["id"], "requested_game_id": theirs["id"]
+            })
+
+        paths = [f"/games/{received[0]['id']}", f"/trade-offers/user/{receiver['id']}/received?limit={args.offers}"]
+        print(f"{'endpoint':<52} {'status':>6} {'bytes/poll':>11} {'cpu us/poll':>12} {'wall us/poll':>13}")
+        for path in paths:
+            etag = client.get(path).headers["etag"]
+            for label, tag in (("full", None), ("revalidate", etag)):
+                code, sent, cpu, wall = _poll(client, path, args.requests, tag)
+                print(f"{path + ' ' + label:<52} {code:>6} {sent:>11.0f} {cpu:>12.1f} {wall:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
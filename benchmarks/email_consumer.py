@@ -0,0 +1,118 @@
+import argparse
+import logging
+import os
+import socketserver
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from events import encode
+
+Record = namedtuple("Record", "topic partition offset key value headers")
+
+
+class SMTPStandIn(socketserver.StreamRequestHandler):
+    # just enough SMTP for smtplib: EHLO, AUTH, MAIL/RCPT, DATA with a configurable delay, QUIT
+    def handle(self):
+        with self.server.lock:
+            self.server.connections += 1
+        # stands in for the TCP and TLS round trips of a remote server
+        time.sleep(self.server.handshake_latency)
+        self.reply("220 stand-in ESMTP")
+        accepted = 0
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command == b"EHLO":
+                self.reply("250-stand-in", "250 AUTH PLAIN LOGIN")
+            elif command == b"AUTH":
+                time.sleep(self.server.handshake_latency)
+                self.reply("235 2.7.0 Authentication successful")
+            elif command == b"DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                time.sleep(self.server.latency)
+                with self.server.lock:
+                    self.server.delivered += 1
+                self.reply("250 2.0.0 Queued")
+                accepted += 1
+                if accepted == self.server.max_messages:
+                    # like a server recycling sessions: the client only notices on its next command
+                    return
+            elif command == b"QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
+
+    def reply(self, *lines):
+        self.wfile.write("".join(f"{line}\r\n" for line in lines).encode("ascii"))
+
+
+class SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, latency, handshake_latency=0.0, max_messages=0):
+        super().__init__(("127.0.0.1", 0), SMTPStandIn)
+        self.latency = latency
+        self.handshake_latency = handshake_latency
+        self.max_messages = max_messages
+        self.delivered = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+
+
+def _records(messages):
+    records = []
+    for i in range(messages):
+        value, headers = encode({"event_type": "trade_offer_created", "data": {
+            "offerer_email": f"trader{i}@example.com", "offerer_name": f"Trader {i}",
+            "receiver_email": "collector@example.com", "receiver_name": "Collector",
+            "offered_game": f"Game {i}", "requested_game": "Zelda",
+        }})
+        records.append(Record("email-notifications", 0, i, f"trade_offer:{i}".encode(), value, headers))
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Email consumer throughput by sender pool size against a local SMTP stand-in")
+    parser.add_argument("--messages", type=int, default=200, help="trade_offer_created events, two emails each")
+    parser.add_argument("--batch", type=int, default=100, help="records per poll")
+    parser.add_argument("--smtp-latency-ms", type=float, default=20, help="delay before the stand-in accepts a message")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    server = SMTPServer(args.smtp_latency_ms / 1000)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ.update(
+        SMTP_HOST="127.0.0.1", SMTP_PORT=str(server.server_address[1]),
+        SMTP_USERNAME="bench", SMTP_PASSWORD="bench", SMTP_STARTTLS="false", DIGEST_ENABLED="false",
+    )
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "email_service"))
+    from consumer import BatchProcessor, EmailService
+
+    logging.disable(logging.WARNING)
+    records = _records(args.messages)
+    print(f"{args.messages} events ({2 * args.messages} emails), batches of {args.batch}, SMTP latency {args.smtp_latency_ms:g} ms")
+    baseline = None
+    for workers in args.workers:
+        processor = BatchProcessor(EmailService(), workers)
+        delivered = server.delivered
+        started = time.perf_counter()
+        for start in range(0, len(records), args.batch):
+            processor.process(records[start:start + args.batch])
+        elapsed = time.perf_counter() - started
+        processor.close()
+        rate = (server.delivered - delivered) / elapsed
+        baseline = baseline or rate
+        print(f"  {workers:>3} senders  {rate:8.1f} emails/s  ({rate / baseline:4.1f}x)")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
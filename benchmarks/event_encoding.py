@@ -0,0 +1,70 @@
+import argparse
+import gzip
+import time
+
+from events import decode, encode
+
+
+def _offer(i):
+    return {
+        "offerer_email": f"trader{i}@example.com", "offerer_name": f"Trader {i}",
+        "receiver_email": "collector@example.com", "receiver_name": "Collector",
+        "offered_game": f"Game {i}", "requested_game": "The Legend of Zelda: Breath of the Wild",
+    }
+
+
+def _messages(cancelled, cycle_length):
+    return [
+        {"event_type": "password_changed", "data": {"user_email": "collector@example.com", "user_name": "Collector"}},
+        {"event_type": "trade_offer_created", "data": _offer(1)},
+        {"event_type": "trade_offer_rejected", "data": _offer(2)},
+        {"event_type": "trade_offer_accepted", "data": {
+            **_offer(3), "cancelled_offers": [_offer(10 + i) for i in range(cancelled)]
+        }},
+        {"event_type": "trade_cycle_accepted", "data": {
+            "accepted_offers": [_offer(20 + i) for i in range(cycle_length)],
+            "cancelled_offers": [_offer(30 + i) for i in range(cancelled)],
+        }},
+    ]
+
+
+def _rate(operation, items, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            operation(item)
+    return repeat * len(items) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Notification event size and codec throughput: JSON vs binary")
+    parser.add_argument("--cancelled", type=int, default=5, help="competing offers cancelled by each accept")
+    parser.add_argument("--cycle-length", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=100, help="messages per gzip-compressed producer batch")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    messages = _messages(args.cancelled, args.cycle_length)
+    print(f"{'event':<24} {'json bytes':>11} {'binary bytes':>13} {'ratio':>6}")
+    for message in messages:
+        json_size = len(encode(message, "json")[0])
+        binary_size = len(encode(message, "binary")[0])
+        print(f"{message['event_type']:<24} {json_size:>11} {binary_size:>13} {json_size / binary_size:>5.1f}x")
+
+    # the producer compresses whole batches, so compare what actually goes over the wire
+    batch = [messages[i % len(messages)] for i in range(args.batch)]
+    print(f"\nbatch of {args.batch} messages, gzip as KAFKA_COMPRESSION_TYPE=gzip")
+    for encoding in ("json", "binary"):
+        raw = b"".join(encode(message, encoding)[0] for message in batch)
+        print(f"  {encoding:<8} {len(raw):>9} bytes raw {len(gzip.compress(raw)):>8} bytes gzip")
+
+    print(f"\nthroughput over the mix, {args.repeat * len(messages)} messages")
+    for encoding in ("json", "binary"):
+        encoded = [encode(message, encoding) for message in messages]
+        encode_rate = _rate(lambda message: encode(message, encoding), messages, args.repeat)
+        decode_rate = _rate(lambda item: decode(*item), encoded, args.repeat)
+        print(f"  {encoding:<8} encode {encode_rate:>10.0f} msg/s   decode {decode_rate:>10.0f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+NAMES = ["Legend", "Zelda", "Mario", "Kart", "Halo", "Metroid", "Pokemon", "Street", "Fighter", "Sonic", "Final", "Fantasy"]
+PUBLISHERS = ["Nintendo", "Sega", "Capcom", "Square Enix", "Bungie"]
+SYSTEMS = ["SNES", "N64", "PS1", "Xbox", "PC"]
+
+
+def _seed(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO users (id, name, email, hashed_password, street_address, updated_at) VALUES (1, 'Bench', 'bench@example.com', 'x', 'x', datetime('now'))")
+    batch = 50000
+    for start in range(0, rows, batch):
+        conn.executemany(
+            "INSERT INTO video_games (name, publisher, year_published, gaming_system, condition, owner_id, updated_at) "
+            "VALUES (?, ?, 2000, ?, 'GOOD', 1, datetime('now'))",
+            (
+                (f"{NAMES[i % 12]} {NAMES[(i * 7) % 12]} {i}", PUBLISHERS[i % 5], SYSTEMS[(i * 3) % 5])
+                for i in range(start, min(rows, start + batch))
+            )
+        )
+    conn.commit()
+    conn.close()
+
+
+def _time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LIKE scan vs FTS5 match latency for game search")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("terms", nargs="*", default=["zelda", "mar", "street fighter", "capcom ps1"])
+    args = parser.parse_args()
+
+    from app.database import create_db_engine
+    from app.migrations import run_migrations
+    from app.models import VideoGame
+    from app.search import video_games_fts, to_match_query
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        engine = create_db_engine(f"sqlite:///{path}")
+        run_migrations(engine)
+        started = time.perf_counter()
+        _seed(path, args.rows)
+        print(f"seeded {args.rows} games (with FTS triggers) in {time.perf_counter() - started:.1f}s")
+        db = sessionmaker(bind=engine)()
+
+        def like(term):
+            pattern = f"%{term}%"
+            statement = (
+                select(VideoGame)
+                .where(VideoGame.name.ilike(pattern) | VideoGame.publisher.ilike(pattern) | VideoGame.gaming_system.ilike(pattern))
+                .order_by(VideoGame.id)
+                .limit(args.limit)
+            )
+            return db.scalars(statement).all()
+
+        def match(term):
+            statement = (
+                select(VideoGame)
+                .join(video_games_fts, video_games_fts.c.rowid == VideoGame.id)
+                .where(video_games_fts.c.video_games_fts.op("MATCH")(to_match_query(term)))
+                .order_by(video_games_fts.c.rank, VideoGame.id)
+                .limit(args.limit)
+            )
+            return db.scalars(statement).all()
+
+        print(f"{'term':>20} {'like ms':>10} {'fts ms':>10}")
+        for term in args.terms:
+            like_time = _time(lambda: like(term), args.repeat)
+            match_time = _time(lambda: match(term), args.repeat)
+            print(f"{term:>20} {like_time * 1000:>10.2f} {match_time * 1000:>10.2f}")
+
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
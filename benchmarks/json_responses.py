@@ -0,0 +1,87 @@
+import argparse
+import asyncio
+import gc
+import logging
+import os
+import tempfile
+import time
+
+
+def _time(fn, repeat):
+    best = float("inf")
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - started)
+    finally:
+        gc.enable()
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialization cost of GET /games?limit=1000")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ.setdefault("KAFKA_BOOTSTRAP_SERVERS", "127.0.0.1:1")
+
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import APIRoute, serialize_response
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.database import SessionLocal
+    from app.models import VideoGame
+    from app.responses import model_response, validate_list
+    from app.schemas import VideoGameResponse, VideoGameCollection
+
+    logging.disable(logging.WARNING)
+    with TestClient(app) as client:
+        owner = client.post("/users", json={
+            "name": "Bench", "email": "bench@example.com", "password": "password123", "street_address": "1 Bench Way"
+        }).json()
+        client.post("/games/bulk", json=[
+            {
+                "owner_id": owner["id"], "name": f"Game {i}", "publisher": "Bench",
+                "year_published": 2000, "gaming_system": "PC", "condition": "good"
+            }
+            for i in range(args.games)
+        ])
+
+        route = next(r for r in app.routes if isinstance(r, APIRoute) and r.path == "/games" and "GET" in r.methods)
+        with SessionLocal() as db:
+            games = db.query(VideoGame).order_by(VideoGame.id).limit(args.games).all()
+
+        # both paths start from ORM rows and end with response bytes; links are left out so only
+        # validation and serialization are compared
+        def response_model_path():
+            items = [VideoGameResponse.model_validate(game) for game in games]
+            content = asyncio.run(serialize_response(field=route.response_field, response_content=VideoGameCollection(items=items)))
+            return JSONResponse(content).body
+
+        def validated_path():
+            return model_response(VideoGameCollection(items=validate_list(VideoGameResponse, games))).body
+
+        assert response_model_path() == validated_path()
+
+        legacy = _time(response_model_path, args.repeat)
+        fast = _time(validated_path, args.repeat)
+        print(f"{args.games} games, validation + serialization only")
+        print(f"  response_model + JSONResponse:   {legacy * 1e3:8.2f} ms")
+        print(f"  TypeAdapter + ModelResponse:     {fast * 1e3:8.2f} ms  ({legacy / fast:.1f}x)")
+
+        print(f"GET /games end to end (TestClient, {args.repeat} requests, best)")
+        for query in (f"/games?limit={args.games}&facets=true", f"/games?limit={args.games}&links=none"):
+            client.get(query)
+            elapsed = _time(lambda: client.get(query), args.repeat)
+            size = len(client.get(query).content)
+            print(f"  {query:<45} {elapsed * 1e3:8.2f} ms  {size:8d} bytes")
+
+
+if __name__ == "__main__":
+    main()
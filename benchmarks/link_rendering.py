@@ -0,0 +1,95 @@
+import argparse
+import gc
+import time
+from datetime import datetime
+
+from starlette.requests import Request
+
+from app.hateoas import LinkMode, add_trade_offer_links, add_collection_links
+from app.schemas import TradeOfferResponse, TradeOfferCollection
+
+
+def _request(mode):
+    request = Request({
+        "type": "http", "scheme": "http", "server": ("api.example.com", 80), "root_path": "",
+        "path": "/trade-offers", "query_string": b"", "headers": [(b"host", b"api.example.com")],
+    })
+    request.state.link_mode = mode
+    return request
+
+
+def create_link(request, rel, href, method="GET"):
+    # the original per-link helper: rebuilds the base URL for every link
+    base_url = str(request.base_url).rstrip('/')
+    return {"rel": rel, "href": f"{base_url}{href}", "method": method}
+
+
+def _per_link_trade_offer_links(request, trade_offer_id, offerer_id, receiver_id):
+    return {
+        "self": create_link(request, "self", f"/trade-offers/{trade_offer_id}", "GET"),
+        "all_trade_offers": create_link(request, "collection", "/trade-offers", "GET"),
+        "offerer": create_link(request, "offerer", f"/users/{offerer_id}", "GET"),
+        "receiver": create_link(request, "receiver", f"/users/{receiver_id}", "GET"),
+        "accept": create_link(request, "accept", f"/trade-offers/{trade_offer_id}/accept", "PUT"),
+        "reject": create_link(request, "reject", f"/trade-offers/{trade_offer_id}/reject", "PUT"),
+        "cancel": create_link(request, "cancel", f"/trade-offers/{trade_offer_id}/cancel", "PUT"),
+    }
+
+
+def _render(request, offers, link_builder):
+    items = []
+    for offer in offers:
+        response = TradeOfferResponse.model_validate(offer)
+        response.links = link_builder(request, offer["id"], offer["offerer_id"], offer["receiver_id"])
+        items.append(response)
+    collection = TradeOfferCollection(items=items)
+    collection.links = add_collection_links(request, "/trade-offers", 0, len(offers), len(offers), "Y3Vyc29y")
+    return collection.model_dump_json()
+
+
+def _time(fn, repeat):
+    best = float("inf")
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - started)
+    finally:
+        gc.enable()
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render time of a trade offer page per link mode")
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    now = datetime.utcnow()
+    offers = [
+        {
+            "id": i, "offered_game_id": 2 * i, "requested_game_id": 2 * i + 1, "offerer_id": i % 50 + 1,
+            "receiver_id": i % 70 + 1, "status": "pending", "created_at": now, "updated_at": now,
+        }
+        for i in range(1, args.items + 1)
+    ]
+
+    cases = [("per-link create_link", LinkMode.FULL, _per_link_trade_offer_links)]
+    cases += [(f"templates, links={mode.value}", mode, add_trade_offer_links) for mode in LinkMode]
+    baseline = None
+    for label, mode, builder in cases:
+        request = _request(mode)
+        links = _time(lambda: [builder(request, o["id"], o["offerer_id"], o["receiver_id"]) for o in offers], args.repeat)
+        page = _time(lambda: _render(request, offers, builder), args.repeat)
+        size = len(_render(request, offers, builder))
+        baseline = baseline or page
+        print(
+            f"{label:<28} links {links * 1e3:7.3f} ms  page {page * 1e3:7.3f} ms "
+            f"({page / baseline:5.0%})  {size:7d} bytes"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+
+def _seed(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO users (id, name, email, hashed_password, street_address, updated_at) VALUES (1, 'Bench', 'bench@example.com', 'x', 'x', datetime('now'))")
+    batch = 50000
+    for start in range(0, rows, batch):
+        conn.executemany(
+            "INSERT INTO video_games (name, publisher, year_published, gaming_system, condition, owner_id, updated_at) "
+            "VALUES (?, 'Bench', 2000, 'PC', 'GOOD', 1, datetime('now'))",
+            ((f"Game {i}",) for i in range(start, min(rows, start + batch)))
+        )
+    conn.commit()
+    conn.close()
+
+
+def _time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Page-N latency for offset vs cursor pagination on /games")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    from app.database import Base, create_db_engine
+    from app.models import VideoGame
+    from app.pagination import paginate, encode_cursor
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        engine = create_db_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=engine)
+        _seed(path, args.rows)
+        db = sessionmaker(bind=engine)()
+        order = (VideoGame.id,)
+
+        print(f"{'page':>8} {'offset ms':>10} {'cursor ms':>10}")
+        page = 1
+        while page * args.limit < args.rows:
+            skip = page * args.limit
+            last_id = db.query(VideoGame.id).order_by(VideoGame.id).offset(skip - 1).limit(1).scalar()
+            cursor = encode_cursor(last_id)
+
+            offset_time = _time(lambda: paginate(db.query(VideoGame), order, None, skip, args.limit).all(), args.repeat)
+            cursor_time = _time(lambda: paginate(db.query(VideoGame), order, cursor, 0, args.limit).all(), args.repeat)
+            print(f"{page:>8} {offset_time * 1000:>10.2f} {cursor_time * 1000:>10.2f}")
+            page *= 10
+
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
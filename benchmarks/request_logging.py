@@ -0,0 +1,87 @@
+import argparse
+import logging
+import queue
+import tempfile
+import time
+from logging.handlers import QueueListener
+
+from prometheus_client import REGISTRY
+
+from app.config import settings
+from app.logging_config import DroppingQueueHandler, JSONFormatter, TextFormatter
+
+
+class SlowSink:
+    # stands in for a congested stdout pipe: every write blocks briefly
+    def __init__(self, delay):
+        self.delay = delay
+
+    def write(self, text):
+        time.sleep(self.delay)
+
+    def flush(self):
+        pass
+
+
+def _dropped():
+    return REGISTRY.get_sample_value("log_records_dropped_total", {"instance": settings.instance_name}) or 0
+
+
+def _fields(i):
+    return {"fields": {
+        "instance": "bench", "method": "GET", "path": f"/games/{i}", "endpoint": "/games/{game_id}",
+        "status": 200, "duration_ms": 1.23, "db_queries": 1, "db_ms": 0.21,
+    }}
+
+
+def _run(logger, requests, per_request):
+    started = time.perf_counter()
+    for i in range(requests):
+        for _ in range(per_request):
+            logger.info("request", extra=_fields(i))
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Caller-side cost of request logging: stream handler vs queue")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--sink-delay-us", type=float, default=50, help="per-write delay of the slow sink")
+    args = parser.parse_args()
+
+    cases = [
+        ("StreamHandler, 2 text lines", TextFormatter(), None, 2),
+        ("StreamHandler, 1 JSON line", JSONFormatter(), None, 1),
+        ("QueueHandler, 1 JSON line", JSONFormatter(), 2 * args.requests, 1),
+        ("QueueHandler, queue of 1000", JSONFormatter(), 1000, 1),
+    ]
+    print(f"{args.requests} requests, time spent logging on the request thread")
+    with tempfile.TemporaryFile("w") as output:
+        for sink_label, sink in (("file", output), (f"slow pipe ({args.sink_delay_us:g} us/write)", SlowSink(args.sink_delay_us / 1e6))):
+            print(f"  sink: {sink_label}")
+            for label, formatter, queue_size, per_request in cases:
+                logger = logging.getLogger(f"bench.{sink_label}.{label}")
+                logger.propagate = False
+                logger.setLevel(logging.INFO)
+                stream = logging.StreamHandler(sink)
+                stream.setFormatter(formatter)
+                listener = None
+                if queue_size is None:
+                    logger.addHandler(stream)
+                else:
+                    records = queue.Queue(maxsize=queue_size)
+                    logger.addHandler(DroppingQueueHandler(records))
+                    listener = QueueListener(records, stream)
+                    listener.start()
+                dropped = _dropped()
+                elapsed = _run(logger, args.requests, per_request)
+                if listener is not None:
+                    records.join()
+                    listener.stop()
+                print(
+                    f"    {label:<30} {elapsed / args.requests * 1e6:8.2f} us/request"
+                    f"  dropped {_dropped() - dropped:.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+
+from prometheus_client import REGISTRY
+
+from benchmarks.email_consumer import SMTPServer, _records
+
+
+def _counter(name):
+    return REGISTRY.get_sample_value(name) or 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-email SMTP connections vs the pooled connections, against a local stand-in")
+    parser.add_argument("--messages", type=int, default=200, help="trade_offer_created events, two emails each")
+    parser.add_argument("--batch", type=int, default=100, help="records per poll")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--smtp-latency-ms", type=float, default=5, help="delay before the stand-in accepts a message")
+    parser.add_argument("--handshake-latency-ms", type=float, default=10, help="delay on connect and on AUTH, standing in for TCP/TLS round trips")
+    parser.add_argument("--server-max-messages", type=int, default=30, help="the last case's server drops a session after this many messages")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "email_service"))
+    from consumer import BatchProcessor, EmailService
+
+    logging.disable(logging.WARNING)
+    records = _records(args.messages)
+    cases = [
+        ("new connection per email", 1, 0),
+        ("pooled, 100 per connection", 100, 0),
+        (f"pooled, server drops at {args.server_max_messages}", 100, args.server_max_messages),
+    ]
+    print(
+        f"{2 * args.messages} emails, {args.workers} senders, SMTP latency {args.smtp_latency_ms:g} ms, "
+        f"handshake latency {args.handshake_latency_ms:g} ms x2"
+    )
+    print(f"{'case':<32} {'emails/s':>9} {'handshakes':>11} {'reconnects':>11} {'sent':>6}")
+    for label, max_messages, server_max_messages in cases:
+        server = SMTPServer(args.smtp_latency_ms / 1000, args.handshake_latency_ms / 1000, server_max_messages)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        os.environ.update(
+            SMTP_HOST="127.0.0.1", SMTP_PORT=str(server.server_address[1]),
+            SMTP_USERNAME="bench", SMTP_PASSWORD="bench", SMTP_STARTTLS="false", DIGEST_ENABLED="false",
+            SMTP_MAX_MESSAGES_PER_CONNECTION=str(max_messages),
+        )
+        handshakes = _counter("smtp_handshakes_total")
+        reconnects = _counter("smtp_reconnects_total")
+        sent = _counter("smtp_messages_sent_total")
+
+        processor = BatchProcessor(EmailService(), args.workers)
+        started = time.perf_counter()
+        for start in range(0, len(records), args.batch):
+            processor.process(records[start:start + args.batch])
+        elapsed = time.perf_counter() - started
+        processor.close()
+        server.shutdown()
+        server.server_close()
+
+        print(
+            f"{label:<32} {server.delivered / elapsed:>9.1f} {_counter('smtp_handshakes_total') - handshakes:>11.0f}"
+            f" {_counter('smtp_reconnects_total') - reconnects:>11.0f} {_counter('smtp_messages_sent_total') - sent:>6.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+
+
+def _legacy_engine(database_url):
+    return create_engine(database_url, connect_args={"check_same_thread": False})
+
+
+def _tuned_engine(database_url):
+    from app.database import create_db_engine
+    return create_db_engine(database_url)
+
+
+def _writer(profile, database_url, writes, start_barrier, results):
+    engine = _tuned_engine(database_url) if profile == "tuned" else _legacy_engine(database_url)
+    errors = 0
+    start_barrier.wait()
+    started = time.perf_counter()
+    for i in range(writes):
+        try:
+            with engine.begin() as conn:
+                conn.execute(
+                    text("INSERT INTO bench_writes (writer, payload) VALUES (:writer, :payload)"),
+                    {"writer": os.getpid(), "payload": f"row-{i}"}
+                )
+                conn.execute(text("SELECT COUNT(*) FROM bench_writes WHERE writer = :writer"), {"writer": os.getpid()})
+        except Exception:
+            errors += 1
+    results.put((time.perf_counter() - started, writes - errors, errors))
+    engine.dispose()
+
+
+def run_profile(profile, processes, writes):
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        setup = _legacy_engine(database_url)
+        with setup.begin() as conn:
+            conn.execute(text("CREATE TABLE bench_writes (id INTEGER PRIMARY KEY, writer INTEGER, payload TEXT)"))
+        setup.dispose()
+
+        barrier = multiprocessing.Barrier(processes)
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=_writer, args=(profile, database_url, writes, barrier, results))
+            for _ in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        outcomes = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+
+    elapsed = max(o[0] for o in outcomes)
+    committed = sum(o[1] for o in outcomes)
+    errors = sum(o[2] for o in outcomes)
+    return committed / elapsed, committed, errors, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent SQLite write throughput, legacy vs tuned engine profile")
+    parser.add_argument("--processes", type=int, default=2)
+    parser.add_argument("--writes", type=int, default=2000)
+    args = parser.parse_args()
+
+    for profile in ("legacy", "tuned"):
+        rate, committed, errors, elapsed = run_profile(profile, args.processes, args.writes)
+        print(f"{profile:>6}: {rate:10.1f} writes/s  committed={committed}  errors={errors}  elapsed={elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
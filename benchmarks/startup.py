@@ -0,0 +1,96 @@
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+PHASES = """
+import os, sys, time
+started = time.perf_counter()
+from fastapi.testclient import TestClient
+from app.main import app
+imported = time.perf_counter()
+with TestClient(app) as client:
+    ready = time.perf_counter()
+    client.get("/")
+    answered = time.perf_counter()
+    print(imported - started, ready - imported, answered - ready)
+    sys.stdout.flush()
+    # shutdown is not part of a cold start
+    os._exit(0)
+"""
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _env(database_url, kafka):
+    return dict(os.environ, DATABASE_URL=database_url, KAFKA_BOOTSTRAP_SERVERS=kafka, LOG_LEVEL="CRITICAL")
+
+
+def _first_response(env):
+    port = _free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    # one client for all polls: building a client per attempt would steal CPU from the starting server
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            deadline = started + 60
+            while time.perf_counter() < deadline:
+                try:
+                    if client.get("/").status_code == 200:
+                        return time.perf_counter() - started
+                except httpx.HTTPError:
+                    time.sleep(0.01)
+        raise RuntimeError("API did not start")
+    finally:
+        process.kill()
+        process.wait()
+
+
+def _phases(env):
+    output = subprocess.run(
+        [sys.executable, "-c", PHASES], env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return [float(value) for value in output.splitlines()[-1].split()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start: process spawn to first answered request")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--kafka", default="127.0.0.1:1", help="bootstrap servers; the default refuses connections")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    env = _env(f"sqlite:///{os.path.join(tmp, 'startup.db')}", args.kafka)
+    # autoscaled instances join an existing database; migrate it once before measuring
+    _phases(env)
+
+    phases = [_phases(env) for _ in range(args.runs)]
+    served = [_first_response(env) for _ in range(args.runs)]
+
+    print(f"{args.runs} cold starts, Kafka at {args.kafka}, median")
+    for label, values in (
+        ("import app.main", [p[0] for p in phases]),
+        ("lifespan startup", [p[1] for p in phases]),
+        ("first request", [p[2] for p in phases]),
+        ("uvicorn spawn to first 200", served),
+    ):
+        print(f"  {label:<28} {statistics.median(values) * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import os
+import random
+import resource
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy.orm import sessionmaker
+
+
+def _seed(path, offers, games, users, rng):
+    owners = [rng.randrange(users) + 1 for _ in range(games + 1)]
+    now = str(datetime.utcnow())
+    conn = sqlite3.connect(path)
+    batch = 50000
+    for start in range(0, offers, batch):
+        rows = []
+        for _ in range(min(batch, offers - start)):
+            offered = rng.randrange(games) + 1
+            requested = rng.randrange(games) + 1
+            while requested == offered:
+                requested = rng.randrange(games) + 1
+            rows.append((offered, requested, owners[offered], owners[requested], now, now))
+        conn.executemany(
+            "INSERT INTO trade_offers (offered_game_id, requested_game_id, offerer_id, receiver_id, status, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, 'PENDING', ?, ?)",
+            rows
+        )
+    conn.commit()
+    conn.close()
+    return owners
+
+
+def _churn(path, changes, games, owners, rng):
+    now = str(datetime.utcnow())
+    conn = sqlite3.connect(path)
+    max_id = conn.execute("SELECT max(id) FROM trade_offers").fetchone()[0]
+    conn.executemany(
+        "UPDATE trade_offers SET status = 'CANCELLED', updated_at = ? WHERE id = ?",
+        ((now, rng.randrange(max_id) + 1) for _ in range(changes // 2))
+    )
+    rows = []
+    for _ in range(changes - changes // 2):
+        offered = rng.randrange(games) + 1
+        requested = rng.randrange(games) + 1
+        while requested == offered:
+            requested = rng.randrange(games) + 1
+        rows.append((offered, requested, owners[offered], owners[requested], now, now))
+    conn.executemany(
+        "INSERT INTO trade_offers (offered_game_id, requested_game_id, offerer_id, receiver_id, status, created_at, updated_at) "
+        "VALUES (?, ?, ?, ?, 'PENDING', ?, ?)",
+        rows
+    )
+    conn.commit()
+    conn.close()
+
+
+def _rss_mib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trade cycle engine load, incremental sync and query latency")
+    parser.add_argument("--offers", type=int, default=1_000_000)
+    parser.add_argument("--games", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--changes", type=int, nargs="*", default=[100, 1000, 10000])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    from app.database import create_db_engine
+    from app.migrations import run_migrations
+    from app.services.trade_matching import TradeCycleEngine
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        engine = create_db_engine(f"sqlite:///{path}")
+        run_migrations(engine)
+        started = time.perf_counter()
+        owners = _seed(path, args.offers, args.games, args.users, rng)
+        print(f"seeded {args.offers} pending offers over {args.games} games in {time.perf_counter() - started:.1f}s")
+
+        db = sessionmaker(bind=engine)()
+        matcher = TradeCycleEngine()
+        rss_before = _rss_mib()
+        started = time.perf_counter()
+        matcher.sync(db)
+        full_load = time.perf_counter() - started
+        print(f"full load: {full_load:.2f}s, {len(matcher._cycles)} cycles, peak RSS +{_rss_mib() - rss_before:.0f} MiB")
+
+        matcher.sync(db)
+        started = time.perf_counter()
+        matcher.sync(db)
+        print(f"idle sync: {(time.perf_counter() - started) * 1000:.2f} ms")
+
+        for changes in args.changes:
+            _churn(path, changes, args.games, owners, rng)
+            started = time.perf_counter()
+            matcher.sync(db)
+            elapsed = time.perf_counter() - started
+            print(f"sync after {changes:>6} changes: {elapsed * 1000:>9.2f} ms ({elapsed / full_load:.2%} of a full rebuild)")
+
+        started = time.perf_counter()
+        page = matcher.cycles(limit=100)
+        print(f"list 100 cycles: {(time.perf_counter() - started) * 1000:.2f} ms")
+        if page:
+            user_id = page[0][2][0]
+            started = time.perf_counter()
+            matcher.cycles(user_id=user_id, limit=100)
+            print(f"list cycles for one user: {(time.perf_counter() - started) * 1000:.2f} ms")
+
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
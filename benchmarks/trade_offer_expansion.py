@@ -0,0 +1,86 @@
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Related lookups per trade offer page: follow-up GETs vs expand=")
+    parser.add_argument("--offers", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ.setdefault("KAFKA_BOOTSTRAP_SERVERS", "127.0.0.1:1")
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from app.main import app
+    from app.database import engine
+    from app.cache import game_cache, user_cache
+
+    logging.disable(logging.WARNING)
+    with TestClient(app) as client:
+
+        def user(i):
+            return client.post("/users", json={
+                "name": f"Trader {i}", "email": f"trader{i}@example.com",
+                "password": "password123", "street_address": f"{i} Trade Street"
+            }).json()
+
+        def game(owner, i):
+            return {
+                "owner_id": owner["id"], "name": f"Game {i}", "publisher": "Bench",
+                "year_published": 2000, "gaming_system": "PC", "condition": "good"
+            }
+
+        receiver, offerer = user(0), user(1)
+        client.post("/games/bulk", json=[game(receiver, i) for i in range(args.offers)])
+        client.post("/games/bulk", json=[game(offerer, i) for i in range(args.offers)])
+        received = client.get(f"/users/{receiver['id']}/games?limit={args.offers}").json()["items"]
+        offered = client.get(f"/users/{offerer['id']}/games?limit={args.offers}").json()["items"]
+        for mine, theirs in zip(offered, received):
+            client.post("/trade-offers", json={
+                "offered_game_id": mine["id"], "requested_game_id": theirs["id"]
+            })
+
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *_: statements.append(None))
+        page = f"/trade-offers?limit={args.offers}"
+        relations = (("offered_game_id", "/games"), ("requested_game_id", "/games"), ("offerer_id", "/users"), ("receiver_id", "/users"))
+
+        def follow_up():
+            # what a client had to do before expand=: one GET per related resource
+            game_cache.clear()
+            user_cache.clear()
+            offers = client.get(page).json()["items"]
+            size = 0
+            for offer in offers:
+                for key, prefix in relations:
+                    size += len(client.get(f"{prefix}/{offer[key]}").content)
+            return len(offers) * len(relations) + 1, size
+
+        def expanded(query):
+            return lambda: (1, len(client.get(f"{page}&{query}").content))
+
+        cases = [
+            ("follow-up GETs", follow_up),
+            ("expand=all", expanded("expand=offered_game,requested_game,offerer,receiver")),
+            ("expand=all&fields=id,status", expanded("expand=offered_game,requested_game,offerer,receiver&fields=id,status")),
+        ]
+        print(f"{args.offers} offers per page, best of {args.repeat}")
+        print(f"{'case':<32} {'requests':>8} {'queries':>8} {'bytes':>10} {'ms':>9}")
+        for label, fn in cases:
+            best = float("inf")
+            for _ in range(args.repeat):
+                statements.clear()
+                started = time.perf_counter()
+                requests, size = fn()
+                best = min(best, time.perf_counter() - started)
+            print(f"{label:<32} {requests:>8} {len(statements):>8} {size:>10} {best * 1e3:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
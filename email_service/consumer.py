@@ -1,11 +1,19 @@
-from kafka import KafkaConsumer
-import json
+from kafka import KafkaConsumer, TopicPartition
+from kafka.structs import OffsetAndMetadata
+from prometheus_client import Counter, start_http_server
+from events import EventDecodeError, decode
+from smtp_pool import SMTPConnectionPool
+from digest import DigestSpool
 import logging
 import os
-import smtplib
+import signal
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import time
+from typing import Any, Dict, List, Optional, Tuple
 
 logging.basicConfig(
     level=logging.INFO,
@@ -13,6 +21,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+EMAIL_MESSAGES_RETRIED = Counter(
+    'email_consumer_messages_retried_total',
+    'Messages that could not be fully handled and were left uncommitted to be redelivered by Kafka'
+)
+
+
+class EmailSendError(Exception):
+    pass
+
 
 class EmailService:
     def __init__(self):
@@ -21,30 +38,100 @@ class EmailService:
         self.smtp_username = os.getenv("SMTP_USERNAME", "")
         self.smtp_password = os.getenv("SMTP_PASSWORD", "")
         self.from_email = os.getenv("FROM_EMAIL", "noreply@videogametrading.com")
-    
-    def send_email(self, to_email: str, subject: str, body: str):
-        if not self.smtp_username or not self.smtp_password:
+        self.send_attempts = int(os.getenv("SMTP_SEND_ATTEMPTS", "3"))
+        self.pool = None
+        if self.smtp_username and self.smtp_password:
+            self.pool = SMTPConnectionPool(
+                self.smtp_host,
+                self.smtp_port,
+                self.smtp_username,
+                self.smtp_password,
+                starttls=os.getenv("SMTP_STARTTLS", "true").lower() == "true",
+                timeout=float(os.getenv("SMTP_TIMEOUT_SECONDS", "30")),
+                size=int(os.getenv("SMTP_POOL_SIZE", os.getenv("EMAIL_SEND_WORKERS", "8"))),
+                max_messages=int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100")),
+                noop_after_seconds=float(os.getenv("SMTP_NOOP_AFTER_SECONDS", "5"))
+            )
+        self.digest = None
+        if os.getenv("DIGEST_ENABLED", "true").lower() == "true":
+            self.digest = DigestSpool(
+                os.getenv("DIGEST_SPOOL_PATH", "digest_spool.db"),
+                event_types={t.strip() for t in os.getenv("DIGEST_EVENT_TYPES", "trade_offer_created").split(",") if t.strip()},
+                window_seconds=float(os.getenv("DIGEST_WINDOW_SECONDS", "60")),
+                max_delay_seconds=float(os.getenv("DIGEST_MAX_DELAY_SECONDS", "300")),
+                max_items=int(os.getenv("DIGEST_MAX_ITEMS", "20")),
+                retry_seconds=float(os.getenv("DIGEST_RETRY_SECONDS", "30")),
+                send=self._send_digest
+            )
+            self.digest.start()
+
+    def notify(self, event_type: str, to_email: str, name: str, subject: str, body: str, summary: str):
+        if self.digest is not None and self.digest.accepts(event_type):
+            try:
+                self.digest.add(to_email, name, event_type, subject, body, summary)
+                return
+            except sqlite3.Error as e:
+                logger.error(f"Digest spool unavailable, sending to {to_email} right away: {e}")
+        if not self.send_email(to_email, subject, body):
+            raise EmailSendError(f"Could not send {event_type} email to {to_email}")
+
+    def _send_digest(self, to_email: str, name: str, items: List[Tuple[str, str, str]]) -> bool:
+        if len(items) == 1:
+            # nothing to merge: the recipient gets the email exactly as it would have been sent
+            subject, body, _ = items[0]
+            return self.send_email(to_email, subject, body)
+
+        summaries = "".join(f"\n                <li>{summary}</li>" for _, _, summary in items)
+        subject = f"{len(items)} Trade Updates - Video Game Trading"
+        body = f"""
+        <html>
+        <body>
+            <h2>Your Trade Updates</h2>
+            <p>Hello {name},</p>
+            <p>Here is what happened with your trades recently:</p>
+            <ul>{summaries}
+            </ul>
+            <p>Please log in to your account to see the details and respond to new offers.</p>
+            <br>
+            <p>Best regards,<br>Video Game Trading Team</p>
+        </body>
+        </html>
+        """
+        return self.send_email(to_email, subject, body)
+
+    def send_email(self, to_email: str, subject: str, body: str) -> bool:
+        if self.pool is None:
             logger.warning(f"SMTP credentials not configured. Would send email to {to_email}: {subject}")
             logger.info(f"Email body: {body}")
-            return
+            return True
         
-        try:
-            msg = MIMEMultipart()
-            msg['From'] = self.from_email
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            
-            msg.attach(MIMEText(body, 'html'))
-            
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_username, self.smtp_password)
-                server.send_message(msg)
-            
-            logger.info(f"Email sent successfully to {to_email}")
-        except Exception as e:
-            logger.error(f"Failed to send email to {to_email}: {e}")
-    
+        msg = MIMEMultipart()
+        msg['From'] = self.from_email
+        msg['To'] = to_email
+        msg['Subject'] = subject
+        
+        msg.attach(MIMEText(body, 'html'))
+
+        for attempt in range(1, self.send_attempts + 1):
+            try:
+                # a pooled connection: connect, STARTTLS and login happen once per connection, not per email
+                self.pool.send(msg)
+                logger.info(f"Email sent successfully to {to_email}")
+                return True
+            except Exception as e:
+                if attempt == self.send_attempts:
+                    logger.error(f"Failed to send email to {to_email} after {attempt} attempts: {e}")
+                    return False
+                logger.warning(f"Failed to send email to {to_email}, attempt {attempt}, retrying: {e}")
+                time.sleep(2 ** (attempt - 1))
+
+    def close(self):
+        # stopped first: the flusher sends through the pool
+        if self.digest is not None:
+            self.digest.close()
+        if self.pool is not None:
+            self.pool.close()
+
     def process_notification(self, message: dict):
         event_type = message.get("event_type")
         data = message.get("data", {})
@@ -55,6 +142,10 @@ class EmailService:
             self._handle_trade_offer_created(data)
         elif event_type == "trade_offer_accepted":
             self._handle_trade_offer_accepted(data)
+            self._handle_cancelled_offers(data)
+        elif event_type == "trade_cycle_accepted":
+            self._handle_trade_cycle_accepted(data)
+            self._handle_cancelled_offers(data)
         elif event_type == "trade_offer_rejected":
             self._handle_trade_offer_rejected(data)
         else:
@@ -78,7 +169,7 @@ class EmailService:
         </html>
         """
         
-        self.send_email(user_email, subject, body)
+        self.notify("password_changed", user_email, user_name, subject, body, "Your password was changed")
     
     def _handle_trade_offer_created(self, data: dict):
         offerer_email = data.get("offerer_email")
@@ -125,8 +216,14 @@ class EmailService:
         </html>
         """
         
-        self.send_email(offerer_email, offerer_subject, offerer_body)
-        self.send_email(receiver_email, receiver_subject, receiver_body)
+        self.notify(
+            "trade_offer_created", offerer_email, offerer_name, offerer_subject, offerer_body,
+            f"You offered {receiver_name} your {offered_game} for their {requested_game}"
+        )
+        self.notify(
+            "trade_offer_created", receiver_email, receiver_name, receiver_subject, receiver_body,
+            f"{offerer_name} offers {offered_game} for your {requested_game}"
+        )
 
     def _handle_trade_offer_accepted(self, data: dict):
         offerer_email = data.get("offerer_email")
@@ -172,8 +269,98 @@ class EmailService:
         </html>
         """
 
-        self.send_email(offerer_email, offerer_subject, offerer_body)
-        self.send_email(receiver_email, receiver_subject, receiver_body)
+        self.notify(
+            "trade_offer_accepted", offerer_email, offerer_name, offerer_subject, offerer_body,
+            f"{receiver_name} accepted your offer of {offered_game} for {requested_game}"
+        )
+        self.notify(
+            "trade_offer_accepted", receiver_email, receiver_name, receiver_subject, receiver_body,
+            f"You accepted {offerer_name}'s offer of {offered_game} for your {requested_game}"
+        )
+
+    def _handle_trade_cycle_accepted(self, data: dict):
+        for offer in data.get("accepted_offers", []):
+            offerer_email = offer.get("offerer_email")
+            offerer_name = offer.get("offerer_name")
+            offered_game = offer.get("offered_game")
+            requested_game = offer.get("requested_game")
+
+            subject = "Trade Completed - Video Game Trading"
+            body = f"""
+            <html>
+            <body>
+                <h2>Trade Completed!</h2>
+                <p>Hello {offerer_name},</p>
+                <p>Your trade offer was matched with other traders and the whole trade has gone through:</p>
+                <ul>
+                    <li><strong>You give:</strong> {offered_game}</li>
+                    <li><strong>You receive:</strong> {requested_game}</li>
+                </ul>
+                <br>
+                <p>Best regards,<br>Video Game Trading Team</p>
+            </body>
+            </html>
+            """
+
+            self.notify(
+                "trade_cycle_accepted", offerer_email, offerer_name, subject, body,
+                f"Trade completed: you gave {offered_game} and received {requested_game}"
+            )
+
+    def _handle_cancelled_offers(self, data: dict):
+        for offer in data.get("cancelled_offers", []):
+            self._handle_trade_offer_cancelled(offer)
+
+    def _handle_trade_offer_cancelled(self, data: dict):
+        offerer_email = data.get("offerer_email")
+        offerer_name = data.get("offerer_name")
+        receiver_email = data.get("receiver_email")
+        receiver_name = data.get("receiver_name")
+        offered_game = data.get("offered_game")
+        requested_game = data.get("requested_game")
+
+        subject = "Trade Offer Cancelled - Video Game Trading"
+        offerer_body = f"""
+        <html>
+        <body>
+            <h2>Trade Offer Cancelled</h2>
+            <p>Hello {offerer_name},</p>
+            <p>Your trade offer to {receiver_name} was cancelled because one of its games has been traded in another deal:</p>
+            <ul>
+                <li><strong>You offered:</strong> {offered_game}</li>
+                <li><strong>You requested:</strong> {requested_game}</li>
+            </ul>
+            <p>You can browse other games and make new trade offers.</p>
+            <br>
+            <p>Best regards,<br>Video Game Trading Team</p>
+        </body>
+        </html>
+        """
+
+        receiver_body = f"""
+        <html>
+        <body>
+            <h2>Trade Offer Cancelled</h2>
+            <p>Hello {receiver_name},</p>
+            <p>The trade offer from {offerer_name} was cancelled because one of its games has been traded in another deal:</p>
+            <ul>
+                <li><strong>They offered:</strong> {offered_game}</li>
+                <li><strong>They requested:</strong> {requested_game}</li>
+            </ul>
+            <br>
+            <p>Best regards,<br>Video Game Trading Team</p>
+        </body>
+        </html>
+        """
+
+        self.notify(
+            "trade_offer_cancelled", offerer_email, offerer_name, subject, offerer_body,
+            f"Your offer of {offered_game} for {receiver_name}'s {requested_game} was cancelled"
+        )
+        self.notify(
+            "trade_offer_cancelled", receiver_email, receiver_name, subject, receiver_body,
+            f"{offerer_name}'s offer of {offered_game} for your {requested_game} was cancelled"
+        )
 
     def _handle_trade_offer_rejected(self, data: dict):
         offerer_email = data.get("offerer_email")
@@ -218,46 +405,143 @@ class EmailService:
         </html>
         """
 
-        self.send_email(offerer_email, offerer_subject, offerer_body)
-        self.send_email(receiver_email, receiver_subject, receiver_body)
+        self.notify(
+            "trade_offer_rejected", offerer_email, offerer_name, offerer_subject, offerer_body,
+            f"{receiver_name} declined your offer of {offered_game} for {requested_game}"
+        )
+        self.notify(
+            "trade_offer_rejected", receiver_email, receiver_name, receiver_subject, receiver_body,
+            f"You rejected {offerer_name}'s offer of {offered_game} for your {requested_game}"
+        )
+
+
+class BatchProcessor:
+    def __init__(self, email_service: EmailService, workers: int):
+        self.email_service = email_service
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="email-sender")
+
+    def process(self, records: List[Any]) -> Dict[TopicPartition, int]:
+        # records sharing a key (one trade offer, one user) stay in order on one thread;
+        # different keys are sent in parallel, so one slow SMTP exchange no longer stalls the partition
+        groups: Dict[Any, List[Any]] = {}
+        for record in records:
+            key = record.key if record.key is not None else (record.partition, record.offset)
+            groups.setdefault(key, []).append(record)
+        futures = [self.executor.submit(self._process_group, group) for group in groups.values()]
+        wait(futures)
+
+        # earliest failed offset per partition: nothing from there on may be committed
+        failed: Dict[TopicPartition, int] = {}
+        for future in futures:
+            record = future.result()
+            if record is not None:
+                partition = TopicPartition(record.topic, record.partition)
+                failed[partition] = min(failed.get(partition, record.offset), record.offset)
+        return failed
+
+    def _process_group(self, records: List[Any]) -> Optional[Any]:
+        for record in records:
+            try:
+                # decoded per record: the encoding travels in the headers, which a value_deserializer never sees
+                event = decode(record.value, record.headers)
+            except EventDecodeError as e:
+                logger.error(f"Skipping undecodable message at {record.topic}[{record.partition}]@{record.offset}: {e}")
+                continue
+            try:
+                logger.info(f"Received message: {event}")
+                self.email_service.process_notification(event)
+            except Exception as e:
+                # the rest of the group waits behind it, so its messages keep their order when redelivered
+                logger.error(f"Error processing message at {record.topic}[{record.partition}]@{record.offset}: {e}")
+                return record
+        return None
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.email_service.close()
 
 
 def main():
     bootstrap_servers = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "kafka:9092")
     topic = os.getenv("KAFKA_TOPIC_NOTIFICATIONS", "email-notifications")
     group_id = os.getenv("KAFKA_GROUP_ID", "email-notification-group")
+    max_records = int(os.getenv("CONSUMER_MAX_RECORDS", "100"))
+    poll_timeout_ms = int(os.getenv("CONSUMER_POLL_TIMEOUT_MS", "1000"))
+    workers = int(os.getenv("EMAIL_SEND_WORKERS", "8"))
+    retry_seconds = float(os.getenv("CONSUMER_RETRY_SECONDS", "5"))
+    retry_max_seconds = float(os.getenv("CONSUMER_RETRY_MAX_SECONDS", "60"))
+    metrics_port = int(os.getenv("METRICS_PORT", "9100"))
 
     logger.info(f"Starting email consumer service...")
     logger.info(f"Bootstrap servers: {bootstrap_servers}")
     logger.info(f"Topic: {topic}")
     logger.info(f"Group ID: {group_id}")
+    logger.info(f"Batches of up to {max_records} messages, {workers} sender threads")
 
-    email_service = EmailService()
+    start_http_server(metrics_port)
+    logger.info(f"Metrics on :{metrics_port}/metrics")
 
-    while True:
+    processor = BatchProcessor(EmailService(), workers)
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+
+    while not stopping.is_set():
         try:
             consumer = KafkaConsumer(
                 topic,
                 bootstrap_servers=bootstrap_servers,
                 group_id=group_id,
-                value_deserializer=lambda m: json.loads(m.decode('utf-8')),
                 auto_offset_reset='earliest',
-                enable_auto_commit=True
+                enable_auto_commit=False,
+                max_poll_records=max_records
             )
+        except Exception as e:
+            logger.error(f"Kafka consumer error: {e}")
+            logger.info("Retrying in 10 seconds...")
+            stopping.wait(10)
+            continue
 
-            logger.info("Kafka consumer connected successfully. Waiting for messages...")
-
-            for message in consumer:
-                try:
-                    logger.info(f"Received message: {message.value}")
-                    email_service.process_notification(message.value)
-                except Exception as e:
-                    logger.error(f"Error processing message: {e}")
+        logger.info("Kafka consumer connected successfully. Waiting for messages...")
+        failures = 0
+        try:
+            while not stopping.is_set():
+                batch = consumer.poll(timeout_ms=poll_timeout_ms, max_records=max_records)
+                records = [record for partition_records in batch.values() for record in partition_records]
+                if not records:
+                    continue
+                failed = processor.process(records)
+                if not failed:
+                    failures = 0
+                    # committed only once every message in the batch was handled: a crash mid-batch
+                    # redelivers the batch (at-least-once) instead of dropping auto-committed mail
+                    consumer.commit()
+                    continue
 
+                # commit up to the first failure of each partition and rewind to it: the failed message
+                # and everything after it are polled again, so an email that could not be sent is retried
+                consumer.commit({
+                    partition: OffsetAndMetadata(failed.get(partition, partition_records[-1].offset + 1), None)
+                    for partition, partition_records in batch.items()
+                })
+                for partition, offset in failed.items():
+                    consumer.seek(partition, offset)
+                EMAIL_MESSAGES_RETRIED.inc(sum(
+                    1 for record in records
+                    if record.offset >= failed.get(TopicPartition(record.topic, record.partition), record.offset + 1)
+                ))
+                delay = min(retry_seconds * 2 ** failures, retry_max_seconds)
+                failures += 1
+                logger.warning(f"Rewound {len(failed)} partitions to their first failed message, retrying in {delay:.0f}s")
+                stopping.wait(delay)
         except Exception as e:
             logger.error(f"Kafka consumer error: {e}")
             logger.info("Retrying in 10 seconds...")
-            time.sleep(10)
+            stopping.wait(10)
+        finally:
+            consumer.close()
+
+    processor.close()
+    logger.info("Email consumer stopped")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,191 @@
+import logging
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+# never held back: the user has to hear about these right away
+BYPASS_EVENTS = frozenset({"password_changed"})
+
+DIGEST_EVENTS = Counter(
+    'notification_digest_events_total',
+    'Emails held in the digest spool instead of being sent immediately',
+    ['event_type']
+)
+
+DIGEST_EMAILS = Counter(
+    'notification_digest_emails_total',
+    'Emails sent for flushed recipient buffers: a digest, or the original email when only one was buffered'
+)
+
+DIGEST_EMAILS_SAVED = Counter(
+    'notification_digest_emails_saved_total',
+    'Emails not sent because they were merged into a digest'
+)
+
+DIGEST_SEND_FAILURES = Counter(
+    'notification_digest_send_failures_total',
+    'Flushed recipient buffers whose email could not be sent and were put back in the spool'
+)
+
+DIGEST_PENDING = Gauge(
+    'notification_digest_pending',
+    'Emails waiting in the digest spool'
+)
+
+DIGEST_DELAY = Histogram(
+    'notification_digest_delay_seconds',
+    'Time the oldest email of a digest waited in the spool',
+    buckets=[1, 5, 15, 30, 60, 120, 300, 600, 1800]
+)
+
+DigestItem = Tuple[str, str, str]
+
+
+class DigestSpool:
+    def __init__(self, path: str, event_types: Set[str], window_seconds: float, max_delay_seconds: float,
+                 max_items: int, retry_seconds: float, send: Callable[[str, str, List[DigestItem]], bool]):
+        self.event_types = set(event_types) - BYPASS_EVENTS
+        self.window_seconds = window_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.max_items = max_items
+        self.retry_seconds = retry_seconds
+        self.send = send
+        # recipient -> (earliest retry, consecutive failures); kept in memory, so a restart retries right away
+        self._backoff: Dict[str, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS digest_items (
+                id INTEGER PRIMARY KEY,
+                recipient TEXT NOT NULL,
+                name TEXT,
+                event_type TEXT NOT NULL,
+                subject TEXT NOT NULL,
+                body TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                claimed_at REAL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_digest_items_recipient ON digest_items (recipient, created_at)")
+        # a digest claimed but not confirmed sent when the service stopped goes out again
+        self._db.execute("UPDATE digest_items SET claimed_at = NULL WHERE claimed_at IS NOT NULL")
+        DIGEST_PENDING.set(self._pending())
+
+    def accepts(self, event_type: str) -> bool:
+        return event_type in self.event_types
+
+    def add(self, recipient: str, name: str, event_type: str, subject: str, body: str, summary: str):
+        # durable before the Kafka offset is committed, so a restart loses nothing
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO digest_items (recipient, name, event_type, subject, body, summary, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (recipient, name, event_type, subject, body, summary, time.time())
+            )
+            buffered = self._db.execute(
+                "SELECT COUNT(*) FROM digest_items WHERE recipient = ? AND claimed_at IS NULL", (recipient,)
+            ).fetchone()[0]
+        DIGEST_EVENTS.labels(event_type=event_type).inc()
+        DIGEST_PENDING.inc()
+        if buffered >= self.max_items and recipient not in self._backoff:
+            self.flush(recipient)
+
+    def due(self) -> List[str]:
+        now = time.time()
+        with self._lock:
+            recipients = [row[0] for row in self._db.execute(
+                "SELECT recipient FROM digest_items WHERE claimed_at IS NULL GROUP BY recipient"
+                " HAVING MIN(created_at) <= ? OR MAX(created_at) <= ? OR COUNT(*) >= ?",
+                (now - self.max_delay_seconds, now - self.window_seconds, self.max_items)
+            )]
+        return [recipient for recipient in recipients if self._backoff.get(recipient, (0, 0))[0] <= now]
+
+    def flush(self, recipient: str) -> bool:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._db.execute(
+                    "SELECT id, name, subject, body, summary, created_at FROM digest_items"
+                    " WHERE recipient = ? AND claimed_at IS NULL ORDER BY id",
+                    (recipient,)
+                ).fetchall()
+                self._db.executemany(
+                    "UPDATE digest_items SET claimed_at = ? WHERE id = ?", [(time.time(), row[0]) for row in rows]
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        if not rows:
+            return True
+
+        try:
+            sent = self.send(recipient, rows[-1][1], [(subject, body, summary) for _, _, subject, body, summary, _ in rows])
+        except Exception as e:
+            logger.error(f"Failed to send notification digest to {recipient}: {e}")
+            sent = False
+        if not sent:
+            # back in the spool for a later flush; nothing is dropped
+            self._release(row[0] for row in rows)
+            _, failures = self._backoff.get(recipient, (0, 0))
+            delay = min(self.retry_seconds * 2 ** failures, self.max_delay_seconds)
+            self._backoff[recipient] = (time.time() + delay, failures + 1)
+            DIGEST_SEND_FAILURES.inc()
+            logger.warning(f"Kept {len(rows)} notifications for {recipient} in the digest spool, retrying in {delay:.0f}s")
+            return False
+
+        self._backoff.pop(recipient, None)
+        DIGEST_EMAILS.inc()
+        DIGEST_EMAILS_SAVED.inc(len(rows) - 1)
+        DIGEST_DELAY.observe(time.time() - rows[0][5])
+        self._delete(row[0] for row in rows)
+        DIGEST_PENDING.dec(len(rows))
+        return True
+
+    def flush_due(self):
+        for recipient in self.due():
+            try:
+                self.flush(recipient)
+            except Exception as e:
+                logger.error(f"Failed to flush notification digest for {recipient}: {e}")
+
+    def _delete(self, ids: Iterable[int]):
+        with self._lock:
+            self._db.executemany("DELETE FROM digest_items WHERE id = ?", [(item_id,) for item_id in ids])
+
+    def _release(self, ids: Iterable[int]):
+        with self._lock:
+            self._db.executemany("UPDATE digest_items SET claimed_at = NULL WHERE id = ?", [(item_id,) for item_id in ids])
+
+    def _pending(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM digest_items").fetchone()[0]
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="digest-flusher", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        interval = min(1.0, self.window_seconds)
+        while not self._stopping.wait(interval):
+            self.flush_due()
+
+    def close(self):
+        # whatever is still buffered stays in the spool and is flushed after the restart
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,152 @@
+import logging
+import smtplib
+import threading
+import time
+from collections import deque
+from email.message import Message
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+SMTP_HANDSHAKES = Counter(
+    'smtp_handshakes_total',
+    'SMTP connections opened: TCP connect, STARTTLS and login'
+)
+
+SMTP_MESSAGES = Counter(
+    'smtp_messages_sent_total',
+    'Emails accepted by the SMTP server'
+)
+
+SMTP_RECONNECTS = Counter(
+    'smtp_reconnects_total',
+    'Sends retried on a fresh connection after the server dropped a pooled one'
+)
+
+SMTP_HEALTH_CHECKS = Counter(
+    'smtp_health_checks_total',
+    'NOOP checks of idle pooled connections',
+    ['outcome']
+)
+
+SMTP_CONNECTIONS = Gauge(
+    'smtp_connections_open',
+    'Open SMTP connections, idle or in use'
+)
+
+SMTP_HANDSHAKE_DURATION = Histogram(
+    'smtp_handshake_duration_seconds',
+    'Time to connect, STARTTLS and log in',
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5]
+)
+
+SMTP_SEND_DURATION = Histogram(
+    'smtp_send_duration_seconds',
+    'Time for the server to accept one message on an open connection',
+    buckets=[0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5]
+)
+
+
+class PooledConnection:
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.messages = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    def __init__(self, host: str, port: int, username: str, password: str, starttls: bool, timeout: float,
+                 size: int, max_messages: int, noop_after_seconds: float):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.max_messages = max_messages
+        self.noop_after_seconds = noop_after_seconds
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = deque()
+        self._lock = threading.Lock()
+
+    def send(self, message: Message):
+        with self._slots:
+            connection = self._checkout()
+            try:
+                self._send(connection, message)
+            except smtplib.SMTPServerDisconnected:
+                # the server closed a pooled connection between the health check and the send
+                logger.info("SMTP server closed a pooled connection, reconnecting")
+                SMTP_RECONNECTS.inc()
+                connection = self._connect()
+                self._send(connection, message)
+            self._checkin(connection)
+
+    def _send(self, connection: PooledConnection, message: Message):
+        started = time.perf_counter()
+        try:
+            connection.smtp.send_message(message)
+        except smtplib.SMTPRecipientsRefused:
+            # the session is still usable; only this message failed
+            self._checkin(connection)
+            raise
+        except Exception:
+            self._discard(connection)
+            raise
+        SMTP_SEND_DURATION.observe(time.perf_counter() - started)
+        SMTP_MESSAGES.inc()
+        connection.messages += 1
+
+    def _checkout(self) -> PooledConnection:
+        while True:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                return self._connect()
+            if time.monotonic() - connection.last_used < self.noop_after_seconds:
+                return connection
+            # idle long enough that the server may have timed it out
+            try:
+                healthy = connection.smtp.noop()[0] == 250
+            except (smtplib.SMTPException, OSError):
+                healthy = False
+            SMTP_HEALTH_CHECKS.labels(outcome="ok" if healthy else "stale").inc()
+            if healthy:
+                return connection
+            self._discard(connection)
+
+    def _checkin(self, connection: PooledConnection):
+        if connection.messages >= self.max_messages:
+            self._discard(connection)
+            return
+        connection.last_used = time.monotonic()
+        with self._lock:
+            self._idle.append(connection)
+
+    def _connect(self) -> PooledConnection:
+        started = time.perf_counter()
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                smtp.starttls()
+            smtp.login(self.username, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        SMTP_HANDSHAKE_DURATION.observe(time.perf_counter() - started)
+        SMTP_HANDSHAKES.inc()
+        SMTP_CONNECTIONS.inc()
+        return PooledConnection(smtp)
+
+    def _discard(self, connection: PooledConnection):
+        SMTP_CONNECTIONS.dec()
+        try:
+            connection.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            connection.smtp.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for connection in idle:
+            self._discard(connection)
@@ -0,0 +1,2 @@
+from events.codec import CONTENT_TYPE_HEADER, ENCODINGS, EventDecodeError, decode, encode
+from events.schemas import LATEST_SCHEMAS, SCHEMAS, SCHEMAS_BY_ID
@@ -0,0 +1,160 @@
+import json
+import struct
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from events.schemas import LATEST_SCHEMAS, SCHEMAS_BY_ID, STRING, EventSchema, Records
+
+CONTENT_TYPE_HEADER = "content-type"
+JSON = b"application/json"
+BINARY = b"application/vnd.videogame-trading.event"
+ENCODINGS = ("json", "binary")
+
+# schema id and version; the fields follow in schema order
+PREFIX = struct.Struct(">HB")
+
+Headers = List[Tuple[str, bytes]]
+
+
+class EventDecodeError(ValueError):
+    pass
+
+
+class _NotInSchema(Exception):
+    pass
+
+
+class _Writer:
+    def __init__(self):
+        self.out = bytearray()
+        self.strings = {}
+
+    def varint(self, value: int):
+        while value > 0x7F:
+            self.out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        self.out.append(value)
+
+    def string(self, value: Optional[str]):
+        # 0 is null, odd tags carry a new string's length, even tags point back at an earlier one:
+        # the same names and emails recur across accepted and cancelled offers
+        if value is None:
+            self.out.append(0)
+            return
+        index = self.strings.get(value)
+        if index is not None:
+            self.varint((index + 1) << 1)
+            return
+        self.strings[value] = len(self.strings)
+        raw = value.encode("utf-8")
+        tag = len(raw) << 1 | 1
+        if tag < 0x80:
+            self.out.append(tag)
+        else:
+            self.varint(tag)
+        self.out += raw
+
+    def fields(self, records: Records, data: Dict[str, Any]):
+        if not records.names.issuperset(data):
+            raise _NotInSchema()
+        for name, kind in records.fields:
+            value = data.get(name)
+            if kind is STRING:
+                self.string(value)
+            else:
+                items = value or ()
+                self.varint(len(items))
+                for item in items:
+                    self.fields(kind, item)
+
+
+class _Reader:
+    def __init__(self, payload: bytes, position: int):
+        self.payload = payload
+        self.position = position
+        self.strings = []
+
+    def varint(self) -> int:
+        result = shift = 0
+        while True:
+            byte = self.payload[self.position]
+            self.position += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def string(self) -> Optional[str]:
+        tag = self.payload[self.position]
+        if tag < 0x80:
+            self.position += 1
+        else:
+            tag = self.varint()
+        if tag == 0:
+            return None
+        if tag & 1:
+            end = self.position + (tag >> 1)
+            if end > len(self.payload):
+                raise IndexError("string runs past the end of the payload")
+            value = self.payload[self.position:end].decode("utf-8")
+            self.position = end
+            self.strings.append(value)
+            return value
+        return self.strings[(tag >> 1) - 1]
+
+    def fields(self, records: Records) -> Dict[str, Any]:
+        data = {}
+        for name, kind in records.fields:
+            if kind is STRING:
+                data[name] = self.string()
+            else:
+                data[name] = [self.fields(kind) for _ in range(self.varint())]
+        return data
+
+
+def encode_binary(schema: EventSchema, data: Dict[str, Any]) -> bytes:
+    writer = _Writer()
+    writer.out += PREFIX.pack(schema.schema_id, schema.version)
+    writer.fields(schema, data)
+    return bytes(writer.out)
+
+
+def decode_binary(payload: bytes) -> Dict[str, Any]:
+    try:
+        schema_id, version = PREFIX.unpack_from(payload)
+    except struct.error as e:
+        raise EventDecodeError(f"Truncated event header: {e}") from e
+    schema = SCHEMAS_BY_ID.get((schema_id, version))
+    if schema is None:
+        raise EventDecodeError(f"Unknown event schema {schema_id} version {version}")
+    reader = _Reader(payload, PREFIX.size)
+    try:
+        data = reader.fields(schema)
+    except (IndexError, UnicodeDecodeError) as e:
+        raise EventDecodeError(f"Malformed {schema.event_type} v{version} payload: {e}") from e
+    if reader.position != len(payload):
+        raise EventDecodeError(f"{len(payload) - reader.position} trailing bytes after {schema.event_type} v{version}")
+    return {"event_type": schema.event_type, "data": data}
+
+
+def encode(message: Dict[str, Any], encoding: str = "binary") -> Tuple[bytes, Headers]:
+    if encoding == "binary":
+        schema = LATEST_SCHEMAS.get(message["event_type"])
+        if schema is not None:
+            try:
+                return encode_binary(schema, message.get("data") or {}), [(CONTENT_TYPE_HEADER, BINARY)]
+            except _NotInSchema:
+                pass
+    # events without a schema, or carrying fields their schema does not know yet, stay lossless as JSON
+    return json.dumps(message).encode("utf-8"), [(CONTENT_TYPE_HEADER, JSON)]
+
+
+def decode(value: bytes, headers: Optional[Iterable[Tuple[str, bytes]]] = None) -> Dict[str, Any]:
+    content_type = dict(headers or ()).get(CONTENT_TYPE_HEADER)
+    if content_type == BINARY:
+        return decode_binary(value)
+    # messages published before the header existed are JSON
+    if content_type is None or content_type == JSON:
+        try:
+            return json.loads(value)
+        except ValueError as e:
+            raise EventDecodeError(f"Malformed JSON event: {e}") from e
+    raise EventDecodeError(f"Unsupported event content type {content_type!r}")
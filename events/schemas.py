@@ -0,0 +1,51 @@
+from typing import Dict, Tuple
+
+STRING = "string"
+
+
+class Records:
+    def __init__(self, fields: Tuple):
+        self.fields = fields
+        self.names = frozenset(name for name, _ in fields)
+
+
+class EventSchema(Records):
+    def __init__(self, event_type: str, schema_id: int, version: int, fields: Tuple):
+        super().__init__(fields)
+        self.event_type = event_type
+        self.schema_id = schema_id
+        self.version = version
+
+
+OFFER_FIELDS = (
+    ("offerer_email", STRING),
+    ("offerer_name", STRING),
+    ("receiver_email", STRING),
+    ("receiver_name", STRING),
+    ("offered_game", STRING),
+    ("requested_game", STRING),
+)
+
+# a published (schema_id, version) never changes: add a new version instead, and keep the old one
+# registered for as long as messages written with it can still be on the topic
+SCHEMAS = (
+    EventSchema("password_changed", 1, 1, (
+        ("user_email", STRING),
+        ("user_name", STRING),
+    )),
+    EventSchema("trade_offer_created", 2, 1, OFFER_FIELDS),
+    EventSchema("trade_offer_accepted", 3, 1, OFFER_FIELDS + (
+        ("cancelled_offers", Records(OFFER_FIELDS)),
+    )),
+    EventSchema("trade_offer_rejected", 4, 1, OFFER_FIELDS),
+    EventSchema("trade_cycle_accepted", 5, 1, (
+        ("accepted_offers", Records(OFFER_FIELDS)),
+        ("cancelled_offers", Records(OFFER_FIELDS)),
+    )),
+)
+
+SCHEMAS_BY_ID: Dict[Tuple[int, int], EventSchema] = {(schema.schema_id, schema.version): schema for schema in SCHEMAS}
+
+LATEST_SCHEMAS: Dict[str, EventSchema] = {}
+for schema in sorted(SCHEMAS, key=lambda schema: schema.version):
+    LATEST_SCHEMAS[schema.event_type] = schema
@@ -0,0 +1,152 @@
+import logging
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+
+WRITE_OR_READ = re.compile(r"^\s*(SELECT|UPDATE|DELETE)\b", re.IGNORECASE)
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+def _exercise(client):
+    def call(method, path, expected, **kwargs):
+        response = client.request(method, path, **kwargs)
+        if response.status_code != expected:
+            raise RuntimeError(f"{method} {path} returned {response.status_code}: {response.text}")
+        return response.json() if response.content else None
+
+    users = [
+        call("POST", "/users", 201, json={
+            "name": f"User {i}", "email": f"user{i}@example.com",
+            "password": "password123", "street_address": f"{i} Main St"
+        })
+        for i in range(3)
+    ]
+    games = [
+        call("POST", f"/games?owner_id={users[i % 3]['id']}", 201, json={
+            "name": f"Game {i}", "publisher": "Publisher", "year_published": 2000 + i,
+            "gaming_system": "PC", "condition": "good"
+        })
+        for i in range(6)
+    ]
+
+    call("GET", f"/users/{users[0]['id']}", 200)
+    call("PUT", f"/users/{users[0]['id']}", 200, json={"name": "Renamed"})
+    call("PUT", f"/users/{users[0]['id']}/password", 200, json={"new_password": "newpassword123"})
+    call("GET", f"/games/{games[0]['id']}", 200)
+    call("PUT", f"/games/{games[0]['id']}", 200, json={"name": "Renamed"})
+
+    offers = [
+        call("POST", "/trade-offers", 201, json={"offered_game_id": games[0]["id"], "requested_game_id": games[1]["id"]}),
+        call("POST", "/trade-offers", 201, json={"offered_game_id": games[3]["id"], "requested_game_id": games[2]["id"]}),
+        call("POST", "/trade-offers", 201, json={"offered_game_id": games[4]["id"], "requested_game_id": games[5]["id"]}),
+    ]
+    call("GET", f"/trade-offers/{offers[0]['id']}", 200)
+
+    for path in (
+        "/users",
+        "/games",
+        "/games?facets=true",
+        "/games?gaming_system=PC&facets=true",
+        "/games?condition=good&facets=true",
+        "/games?publisher=Publisher&facets=true",
+        "/games?year_min=2001&year_max=2004&facets=true",
+        f"/users/{users[0]['id']}/games",
+        "/trade-offers",
+        "/trade-offers?status_filter=pending",
+        f"/trade-offers/user/{users[0]['id']}/sent",
+        f"/trade-offers/user/{users[1]['id']}/received",
+    ):
+        separator = "&" if "?" in path else "?"
+        page = call("GET", f"{path}{separator}limit=1", 200)
+        next_link = page["links"].get("next")
+        if next_link:
+            call("GET", next_link["href"].replace(str(client.base_url), ""), 200)
+        call("GET", f"{path}{separator}skip=1&limit=1", 200)
+
+    page = call("GET", "/games/search?q=game&limit=1", 200)
+    call("GET", page["links"]["next"]["href"].replace(str(client.base_url), ""), 200)
+
+    for path in (
+        f"/games/export?owner_id={users[0]['id']}",
+        "/games/export?year_min=2001&year_max=2004",
+        "/trade-offers/export?status_filter=pending",
+        f"/trade-offers/export?offerer_id={users[0]['id']}",
+        f"/trade-offers/export?receiver_id={users[1]['id']}&format=csv",
+    ):
+        client.get(path)
+
+    cycle_offer = call("POST", "/trade-offers", 201, json={"offered_game_id": games[1]["id"], "requested_game_id": games[0]["id"]})
+    call("GET", "/trade-cycles", 200)
+    cycles = call("GET", f"/trade-cycles?user_id={users[0]['id']}", 200)["items"]
+    call("GET", f"/trade-cycles/{cycles[0]['id']}", 200)
+    call("PUT", f"/trade-offers/{cycle_offer['id']}/cancel", 200)
+    call("GET", "/trade-cycles", 200)
+    call("PUT", f"/trade-offers/{offers[0]['id']}/accept", 200)
+    call("PUT", f"/trade-offers/{offers[1]['id']}/reject", 200)
+    call("PUT", f"/trade-offers/{offers[2]['id']}/cancel", 200)
+    unlisted = call("POST", f"/games?owner_id={users[0]['id']}", 201, json={
+        "name": "Unlisted", "publisher": "Publisher", "year_published": 2000,
+        "gaming_system": "PC", "condition": "good"
+    })
+    call("DELETE", f"/games/{unlisted['id']}", 204)
+
+    from app.services.outbox_relay import outbox_relay
+    outbox_relay.relay_batch()
+    outbox_relay.cleanup()
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    database_path = os.path.join(tmp, "query_plans.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{database_path}"
+    os.environ.setdefault("KAFKA_BOOTSTRAP_SERVERS", "127.0.0.1:1")
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from app.database import engine
+    from app.main import app
+    from app.migrations import run_migrations
+
+    statements = {}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and WRITE_OR_READ.match(statement):
+            statements.setdefault(statement, parameters)
+
+    # one-off migration backfills are not request paths
+    run_migrations(engine)
+    logging.disable(logging.INFO)
+    event.listen(engine, "before_cursor_execute", capture)
+    with TestClient(app) as client:
+        _exercise(client)
+    event.remove(engine, "before_cursor_execute", capture)
+    logging.disable(logging.NOTSET)
+
+    conn = sqlite3.connect(database_path)
+    failures = []
+    for statement, parameters in statements.items():
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+        has_where = re.search(r"\bWHERE\b", statement, re.IGNORECASE) is not None
+        # relevance-ranked full-text matches have to be sorted; the sort is bounded by the match set
+        ranks_matches = any("VIRTUAL TABLE" in step for step in plan)
+        problems = [
+            step for step in plan
+            if ("TEMP B-TREE" in step and not ranks_matches) or (has_where and FULL_SCAN.match(step))
+        ]
+        status = "FAIL" if problems else "ok"
+        print(f"[{status}] {' '.join(statement.split())}")
+        for step in plan:
+            print(f"        {step}")
+        if problems:
+            failures.append(statement)
+    conn.close()
+
+    print(f"\n{len(statements)} statements checked, {len(failures)} with full table scans or temp sorts")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
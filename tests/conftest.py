@@ -0,0 +1,87 @@
+import itertools
+import os
+import sqlite3
+import tempfile
+import pytest
+
+DATABASE_DIR = tempfile.mkdtemp()
+DATABASE_PATH = os.path.join(DATABASE_DIR, "test.db")
+
+# read by app.config at import, so set before the app is imported
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_PATH}"
+os.environ.setdefault("KAFKA_BOOTSTRAP_SERVERS", "127.0.0.1:1")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.database import engine
+from app.main import app
+
+_ids = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def database():
+    conn = sqlite3.connect(DATABASE_PATH, isolation_level=None, check_same_thread=False)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def make_user(client):
+    def make_user():
+        n = next(_ids)
+        response = client.post("/users", json={
+            "name": f"User {n}",
+            "email": f"user{n}@example.com",
+            "password": "password123",
+            "street_address": f"{n} Main Street"
+        })
+        assert response.status_code == 201, response.text
+        return response.json()
+    return make_user
+
+
+@pytest.fixture
+def make_game(client):
+    def make_game(owner, **fields):
+        n = next(_ids)
+        response = client.post(f"/games?owner_id={owner['id']}", json={
+            "name": f"Game {n}",
+            "publisher": "Publisher",
+            "year_published": 2000,
+            "gaming_system": "PC",
+            "condition": "good",
+            **fields
+        })
+        assert response.status_code == 201, response.text
+        return response.json()
+    return make_game
+
+
+@pytest.fixture
+def interleave(database):
+    # runs a statement on its own connection right before the app's first statement starting with `prefix`:
+    # a concurrent request that commits between the handler's read and its write
+    listeners = []
+
+    def interleave(prefix, sql, parameters=()):
+        fired = []
+
+        def before(conn, cursor, statement, params, context, executemany):
+            if not fired and statement.lstrip().startswith(prefix):
+                fired.append(statement)
+                database.execute(sql, parameters)
+
+        event.listen(engine, "before_cursor_execute", before)
+        listeners.append(before)
+        return fired
+
+    yield interleave
+    for before in listeners:
+        event.remove(engine, "before_cursor_execute", before)
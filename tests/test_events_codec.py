@@ -0,0 +1,58 @@
+import json
+import pytest
+from events.codec import BINARY, CONTENT_TYPE_HEADER, JSON, EventDecodeError, decode, encode
+from events.schemas import SCHEMAS, STRING
+
+
+def _sample(records, n=0):
+    data = {}
+    for i, (name, kind) in enumerate(records.fields):
+        if kind is STRING:
+            # a repeated value, a null and non-ASCII text exercise the back-references and lengths
+            data[name] = [None, "same@example.com", f"Ünïcode {n}.{i} " + "x" * 70][i % 3]
+        else:
+            data[name] = [_sample(kind, n + j + 1) for j in range(3)]
+    return data
+
+
+@pytest.mark.parametrize("schema", SCHEMAS, ids=lambda schema: schema.event_type)
+def test_binary_round_trip(schema):
+    message = {"event_type": schema.event_type, "data": _sample(schema)}
+
+    value, headers = encode(message)
+
+    assert headers == [(CONTENT_TYPE_HEADER, BINARY)]
+    assert decode(value, headers) == message
+    assert len(value) < len(json.dumps(message))
+
+
+def test_unknown_fields_and_events_fall_back_to_json():
+    unknown_field = {"event_type": "password_changed", "data": {"user_email": "a@example.com", "new_field": "x"}}
+    unknown_event = {"event_type": "something_new", "data": {"a": 1}}
+
+    for message in (unknown_field, unknown_event):
+        value, headers = encode(message)
+        assert headers == [(CONTENT_TYPE_HEADER, JSON)]
+        assert decode(value, headers) == message
+
+
+def test_messages_without_a_content_type_are_json():
+    assert decode(b'{"event_type": "password_changed", "data": {}}') == {"event_type": "password_changed", "data": {}}
+
+
+@pytest.mark.parametrize("corrupt", [
+    lambda value: value[:2],
+    lambda value: value[:-3],
+    lambda value: value + b"\x00",
+    lambda value: b"\xff\xff" + value[2:],
+])
+def test_corrupt_payloads_raise_decode_errors(corrupt):
+    value, headers = encode({"event_type": "trade_offer_created", "data": _sample(SCHEMAS[1])})
+
+    with pytest.raises(EventDecodeError):
+        decode(corrupt(value), headers)
+
+
+def test_unsupported_content_type_is_rejected():
+    with pytest.raises(EventDecodeError):
+        decode(b"{}", [(CONTENT_TYPE_HEADER, b"application/xml")])
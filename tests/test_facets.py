@@ -0,0 +1,61 @@
+from collections import Counter
+from app.facets import FACET_COLUMNS
+
+
+def _expected(database, where="", parameters=()):
+    rows = database.execute(
+        f"SELECT gaming_system, condition, publisher, year_published FROM video_games {where}", parameters
+    ).fetchall()
+    return {
+        column: dict(Counter(str(row[i]).lower() if column == "condition" else str(row[i]) for row in rows))
+        for i, column in enumerate(FACET_COLUMNS)
+    }
+
+
+def _facets(client, path):
+    return client.get(path).json()["facets"]
+
+
+def test_facets_are_opt_in(client):
+    assert client.get("/games").json()["facets"] is None
+
+
+def test_facet_counts_follow_every_write(client, database, make_user, make_game):
+    owner = make_user()
+    created = client.post(f"/games/bulk?owner_id={owner['id']}", json=[
+        {
+            "name": f"Facet {i}",
+            "publisher": ["Sega", "Capcom"][i % 2],
+            "year_published": 1990 + i % 3,
+            "gaming_system": ["Saturn", "Dreamcast"][i % 2],
+            "condition": ["good", "fair"][i % 2]
+        }
+        for i in range(12)
+    ]).json()["items"]
+    ids = [item["id"] for item in created]
+    assert _facets(client, "/games?facets=true") == _expected(database)
+
+    # a game moved between two values of one facet, and one changed twice in the same batch
+    client.patch("/games/bulk", json=[
+        {"id": ids[0], "gaming_system": "Dreamcast"},
+        {"id": ids[1], "condition": "poor"},
+        {"id": ids[1], "publisher": "Sega"},
+    ])
+    client.put(f"/games/{ids[2]}", json={"year_published": 1999})
+    client.request("DELETE", "/games/bulk", json={"ids": [ids[3], ids[3], ids[4]]})
+    client.delete(f"/games/{ids[5]}")
+    make_game(owner, gaming_system="Saturn", publisher="Sega")
+
+    assert _facets(client, "/games?facets=true") == _expected(database)
+    assert _facets(client, "/games?gaming_system=Saturn&year_min=1991&year_max=1992&facets=true") == _expected(
+        database, "WHERE gaming_system = 'Saturn' AND year_published BETWEEN 1991 AND 1992"
+    )
+
+
+def test_emptied_facet_values_disappear(client, make_user, make_game):
+    game = make_game(make_user(), publisher="Only Once")
+    assert _facets(client, "/games?publisher=Only%20Once&facets=true")["publisher"] == {"Only Once": 1}
+
+    client.delete(f"/games/{game['id']}")
+
+    assert "Only Once" not in _facets(client, "/games?facets=true")["publisher"]
@@ -0,0 +1,51 @@
+from datetime import datetime
+import pytest
+from fastapi import HTTPException
+from app.models import TradeOffer, VideoGame
+from app.pagination import decode_cursor, encode_cursor
+
+
+def _walk(client, path, limit):
+    ids = []
+    url = f"{path}{'&' if '?' in path else '?'}limit={limit}"
+    while url:
+        body = client.get(url).json()
+        ids += [item["id"] for item in body["items"]]
+        next_link = body["links"].get("next")
+        url = next_link["href"].replace("http://testserver", "") if next_link else None
+    return ids
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 17, 12, 30, 45, 123456)
+    columns = (TradeOffer.created_at, TradeOffer.id)
+
+    assert decode_cursor(encode_cursor(created_at, 42), columns) == [created_at, 42]
+    assert decode_cursor(encode_cursor(7), (VideoGame.id,)) == [7]
+
+
+@pytest.mark.parametrize("cursor", ["garbage!", encode_cursor(1, 2), encode_cursor("not a date", 1)])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as raised:
+        decode_cursor(cursor, (TradeOffer.created_at, TradeOffer.id))
+    assert raised.value.status_code == 400
+
+
+def test_cursor_pages_cover_the_collection_once(client, make_user, make_game):
+    owner = make_user()
+    years = [2003, 2001, 2003, 2002, 2001, 2004, 2002]
+    for year in years:
+        make_game(owner, year_published=year, gaming_system="Pagination")
+
+    by_id = _walk(client, "/games?gaming_system=Pagination", 2)
+    by_year = _walk(client, "/games?gaming_system=Pagination&year_min=2000&year_max=2010", 3)
+    owned = _walk(client, f"/users/{owner['id']}/games", 2)
+
+    assert len(by_id) == len(years) and by_id == sorted(by_id)
+    assert sorted(by_year) == sorted(by_id)
+    assert [years[by_id.index(game_id)] for game_id in by_year] == sorted(years)
+    assert sorted(owned) == by_id
+
+
+def test_invalid_cursor_returns_400(client):
+    assert client.get("/games?cursor=garbage!").status_code == 400
@@ -0,0 +1,12 @@
+import os
+import subprocess
+import sys
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts", "check_query_plans.py")
+
+
+def test_router_queries_use_indexes():
+    # its own process: the script points the app at a database of its own before importing it
+    result = subprocess.run([sys.executable, SCRIPT], capture_output=True, text=True, timeout=300)
+
+    assert result.returncode == 0, "\n".join(line for line in result.stdout.splitlines() if "[FAIL]" in line)
@@ -0,0 +1,113 @@
+import pytest
+
+
+@pytest.fixture
+def offer(client, make_user, make_game):
+    offerer, receiver = make_user(), make_user()
+    offered, requested = make_game(offerer), make_game(receiver)
+    response = client.post("/trade-offers", json={"offered_game_id": offered["id"], "requested_game_id": requested["id"]})
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _status(database, offer):
+    return database.execute("SELECT status FROM trade_offers WHERE id = ?", (offer["id"],)).fetchone()[0]
+
+
+def _owner(database, game_id):
+    return database.execute("SELECT owner_id FROM video_games WHERE id = ?", (game_id,)).fetchone()[0]
+
+
+def _events(database, offer, event_type):
+    return database.execute(
+        "SELECT COUNT(*) FROM outbox WHERE aggregate_type = 'trade_offer' AND aggregate_id = ? AND event_type = ?",
+        (str(offer["id"]), event_type)
+    ).fetchone()[0]
+
+
+def test_accept_swaps_owners_and_cancels_competing_offers(client, make_user, make_game, database, offer):
+    competing = client.post("/trade-offers", json={
+        "offered_game_id": make_game(make_user())["id"], "requested_game_id": offer["requested_game_id"]
+    }).json()
+
+    response = client.put(f"/trade-offers/{offer['id']}/accept")
+
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "accepted"
+    assert _owner(database, offer["offered_game_id"]) == offer["receiver_id"]
+    assert _owner(database, offer["requested_game_id"]) == offer["offerer_id"]
+    assert _status(database, competing) == "CANCELLED"
+    assert _events(database, offer, "trade_offer_accepted") == 1
+
+
+def test_accept_loses_to_a_concurrent_reject(client, database, interleave, offer):
+    interleave("UPDATE trade_offers SET status", "UPDATE trade_offers SET status = 'REJECTED' WHERE id = ?", (offer["id"],))
+
+    response = client.put(f"/trade-offers/{offer['id']}/accept")
+
+    assert response.status_code == 409
+    assert _status(database, offer) == "REJECTED"
+    assert _owner(database, offer["offered_game_id"]) == offer["offerer_id"]
+    assert _events(database, offer, "trade_offer_accepted") == 0
+
+
+def test_accept_rolls_back_when_a_game_changed_owner(client, make_user, database, interleave, offer):
+    other = make_user()
+    interleave(
+        "UPDATE trade_offers SET status", "UPDATE video_games SET owner_id = ? WHERE id = ?",
+        (other["id"], offer["offered_game_id"])
+    )
+
+    response = client.put(f"/trade-offers/{offer['id']}/accept")
+
+    assert response.status_code == 409
+    assert _status(database, offer) == "PENDING"
+    assert _owner(database, offer["requested_game_id"]) == offer["receiver_id"]
+
+
+@pytest.mark.parametrize("action", ["reject", "cancel"])
+def test_close_loses_to_a_concurrent_accept(client, database, interleave, offer, action):
+    fired = interleave(
+        "UPDATE trade_offers SET status", "UPDATE trade_offers SET status = 'ACCEPTED' WHERE id = ?", (offer["id"],)
+    )
+
+    response = client.put(f"/trade-offers/{offer['id']}/{action}")
+
+    assert fired
+    assert response.status_code == 409
+    assert _status(database, offer) == "ACCEPTED"
+    assert _events(database, offer, "trade_offer_rejected") == 0
+
+
+def test_reject_writes_its_event(client, database, offer):
+    response = client.put(f"/trade-offers/{offer['id']}/reject")
+
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "rejected"
+    assert _events(database, offer, "trade_offer_rejected") == 1
+    assert client.put(f"/trade-offers/{offer['id']}/cancel").status_code == 400
+
+
+def test_if_match_with_a_stale_etag_is_rejected(client, offer):
+    etag = client.get(f"/trade-offers/{offer['id']}").headers["ETag"]
+    game_etag = client.get(f"/games/{offer['offered_game_id']}").headers["ETag"]
+
+    assert client.put(f"/games/{offer['offered_game_id']}", json={"name": "Renamed"}, headers={"If-Match": game_etag}).status_code == 200
+    stale = client.put(f"/games/{offer['offered_game_id']}", json={"name": "Again"}, headers={"If-Match": game_etag})
+    assert stale.status_code == 412
+    assert client.get(f"/games/{offer['offered_game_id']}").json()["name"] == "Renamed"
+
+    assert client.put(f"/trade-offers/{offer['id']}/reject", headers={"If-Match": '"0000000000000000.0000"'}).status_code == 412
+    assert client.put(f"/trade-offers/{offer['id']}/reject", headers={"If-Match": etag}).status_code == 200
+
+
+def test_if_match_catches_a_write_after_the_check(client, database, interleave, offer):
+    etag = client.get(f"/games/{offer['offered_game_id']}").headers["ETag"]
+    interleave(
+        "UPDATE video_games SET updated_at", "UPDATE video_games SET updated_at = '2001-01-01 00:00:00.000000' WHERE id = ?",
+        (offer["offered_game_id"],)
+    )
+
+    response = client.put(f"/games/{offer['offered_game_id']}", json={"name": "Renamed"}, headers={"If-Match": etag})
+
+    assert response.status_code == 412